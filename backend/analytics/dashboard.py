@@ -0,0 +1,153 @@
+"""
+Incrementally maintained borough dashboard aggregates.
+
+vw_ProposalDashboardSummary joins and groups every proposal on each read.
+BoroughDashboardAggregate keeps one row per borough instead, adjusted by
+deltas whenever proposals change, so the dashboard reads five current rows.
+
+Model saves and deletes are tracked by signals. Paths that write proposals
+without signals (bulk score and projection updates, stored procedures) wrap
+the write in ``track_proposal_changes()``, which diffs each proposal's
+contribution before and after. Deltas are applied with ``F()`` expressions,
+so concurrent writers never lose each other's updates, and the before read
+locks the proposal rows until the write commits, so a concurrent writer
+cannot diff against a state that is about to change. Both paths run in one
+transaction (``Proposal.save`` and ``ProposalUnitMix.save`` are atomic;
+deletes already are).
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from proposals.models import Borough, Proposal
+
+from .models import BoroughDashboardAggregate
+from .portfolio import apply_cell_changes, proposal_cells
+
+# BoroughDashboardAggregate column -> Proposal field summed into it.
+SUMMED_FIELDS = {
+    "total_units": "total_units",
+    "total_estimated_cost": "estimated_cost",
+    "total_projected_revenue": "projected_revenue",
+    "score_sum": "feasibility_score",
+}
+
+Contribution = Tuple[int, Counter]
+
+
+def _contribution(borough_id: int, values: Dict[str, object]) -> Contribution:
+    counts = Counter({"total_proposals": 1})
+    for column, field in SUMMED_FIELDS.items():
+        if values[field] is not None:
+            counts[column] += values[field]
+    if values["feasibility_score"] is not None:
+        counts["score_count"] += 1
+    return borough_id, counts
+
+
+def contributions(proposal_ids: Iterable[int]) -> Dict[int, Contribution]:
+    """
+    Each proposal's (borough ID, aggregate contribution), in one query. The
+    rows stay locked until the transaction ends, so call it inside one.
+    """
+
+    ids = list(proposal_ids)
+    if not ids:
+        return {}
+    # Locking in ID order keeps overlapping writers from deadlocking.
+    rows = Proposal.objects.select_for_update().filter(id__in=ids).order_by("id").values(
+        "id", "neighborhood__borough_id", *SUMMED_FIELDS.values()
+    )
+    return {row["id"]: _contribution(row["neighborhood__borough_id"], row) for row in rows}
+
+
+def apply_changes(
+    before: Dict[int, Contribution], after: Dict[int, Contribution]
+) -> Dict[int, Counter]:
+    """Move the aggregates from ``before`` to ``after``; returns the deltas applied."""
+
+    deltas: Dict[int, Counter] = defaultdict(Counter)
+    for pid in before.keys() | after.keys():
+        if before.get(pid) == after.get(pid):
+            continue
+        if pid in before:
+            borough_id, counts = before[pid]
+            deltas[borough_id].subtract(counts)
+        if pid in after:
+            borough_id, counts = after[pid]
+            deltas[borough_id].update(counts)
+
+    applied = {}
+    for borough_id, delta in deltas.items():
+        delta = {column: value for column, value in delta.items() if value}
+        if not delta:
+            continue
+        updated = BoroughDashboardAggregate.objects.filter(borough_id=borough_id).update(
+            **{column: F(column) + value for column, value in delta.items()}
+        )
+        if not updated:
+            # No row yet (borough created before this table existed, say);
+            # the rebuild already includes this change.
+            rebuild_dashboard_aggregates([borough_id])
+        applied[borough_id] = Counter(delta)
+    return applied
+
+
+@contextmanager
+def track_proposal_changes(proposal_ids: Iterable[int]) -> Iterator[None]:
+    """
+    Apply the borough aggregate and portfolio cube deltas of whatever the
+    block writes to ``proposal_ids``.
+    """
+
+    ids = list(proposal_ids)
+    if not ids:
+        yield
+        return
+    # Joins an enclosing transaction without a savepoint.
+    with transaction.atomic(savepoint=False):
+        before, cells_before = contributions(ids), proposal_cells(ids)
+        yield
+        apply_changes(before, contributions(ids))
+        apply_cell_changes(cells_before, proposal_cells(ids))
+
+
+def rebuild_dashboard_aggregates(borough_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute aggregates from scratch for ``borough_ids`` (all boroughs when
+    None). Used to create missing rows and after a neighborhood changes
+    borough; returns the number of rows written.
+    """
+
+    boroughs = Borough.objects.all()
+    if borough_ids is not None:
+        boroughs = boroughs.filter(id__in=list(borough_ids))
+    ids = list(boroughs.values_list("id", flat=True))
+    totals = {
+        row["neighborhood__borough_id"]: row
+        for row in Proposal.objects.filter(neighborhood__borough_id__in=ids)
+        .values("neighborhood__borough_id")
+        .annotate(
+            total_proposals=Count("id"),
+            score_count=Count("feasibility_score"),
+            **{column: Sum(field) for column, field in SUMMED_FIELDS.items()},
+        )
+    }
+    with transaction.atomic():
+        for borough_id in ids:
+            row = totals.get(borough_id, {})
+            BoroughDashboardAggregate.objects.update_or_create(
+                borough_id=borough_id,
+                defaults={
+                    "total_proposals": row.get("total_proposals", 0),
+                    "score_count": row.get("score_count", 0),
+                    **{column: row.get(column) or 0 for column in SUMMED_FIELDS},
+                },
+            )
+    return len(ids)
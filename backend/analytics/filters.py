@@ -0,0 +1,12 @@
+import django_filters
+
+from .models import NeighborhoodRankingSnapshot
+
+
+class NeighborhoodRankingFilter(django_filters.FilterSet):
+    borough = django_filters.CharFilter(field_name="borough_code", lookup_expr="iexact")
+    quartile = django_filters.NumberFilter(field_name="quartile")
+
+    class Meta:
+        model = NeighborhoodRankingSnapshot
+        fields = ["borough", "quartile"]
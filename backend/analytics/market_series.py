@@ -0,0 +1,233 @@
+"""
+Vectorized market time series for many neighborhoods at once.
+
+The market-trends endpoint returns one paginated row per neighborhood and
+period, which left every chart to page through the rows and aggregate them
+itself. Here the requested neighborhoods' MarketData is read in one query
+into a (neighborhood x period) matrix per metric, with NaN marking missing
+periods. Rolling means, year-over-year changes, CAGR and borough rollups
+are then whole-matrix NumPy operations, so comparing 50 neighborhoods over
+20 years of quarters (4,000 rows) costs two queries and a few milliseconds
+of arithmetic.
+"""
+
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from django.db.models import F
+
+from proposals.models import MarketData, Neighborhood
+
+SERIES_METRICS = ("median_sale_price", "median_rent", "vacancy_rate_pct", "permits_issued")
+DEFAULT_METRICS = ("median_sale_price", "median_rent")
+MAX_SERIES_NEIGHBORHOODS = 100
+DEFAULT_WINDOW = 4
+MAX_WINDOW = 24
+
+
+@dataclass
+class MarketPanel:
+    """Row ``i`` of each matrix is ``neighborhoods[i]``; columns follow ``periods``."""
+
+    neighborhoods: List[Dict[str, Any]]
+    periods: np.ndarray  # datetime64[D], ascending
+    values: Dict[str, np.ndarray]
+
+
+def load_panel(
+    neighborhoods: Sequence[Dict[str, Any]],
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    *,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+) -> MarketPanel:
+    """
+    Read the market rows of ``neighborhoods`` (dicts with an ``id``) in one
+    query and scatter them into one matrix per metric.
+    """
+
+    ids = np.array([hood["id"] for hood in neighborhoods], dtype=np.int64)
+    rows = MarketData.objects.filter(neighborhood_id__in=ids.tolist())
+    if start:
+        rows = rows.filter(period__gte=start)
+    if end:
+        rows = rows.filter(period__lte=end)
+    rows = list(rows.order_by().values_list("neighborhood_id", "period", *metrics))
+
+    if not rows:
+        empty = np.empty((len(ids), 0))
+        return MarketPanel(list(neighborhoods), np.array([], dtype="datetime64[D]"), {m: empty for m in metrics})
+
+    row_hoods = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    row_periods = np.array([row[1] for row in rows], dtype="datetime64[D]")
+    row_values = np.array([row[2:] for row in rows], dtype=float)
+
+    order = np.argsort(ids)
+    hood_index = order[np.searchsorted(ids[order], row_hoods)]
+    periods, period_index = np.unique(row_periods, return_inverse=True)
+
+    values = {}
+    for column, metric in enumerate(metrics):
+        matrix = np.full((len(ids), len(periods)), np.nan)
+        matrix[hood_index, period_index] = row_values[:, column]
+        values[metric] = matrix
+    return MarketPanel(list(neighborhoods), periods, values)
+
+
+def rolling_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` periods; NaN unless every period is present."""
+    out = np.full(matrix.shape, np.nan)
+    if window > matrix.shape[1]:
+        return out
+    present = ~np.isnan(matrix)
+    pad = np.zeros((matrix.shape[0], 1))
+    sums = np.concatenate([pad, np.cumsum(np.where(present, matrix, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([pad, np.cumsum(present, axis=1)], axis=1)
+    window_sums = sums[:, window:] - sums[:, :-window]
+    full = (counts[:, window:] - counts[:, :-window]) == window
+    out[:, window - 1:] = np.where(full, window_sums / window, np.nan)
+    return out
+
+
+def _year_earlier_index(periods: np.ndarray) -> np.ndarray:
+    """Column of the same period a year earlier, or -1 when it is not on the axis."""
+    months = periods.astype("datetime64[M]")
+    day_offset = periods - months.astype("datetime64[D]")
+    earlier = (months - 12).astype("datetime64[D]") + day_offset
+    index = np.searchsorted(periods, earlier)
+    clipped = np.minimum(index, len(periods) - 1)
+    found = (index < len(periods)) & (periods[clipped] == earlier)
+    return np.where(found, clipped, -1)
+
+
+def yoy_pct(matrix: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """Percent change versus the same period a year earlier."""
+    out = np.full(matrix.shape, np.nan)
+    if not len(periods):
+        return out
+    earlier = _year_earlier_index(periods)
+    columns = np.flatnonzero(earlier >= 0)
+    previous = matrix[:, earlier[columns]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (matrix[:, columns] - previous) / previous * 100
+    out[:, columns] = np.where(np.isfinite(change), change, np.nan)
+    return out
+
+
+def cagr_pct(matrix: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """Compound annual growth from each row's first to its last present value."""
+    out = np.full(matrix.shape[0], np.nan)
+    present = ~np.isnan(matrix)
+    has_any = present.any(axis=1)
+    if not has_any.any():
+        return out
+    rows = np.arange(matrix.shape[0])
+    first = present.argmax(axis=1)
+    last = matrix.shape[1] - 1 - present[:, ::-1].argmax(axis=1)
+    years = (periods[last] - periods[first]).astype(float) / 365.25
+    start, finish = matrix[rows, first], matrix[rows, last]
+    valid = has_any & (years > 0) & (start > 0) & (finish >= 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (finish / start) ** (1 / years) - 1
+    out[valid] = growth[valid] * 100
+    return out
+
+
+def borough_rollup(matrix: np.ndarray, borough_index: np.ndarray, borough_count: int) -> np.ndarray:
+    """Per-period mean over each borough's neighborhoods that reported that period."""
+    present = ~np.isnan(matrix)
+    sums = np.zeros((borough_count, matrix.shape[1]))
+    counts = np.zeros((borough_count, matrix.shape[1]))
+    np.add.at(sums, borough_index, np.where(present, matrix, 0.0))
+    np.add.at(counts, borough_index, present)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _compact(values: np.ndarray) -> List[Optional[float]]:
+    """Round to cents and turn NaN into None for JSON."""
+    rounded = np.round(values, 2).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+
+def _summaries(matrix: np.ndarray, periods: np.ndarray, window: int) -> List[Dict[str, Any]]:
+    rolling = rolling_mean(matrix, window)
+    yoy = yoy_pct(matrix, periods)
+    cagr = _compact(cagr_pct(matrix, periods))
+    return [
+        {
+            "values": _compact(matrix[i]),
+            "rolling_mean": _compact(rolling[i]),
+            "yoy_pct": _compact(yoy[i]),
+            "cagr_pct": cagr[i],
+        }
+        for i in range(matrix.shape[0])
+    ]
+
+
+def market_series(
+    neighborhoods: Sequence[Dict[str, Any]],
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    *,
+    window: int = DEFAULT_WINDOW,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+) -> Dict[str, Any]:
+    """
+    Aligned series for ``neighborhoods`` (dicts of id, name, borough_code and
+    borough_name) plus the mean of the selected neighborhoods per borough.
+    """
+
+    panel = load_panel(neighborhoods, metrics, start=start, end=end)
+    codes = [hood["borough_code"] for hood in panel.neighborhoods]
+    borough_codes, borough_index = np.unique(np.array(codes, dtype=object), return_inverse=True)
+    borough_names = {hood["borough_code"]: hood["borough_name"] for hood in panel.neighborhoods}
+
+    hood_results = [
+        {"id": hood["id"], "name": hood["name"], "borough": hood["borough_code"]}
+        for hood in panel.neighborhoods
+    ]
+    borough_results = [
+        {
+            "code": code,
+            "name": borough_names[code],
+            "neighborhood_count": int(np.count_nonzero(borough_index == i)),
+        }
+        for i, code in enumerate(borough_codes)
+    ]
+    for metric in metrics:
+        matrix = panel.values[metric]
+        for result, summary in zip(hood_results, _summaries(matrix, panel.periods, window)):
+            result[metric] = summary
+        rollup = borough_rollup(matrix, borough_index, len(borough_codes))
+        for result, summary in zip(borough_results, _summaries(rollup, panel.periods, window)):
+            result[metric] = summary
+
+    return {
+        "periods": [str(period) for period in panel.periods],
+        "metrics": list(metrics),
+        "window": window,
+        "neighborhoods": hood_results,
+        "boroughs": borough_results,
+    }
+
+
+def select_neighborhoods(
+    ids: Optional[Sequence[int]] = None, borough: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """The neighborhoods to chart, ordered by borough and name."""
+    qs = Neighborhood.objects.all()
+    if ids:
+        qs = qs.filter(id__in=ids)
+    if borough:
+        qs = qs.filter(borough__code__iexact=borough)
+    return list(
+        qs.order_by("borough__name", "name").values(
+            "id", "name", borough_code=F("borough__code"), borough_name=F("borough__name")
+        )[: MAX_SERIES_NEIGHBORHOODS + 1]
+    )
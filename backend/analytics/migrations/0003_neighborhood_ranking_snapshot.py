@@ -0,0 +1,65 @@
+# Generated by Django 5.1.15 on 2026-10-19 13:25
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_snapshot(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        # On SQL Server the view comes from deploy_sql, which may run later.
+        if "vw_NeighborhoodRankings" not in connection.introspection.table_names(cursor, include_views=True):
+            return
+        cursor.execute(
+            """
+            INSERT INTO analytics_neighborhoodrankingsnapshot (
+                neighborhood_id, neighborhood_name, borough_name, borough_code,
+                median_sale_price, median_rent, vacancy_rate_pct, population,
+                median_income, transit_score, development_score, overall_rank,
+                quartile, refreshed_at
+            )
+            SELECT r.neighborhood_id, r.neighborhood_name, r.borough_name, b.code,
+                r.median_sale_price, r.median_rent, r.vacancy_rate_pct, r.population,
+                r.median_income, r.transit_score, r.development_score, r.overall_rank,
+                r.quartile, %s
+            FROM vw_NeighborhoodRankings r
+            INNER JOIN proposals_neighborhood n ON n.id = r.neighborhood_id
+            INNER JOIN proposals_borough b ON b.id = n.borough_id
+            """,
+            [timezone.now()],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_create_sqlite_views'),
+        ('proposals', '0006_ingestion_change_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NeighborhoodRankingSnapshot',
+            fields=[
+                ('neighborhood_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('neighborhood_name', models.CharField(max_length=100)),
+                ('borough_name', models.CharField(max_length=50)),
+                ('borough_code', models.CharField(max_length=5)),
+                ('median_sale_price', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('median_rent', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('vacancy_rate_pct', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('population', models.IntegerField()),
+                ('median_income', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('transit_score', models.DecimalField(decimal_places=1, max_digits=4)),
+                ('development_score', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('overall_rank', models.IntegerField()),
+                ('quartile', models.IntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['overall_rank', 'neighborhood_id'],
+                'indexes': [models.Index(fields=['overall_rank', 'neighborhood_id'], name='ranking_snapshot_rank_idx'), models.Index(fields=['borough_code', 'overall_rank', 'neighborhood_id'], name='ranking_snapshot_borough_idx'), models.Index(fields=['quartile', 'overall_rank', 'neighborhood_id'], name='ranking_snapshot_quartile_idx')],
+            },
+        ),
+        migrations.RunPython(populate_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+"""Point the SQLite vw_MarketTrends at the stored change columns."""
+
+from django.db import migrations
+
+STORED_CHANGES_VIEW = """
+    CREATE VIEW vw_MarketTrends AS
+    SELECT m.id, m.neighborhood_id, n.name AS neighborhood_name, m.period,
+        m.median_sale_price, m.median_rent,
+        m.price_change_pct, m.rent_change_pct,
+        m.price_change_yoy_pct, m.rent_change_yoy_pct
+    FROM proposals_marketdata m
+    INNER JOIN proposals_neighborhood n ON n.id = m.neighborhood_id
+"""
+
+LAG_VIEW = """
+    CREATE VIEW vw_MarketTrends AS
+    SELECT m.id, m.neighborhood_id, n.name AS neighborhood_name, m.period,
+        m.median_sale_price, m.median_rent,
+        (m.median_sale_price - LAG(m.median_sale_price) OVER (
+            PARTITION BY m.neighborhood_id ORDER BY m.period
+        )) / NULLIF(LAG(m.median_sale_price) OVER (
+            PARTITION BY m.neighborhood_id ORDER BY m.period
+        ), 0) * 100 AS price_change_pct,
+        (m.median_rent - LAG(m.median_rent) OVER (
+            PARTITION BY m.neighborhood_id ORDER BY m.period
+        )) / NULLIF(LAG(m.median_rent) OVER (
+            PARTITION BY m.neighborhood_id ORDER BY m.period
+        ), 0) * 100 AS rent_change_pct
+    FROM proposals_marketdata m
+    INNER JOIN proposals_neighborhood n ON n.id = m.neighborhood_id
+"""
+
+
+def _replace_view(sql):
+    def replace(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("DROP VIEW IF EXISTS vw_MarketTrends")
+            cursor.execute(sql)
+
+    return replace
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_neighborhood_ranking_snapshot"),
+        ("proposals", "0007_market_data_change_columns"),
+    ]
+
+    operations = [
+        migrations.RunPython(_replace_view(STORED_CHANGES_VIEW), _replace_view(LAG_VIEW)),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.15 on 2026-10-19 13:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_aggregates(apps, schema_editor):
+    Borough = apps.get_model("proposals", "Borough")
+    Proposal = apps.get_model("proposals", "Proposal")
+    Aggregate = apps.get_model("analytics", "BoroughDashboardAggregate")
+    totals = {
+        row["neighborhood__borough_id"]: row
+        for row in Proposal.objects.values("neighborhood__borough_id").annotate(
+            total_proposals=Count("id"),
+            total_units=Sum("total_units"),
+            total_estimated_cost=Sum("estimated_cost"),
+            total_projected_revenue=Sum("projected_revenue"),
+            score_sum=Sum("feasibility_score"),
+            score_count=Count("feasibility_score"),
+        )
+    }
+    Aggregate.objects.bulk_create(
+        Aggregate(
+            borough_id=borough_id,
+            **{
+                column: totals.get(borough_id, {}).get(column) or 0
+                for column in (
+                    "total_proposals", "total_units", "total_estimated_cost",
+                    "total_projected_revenue", "score_sum", "score_count",
+                )
+            },
+        )
+        for borough_id in Borough.objects.values_list("id", flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_market_trends_stored_changes'),
+        ('proposals', '0007_market_data_change_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoroughDashboardAggregate',
+            fields=[
+                ('borough', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_aggregate', serialize=False, to='proposals.borough')),
+                ('total_proposals', models.IntegerField(default=0)),
+                ('total_units', models.IntegerField(default=0)),
+                ('total_estimated_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_projected_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('score_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['borough__name'],
+            },
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
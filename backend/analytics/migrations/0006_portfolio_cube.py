@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-19 13:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from analytics.portfolio import rebuild_portfolio
+
+
+def backfill_portfolio(apps, schema_editor):
+    rebuild_portfolio(
+        cell_model=apps.get_model("analytics", "PortfolioCell"),
+        proposal_model=apps.get_model("proposals", "Proposal"),
+        unit_mix_model=apps.get_model("proposals", "ProposalUnitMix"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_borough_dashboard_aggregates'),
+        ('proposals', '0007_market_data_change_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('unit_type', models.CharField(blank=True, max_length=10)),
+                ('total_proposals', models.IntegerField(default=0)),
+                ('total_units', models.IntegerField(default=0)),
+                ('total_estimated_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_projected_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('score_count', models.IntegerField(default=0)),
+                ('neighborhood', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_cells', to='proposals.neighborhood')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['unit_type', 'status'], name='portfolio_cell_slice_idx')],
+                'unique_together': {('neighborhood', 'status', 'unit_type')},
+            },
+        ),
+        migrations.RunPython(backfill_portfolio, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.db import models
 
 
@@ -22,8 +24,49 @@ class NeighborhoodRanking(models.Model):
         db_table = "vw_NeighborhoodRankings"
 
 
+class NeighborhoodRankingSnapshot(models.Model):
+    """
+    Materialized copy of vw_NeighborhoodRankings, rebuilt by
+    analytics.rankings.refresh_rankings() after market or demographic data
+    changes. Reads are an indexed scan instead of the view's window functions
+    over the full history.
+    """
+
+    neighborhood_id = models.IntegerField(primary_key=True)
+    neighborhood_name = models.CharField(max_length=100)
+    borough_name = models.CharField(max_length=50)
+    borough_code = models.CharField(max_length=5)
+    median_sale_price = models.DecimalField(max_digits=14, decimal_places=2)
+    median_rent = models.DecimalField(max_digits=10, decimal_places=2)
+    vacancy_rate_pct = models.DecimalField(max_digits=5, decimal_places=2)
+    population = models.IntegerField()
+    median_income = models.DecimalField(max_digits=12, decimal_places=2)
+    transit_score = models.DecimalField(max_digits=4, decimal_places=1)
+    development_score = models.DecimalField(max_digits=7, decimal_places=2)
+    overall_rank = models.IntegerField()
+    quartile = models.IntegerField()
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["overall_rank", "neighborhood_id"]
+        indexes = [
+            models.Index(fields=["overall_rank", "neighborhood_id"], name="ranking_snapshot_rank_idx"),
+            models.Index(
+                fields=["borough_code", "overall_rank", "neighborhood_id"],
+                name="ranking_snapshot_borough_idx",
+            ),
+            models.Index(
+                fields=["quartile", "overall_rank", "neighborhood_id"],
+                name="ranking_snapshot_quartile_idx",
+            ),
+        ]
+
+
 class MarketTrend(models.Model):
-    """Unmanaged model mapped to vw_MarketTrends T-SQL view."""
+    """
+    Unmanaged model mapped to vw_MarketTrends T-SQL view. The change columns
+    are stored on proposals_marketdata (see proposals/market_changes.py).
+    """
 
     id = models.IntegerField(primary_key=True)
     neighborhood_id = models.IntegerField()
@@ -33,12 +76,74 @@ class MarketTrend(models.Model):
     median_rent = models.DecimalField(max_digits=10, decimal_places=2)
     price_change_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True)
     rent_change_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True)
+    price_change_yoy_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True)
+    rent_change_yoy_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True)
 
     class Meta:
         managed = False
         db_table = "vw_MarketTrends"
 
 
+class BoroughDashboardAggregate(models.Model):
+    """
+    Per-borough proposal totals, kept current by analytics.dashboard as
+    proposals are created, updated and deleted.
+    """
+
+    borough = models.OneToOneField(
+        "proposals.Borough", on_delete=models.CASCADE, primary_key=True,
+        related_name="dashboard_aggregate",
+    )
+    total_proposals = models.IntegerField(default=0)
+    total_units = models.IntegerField(default=0)
+    total_estimated_cost = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_projected_revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Sum and count of non-null feasibility scores, for the average.
+    score_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    score_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["borough__name"]
+
+    @property
+    def avg_feasibility_score(self):
+        if not self.score_count:
+            return None
+        return Decimal(self.score_sum) / self.score_count
+
+
+class PortfolioCell(models.Model):
+    """
+    One cell of the portfolio cube: proposal totals for a neighborhood,
+    status and unit type, kept current by analytics.portfolio.
+
+    A blank ``unit_type`` is the all-types cell holding every proposal once.
+    A unit-type cell counts the proposals whose mix includes that type, with
+    ``total_units`` holding only the units of that type, so those cells are
+    not additive across unit types.
+    """
+
+    ALL_UNIT_TYPES = ""
+
+    neighborhood = models.ForeignKey(
+        "proposals.Neighborhood", on_delete=models.CASCADE, related_name="portfolio_cells"
+    )
+    status = models.CharField(max_length=20)
+    unit_type = models.CharField(max_length=10, blank=True)
+    total_proposals = models.IntegerField(default=0)
+    total_units = models.IntegerField(default=0)
+    total_estimated_cost = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_projected_revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    score_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    score_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ["neighborhood", "status", "unit_type"]
+        indexes = [
+            models.Index(fields=["unit_type", "status"], name="portfolio_cell_slice_idx"),
+        ]
+
+
 class ProposalDashboardSummary(models.Model):
     """Unmanaged model mapped to vw_ProposalDashboardSummary T-SQL view."""
 
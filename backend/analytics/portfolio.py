@@ -0,0 +1,282 @@
+"""
+Incrementally maintained portfolio cube.
+
+PortfolioCell keeps proposal totals at the grain portfolio reports slice by:
+neighborhood x status x unit type, plus an all-types cell per neighborhood
+and status. Pivots, drill-downs and roll-ups by borough, neighborhood,
+status and unit type are GROUP BYs over these cells (joined to the small
+neighborhood and borough tables for names), never over proposals.
+
+Cells move by deltas, as the borough dashboard aggregates do
+(analytics.dashboard). Proposal and unit mix saves and deletes are tracked
+by signals, and ``track_proposal_changes()`` covers the bulk writers; the
+before reads lock their rows, so concurrent writers cannot diff against a
+stale state. A proposal contributes to its all-types cell and to one cell
+per unit type in its mix. Deleting a proposal deletes its mix rows first,
+and each of those retires its own cell, so the proposal then retires only
+its all-types cell.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+
+from proposals.models import Proposal, ProposalUnitMix
+
+from .models import PortfolioCell
+
+ALL_UNIT_TYPES = PortfolioCell.ALL_UNIT_TYPES
+
+MEASURES = (
+    "total_proposals",
+    "total_units",
+    "total_estimated_cost",
+    "total_projected_revenue",
+    "score_sum",
+    "score_count",
+)
+
+# Group-by dimension -> output column -> PortfolioCell lookup.
+DIMENSIONS = {
+    "borough": {"borough": "neighborhood__borough__code", "borough_name": "neighborhood__borough__name"},
+    "neighborhood": {"neighborhood_id": "neighborhood_id", "neighborhood_name": "neighborhood__name"},
+    "status": {"status": "status"},
+    "unit_type": {"unit_type": "unit_type"},
+}
+
+CellKey = Tuple[int, str, str]  # (neighborhood ID, status, unit type)
+Cells = Dict[CellKey, Counter]
+
+_PROPOSAL_VALUES = ("neighborhood_id", "status", "estimated_cost", "projected_revenue", "feasibility_score")
+_CENTS = Decimal("0.01")
+
+
+def _counts(row: Dict[str, Any], units: int) -> Counter:
+    counts = Counter({"total_proposals": 1, "total_units": units})
+    if row["estimated_cost"] is not None:
+        counts["total_estimated_cost"] += row["estimated_cost"]
+    if row["projected_revenue"] is not None:
+        counts["total_projected_revenue"] += row["projected_revenue"]
+    if row["feasibility_score"] is not None:
+        counts["score_sum"] += row["feasibility_score"]
+        counts["score_count"] += 1
+    return counts
+
+
+def proposal_cells(proposal_ids: Iterable[int], *, unit_types: bool = True) -> Dict[int, Cells]:
+    """
+    Each proposal's contribution to the cube, in one query. Without
+    ``unit_types`` only the all-types cell is included. The rows stay locked
+    until the transaction ends, as in analytics.dashboard.contributions.
+    """
+
+    ids = list(proposal_ids)
+    if not ids:
+        return {}
+    columns = ["id", "total_units", *_PROPOSAL_VALUES]
+    if unit_types:
+        columns += ["unit_mix__unit_type", "unit_mix__count"]
+    result: Dict[int, Cells] = {}
+    for row in Proposal.objects.select_for_update().filter(id__in=ids).order_by("id").values(*columns):
+        cells = result.setdefault(row["id"], {})
+        base = (row["neighborhood_id"], row["status"])
+        cells[(*base, ALL_UNIT_TYPES)] = _counts(row, row["total_units"])
+        if row.get("unit_mix__unit_type"):
+            cells[(*base, row["unit_mix__unit_type"])] = _counts(row, row["unit_mix__count"])
+    return result
+
+
+def unit_mix_cells(unit_mix_ids: Iterable[int]) -> Dict[int, Cells]:
+    """
+    Each unit mix row's contribution to its unit-type cell, in one query.
+    The rows stay locked until the transaction ends.
+    """
+
+    ids = list(unit_mix_ids)
+    if not ids:
+        return {}
+    rows = ProposalUnitMix.objects.select_for_update().filter(id__in=ids).order_by("id").values(
+        "id", "unit_type", "count", **{field: F(f"proposal__{field}") for field in _PROPOSAL_VALUES}
+    )
+    return {
+        row["id"]: {(row["neighborhood_id"], row["status"], row["unit_type"]): _counts(row, row["count"])}
+        for row in rows
+    }
+
+
+def _cell_ids(cells: Iterable[CellKey]) -> Dict[CellKey, int]:
+    wanted = set(cells)
+
+    def fetch():
+        rows = PortfolioCell.objects.filter(
+            neighborhood_id__in={cell[0] for cell in wanted},
+            status__in={cell[1] for cell in wanted},
+            unit_type__in={cell[2] for cell in wanted},
+        ).values_list("neighborhood_id", "status", "unit_type", "id")
+        return {cell[:3]: cell[3] for cell in rows if cell[:3] in wanted}
+
+    found = fetch()
+    missing = wanted - found.keys()
+    if missing:
+        # A cell no proposal has reached yet starts from zero.
+        PortfolioCell.objects.bulk_create(
+            [PortfolioCell(neighborhood_id=n, status=s, unit_type=u) for n, s, u in missing],
+            ignore_conflicts=True,
+        )
+        found = fetch()
+    return found
+
+
+def apply_cell_changes(before: Dict[int, Cells], after: Dict[int, Cells]) -> Cells:
+    """Move the cube from ``before`` to ``after`` in one UPDATE; returns the deltas applied."""
+
+    deltas: Cells = defaultdict(Counter)
+    for key in before.keys() | after.keys():
+        if before.get(key) == after.get(key):
+            continue
+        for cell, counts in before.get(key, {}).items():
+            deltas[cell].subtract(counts)
+        for cell, counts in after.get(key, {}).items():
+            deltas[cell].update(counts)
+    deltas = {
+        cell: Counter({column: value for column, value in delta.items() if value})
+        for cell, delta in deltas.items()
+    }
+    deltas = {cell: delta for cell, delta in deltas.items() if delta}
+    if not deltas:
+        return {}
+
+    ids = _cell_ids(deltas)
+    changes = {}
+    for column in MEASURES:
+        whens = [
+            When(pk=ids[cell], then=Value(delta[column]))
+            for cell, delta in deltas.items()
+            if delta[column]
+        ]
+        if whens:
+            output_field = PortfolioCell._meta.get_field(column).clone()
+            changes[column] = F(column) + Case(*whens, default=Value(0), output_field=output_field)
+    PortfolioCell.objects.filter(pk__in=[ids[cell] for cell in deltas]).update(**changes)
+    return deltas
+
+
+def rebuild_portfolio(
+    neighborhood_ids: Optional[Iterable[int]] = None,
+    *,
+    cell_model=PortfolioCell,
+    proposal_model=Proposal,
+    unit_mix_model=ProposalUnitMix,
+) -> int:
+    """
+    Recompute the cells of ``neighborhood_ids`` (all neighborhoods when None)
+    from scratch; returns the number of cells written. The model arguments
+    let migrations pass historical models.
+    """
+
+    proposals = proposal_model.objects.order_by()
+    mixes = unit_mix_model.objects.order_by()
+    cells = cell_model.objects.all()
+    if neighborhood_ids is not None:
+        ids = list(neighborhood_ids)
+        proposals = proposals.filter(neighborhood_id__in=ids)
+        mixes = mixes.filter(proposal__neighborhood_id__in=ids)
+        cells = cells.filter(neighborhood_id__in=ids)
+
+    totals = proposals.values("neighborhood_id", "status").annotate(
+        unit_type=Value(ALL_UNIT_TYPES),
+        proposals=Count("id"),
+        units=Sum("total_units"),
+        cost=Sum("estimated_cost"),
+        revenue=Sum("projected_revenue"),
+        scores=Sum("feasibility_score"),
+        scored=Count("feasibility_score"),
+    )
+    by_unit_type = mixes.values(
+        "unit_type", neighborhood_id=F("proposal__neighborhood_id"), status=F("proposal__status")
+    ).annotate(
+        proposals=Count("id"),
+        units=Sum("count"),
+        cost=Sum("proposal__estimated_cost"),
+        revenue=Sum("proposal__projected_revenue"),
+        scores=Sum("proposal__feasibility_score"),
+        scored=Count("proposal__feasibility_score"),
+    )
+    rows = [
+        cell_model(
+            neighborhood_id=row["neighborhood_id"],
+            status=row["status"],
+            unit_type=row["unit_type"],
+            total_proposals=row["proposals"],
+            total_units=row["units"] or 0,
+            total_estimated_cost=row["cost"] or 0,
+            total_projected_revenue=row["revenue"] or 0,
+            score_sum=row["scores"] or 0,
+            score_count=row["scored"],
+        )
+        for row in [*totals, *by_unit_type]
+    ]
+    with transaction.atomic():
+        cells.delete()
+        cell_model.objects.bulk_create(rows)
+    return len(rows)
+
+
+def portfolio_rollup(
+    group_by: Sequence[str],
+    *,
+    borough: Optional[str] = None,
+    neighborhood_id: Optional[int] = None,
+    status: Optional[str] = None,
+    unit_type: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Totals per combination of the ``group_by`` dimensions (one grand-total
+    row when empty), read from the cube. Unit-type slices count each
+    proposal once per unit type it includes; every other slice reads the
+    all-types cells, so each proposal counts once.
+    """
+
+    cells = PortfolioCell.objects.all()
+    if borough:
+        cells = cells.filter(neighborhood__borough__code__iexact=borough)
+    if neighborhood_id is not None:
+        cells = cells.filter(neighborhood_id=neighborhood_id)
+    if status:
+        cells = cells.filter(status=status)
+    if unit_type:
+        cells = cells.filter(unit_type=unit_type)
+    elif "unit_type" in group_by:
+        cells = cells.exclude(unit_type=ALL_UNIT_TYPES)
+    else:
+        cells = cells.filter(unit_type=ALL_UNIT_TYPES)
+
+    sums = {f"sum_{column}": Sum(column) for column in MEASURES}
+    columns = {name: lookup for dim in group_by for name, lookup in DIMENSIONS[dim].items()}
+    if columns:
+        plain = [name for name, lookup in columns.items() if name == lookup]
+        renamed = {name: F(lookup) for name, lookup in columns.items() if name != lookup}
+        rows = list(
+            cells.order_by().values(*plain, **renamed).annotate(**sums)
+            .filter(sum_total_proposals__gt=0).order_by(*columns)
+        )
+    else:
+        rows = [cells.aggregate(**sums)]
+        rows = [row for row in rows if row["sum_total_proposals"]]
+
+    results = []
+    for row in rows:
+        totals = {column: row.pop(f"sum_{column}") or 0 for column in MEASURES}
+        score_count = totals.pop("score_count")
+        score_sum = Decimal(totals.pop("score_sum"))
+        row.update(totals)
+        row["avg_feasibility_score"] = (
+            (score_sum / score_count).quantize(_CENTS, rounding=ROUND_HALF_UP) if score_count else None
+        )
+        results.append(row)
+    return results
@@ -0,0 +1,89 @@
+"""
+Neighborhood rankings snapshot.
+
+vw_NeighborhoodRankings ranks every neighborhood with two ROW_NUMBER passes
+over the full market and demographic history plus RANK and NTILE, so its
+cost grows with history. The API reads NeighborhoodRankingSnapshot instead;
+this module rebuilds it from the view after data changes. SQL Server cannot
+index the view itself (indexed views disallow window functions and outer
+joins), so both backends use the snapshot table.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from proposals.caching import pending_marker_timeout
+from proposals.queueing import broker_down, enqueue
+
+from .models import NeighborhoodRanking, NeighborhoodRankingSnapshot
+
+logger = logging.getLogger(__name__)
+
+REFRESH_PENDING_KEY = "analytics:rankings_refresh_pending"
+# Bulk loads save many rows in a burst; they share one refresh this many
+# seconds after the first change.
+RANKINGS_REFRESH_DELAY_S = 5
+# With a shared cache, changes made while the refresh waits in the queue keep
+# joining it for this long after it falls due (see pending_marker_timeout).
+RANKINGS_REFRESH_GRACE_S = 145
+
+_VIEW_COLUMNS = (
+    "neighborhood_id", "neighborhood_name", "borough_name",
+    "median_sale_price", "median_rent", "vacancy_rate_pct",
+    "population", "median_income", "transit_score",
+    "development_score", "overall_rank", "quartile",
+)
+
+
+def refresh_rankings() -> int:
+    """Rebuild the snapshot from vw_NeighborhoodRankings; returns the row count."""
+
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(c) for c in _VIEW_COLUMNS)
+    selected = ", ".join(f"r.{qn(c)}" for c in _VIEW_COLUMNS)
+    sql = (
+        f"INSERT INTO {qn(NeighborhoodRankingSnapshot._meta.db_table)} "
+        f"({columns}, {qn('borough_code')}, {qn('refreshed_at')}) "
+        f"SELECT {selected}, b.{qn('code')}, %s "
+        f"FROM {qn(NeighborhoodRanking._meta.db_table)} r "
+        f"INNER JOIN {qn('proposals_neighborhood')} n ON n.{qn('id')} = r.{qn('neighborhood_id')} "
+        f"INNER JOIN {qn('proposals_borough')} b ON b.{qn('id')} = n.{qn('borough_id')}"
+    )
+    # One transaction: readers see the old snapshot until the new one commits.
+    with transaction.atomic():
+        NeighborhoodRankingSnapshot.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [timezone.now()])
+            count = cursor.rowcount
+    logger.info("Neighborhood rankings snapshot rebuilt (%s rows).", count)
+    return count
+
+
+def schedule_rankings_refresh() -> None:
+    """
+    Queue a debounced snapshot rebuild. Call after market, demographic or
+    neighborhood rows commit; if the broker is unreachable the snapshot stays
+    as it is until the next periodic market data refresh.
+    """
+
+    if broker_down():
+        return
+    timeout = pending_marker_timeout(RANKINGS_REFRESH_DELAY_S, RANKINGS_REFRESH_GRACE_S)
+    if not cache.add(REFRESH_PENDING_KEY, True, timeout=timeout):
+        return
+
+    from .tasks import refresh_neighborhood_rankings
+
+    if enqueue(refresh_neighborhood_rankings, countdown=RANKINGS_REFRESH_DELAY_S) is None:
+        cache.delete(REFRESH_PENDING_KEY)
+
+
+def release_rankings_refresh() -> None:
+    """Let changes made from now on queue another rebuild."""
+
+    cache.delete(REFRESH_PENDING_KEY)
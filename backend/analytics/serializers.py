@@ -1,16 +1,16 @@
 from rest_framework import serializers
 
-from .models import MarketTrend, NeighborhoodRanking, ProposalDashboardSummary
+from .models import BoroughDashboardAggregate, MarketTrend, NeighborhoodRankingSnapshot
 
 
 class NeighborhoodRankingSerializer(serializers.ModelSerializer):
     class Meta:
-        model = NeighborhoodRanking
+        model = NeighborhoodRankingSnapshot
         fields = [
-            "neighborhood_id", "neighborhood_name", "borough_name",
+            "neighborhood_id", "neighborhood_name", "borough_name", "borough_code",
             "median_sale_price", "median_rent", "vacancy_rate_pct",
             "population", "median_income", "transit_score",
-            "development_score", "overall_rank", "quartile",
+            "development_score", "overall_rank", "quartile", "refreshed_at",
         ]
 
 
@@ -21,14 +21,36 @@ class MarketTrendSerializer(serializers.ModelSerializer):
             "id", "neighborhood_id", "neighborhood_name", "period",
             "median_sale_price", "median_rent",
             "price_change_pct", "rent_change_pct",
+            "price_change_yoy_pct", "rent_change_yoy_pct",
         ]
 
 
 class ProposalDashboardSummarySerializer(serializers.ModelSerializer):
+    borough_name = serializers.CharField(source="borough.name", read_only=True)
+    avg_feasibility_score = serializers.DecimalField(
+        max_digits=5, decimal_places=2, read_only=True, allow_null=True
+    )
+
     class Meta:
-        model = ProposalDashboardSummary
+        model = BoroughDashboardAggregate
         fields = [
             "borough_name", "total_proposals", "total_units",
             "avg_feasibility_score", "total_estimated_cost",
             "total_projected_revenue",
         ]
+
+
+class PortfolioRollupSerializer(serializers.Serializer):
+    """One row of a portfolio cube roll-up; only the grouped dimensions appear."""
+
+    borough = serializers.CharField(required=False)
+    borough_name = serializers.CharField(required=False)
+    neighborhood_id = serializers.IntegerField(required=False)
+    neighborhood_name = serializers.CharField(required=False)
+    status = serializers.CharField(required=False)
+    unit_type = serializers.CharField(required=False)
+    total_proposals = serializers.IntegerField()
+    total_units = serializers.IntegerField()
+    total_estimated_cost = serializers.DecimalField(max_digits=16, decimal_places=2)
+    total_projected_revenue = serializers.DecimalField(max_digits=16, decimal_places=2)
+    avg_feasibility_score = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
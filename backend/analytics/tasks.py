@@ -0,0 +1,18 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_neighborhood_rankings():
+    """Rebuild the rankings snapshot and retire cached ranking pages."""
+    from proposals.caching import market_views
+
+    from .rankings import refresh_rankings, release_rankings_refresh
+
+    release_rankings_refresh()
+    count = refresh_rankings()
+    market_views.invalidate()
+    return count
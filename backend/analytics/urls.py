@@ -1,13 +1,17 @@
 from django.urls import path
 
 from .views import (
+    MarketSeriesView,
     MarketTrendListView,
     NeighborhoodRankingListView,
+    PortfolioCubeView,
     ProposalDashboardSummaryListView,
 )
 
 urlpatterns = [
     path("rankings/", NeighborhoodRankingListView.as_view(), name="neighborhood-rankings"),
     path("market-trends/", MarketTrendListView.as_view(), name="market-trends"),
+    path("market-series/", MarketSeriesView.as_view(), name="market-series"),
     path("dashboard/", ProposalDashboardSummaryListView.as_view(), name="dashboard-summary"),
+    path("portfolio/", PortfolioCubeView.as_view(), name="portfolio-cube"),
 ]
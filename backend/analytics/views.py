@@ -1,20 +1,39 @@
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from rest_framework import generics
+import datetime
 
-from .models import MarketTrend, NeighborhoodRanking, ProposalDashboardSummary
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from proposals.caching import cached_view, market_views
+from proposals.models import Proposal, ProposalUnitMix
+
+from .filters import NeighborhoodRankingFilter
+from .market_series import (
+    DEFAULT_METRICS,
+    DEFAULT_WINDOW,
+    MAX_SERIES_NEIGHBORHOODS,
+    MAX_WINDOW,
+    SERIES_METRICS,
+    market_series,
+    select_neighborhoods,
+)
+from .models import BoroughDashboardAggregate, MarketTrend, NeighborhoodRankingSnapshot
+from .portfolio import DIMENSIONS, portfolio_rollup
 from .serializers import (
     MarketTrendSerializer,
     NeighborhoodRankingSerializer,
+    PortfolioRollupSerializer,
     ProposalDashboardSummarySerializer,
 )
 
 
 class NeighborhoodRankingListView(generics.ListAPIView):
     serializer_class = NeighborhoodRankingSerializer
-    queryset = NeighborhoodRanking.objects.all()
+    # Reads the materialized snapshot (see analytics/rankings.py), not the view.
+    queryset = NeighborhoodRankingSnapshot.objects.all()
+    filterset_class = NeighborhoodRankingFilter
 
-    @method_decorator(cache_page(60 * 15))
+    @cached_view(market_views, 60 * 15)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -29,15 +48,105 @@ class MarketTrendListView(generics.ListAPIView):
             qs = qs.filter(neighborhood_id=neighborhood_id)
         return qs
 
-    @method_decorator(cache_page(60 * 10))
+    @cached_view(market_views, 60 * 10)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
+def _bad_request(detail):
+    return Response({"detail": detail}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class MarketSeriesView(APIView):
+    """
+    Aligned market series for many neighborhoods in one response.
+
+    Select neighborhoods with ?neighborhoods=1,2,3 and/or ?borough=BK (up to
+    MAX_SERIES_NEIGHBORHOODS). ?metrics= picks from SERIES_METRICS,
+    ?window= sets the rolling-mean length in periods, and ?start= / ?end=
+    (YYYY-MM-DD) bound the periods.
+    """
+
+    @cached_view(market_views, 60 * 10)
+    def get(self, request):
+        params = request.query_params
+        try:
+            ids = [int(i) for i in params.get("neighborhoods", "").split(",") if i.strip()]
+        except ValueError:
+            return _bad_request("neighborhoods must be a comma-separated list of integers.")
+        borough = params.get("borough", "").strip()
+        if not ids and not borough:
+            return _bad_request("Provide neighborhoods or a borough.")
+
+        metrics = [m.strip() for m in params.get("metrics", "").split(",") if m.strip()]
+        metrics = list(dict.fromkeys(metrics)) or list(DEFAULT_METRICS)
+        if any(m not in SERIES_METRICS for m in metrics):
+            return _bad_request(f"metrics must be drawn from {list(SERIES_METRICS)}.")
+        try:
+            window = int(params.get("window", DEFAULT_WINDOW))
+        except ValueError:
+            return _bad_request("window must be an integer.")
+        if not 1 <= window <= MAX_WINDOW:
+            return _bad_request(f"window must be between 1 and {MAX_WINDOW}.")
+        try:
+            start, end = (
+                datetime.date.fromisoformat(params[key]) if params.get(key) else None
+                for key in ("start", "end")
+            )
+        except ValueError:
+            return _bad_request("start and end must be dates (YYYY-MM-DD).")
+
+        neighborhoods = select_neighborhoods(ids, borough)
+        if len(neighborhoods) > MAX_SERIES_NEIGHBORHOODS:
+            return _bad_request(f"Select at most {MAX_SERIES_NEIGHBORHOODS} neighborhoods.")
+        if not neighborhoods:
+            return Response({"detail": "No matching neighborhoods."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(market_series(neighborhoods, metrics, window=window, start=start, end=end))
+
+
 class ProposalDashboardSummaryListView(generics.ListAPIView):
     serializer_class = ProposalDashboardSummarySerializer
-    queryset = ProposalDashboardSummary.objects.all()
+    # Maintained by deltas (analytics/dashboard.py), so it is always current
+    # and cheap enough to read uncached.
+    queryset = BoroughDashboardAggregate.objects.select_related("borough")
 
-    @method_decorator(cache_page(60 * 5))
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+
+class PortfolioCubeView(APIView):
+    """
+    Portfolio totals from the precomputed cube (analytics/portfolio.py).
+
+    ?group_by= takes any of borough, neighborhood, status and unit_type
+    (default borough; empty for a grand total). Drill down by adding
+    dimensions or filtering with ?borough=, ?neighborhood=, ?status= and
+    ?unit_type=; roll up by dropping them.
+    """
+
+    def get(self, request):
+        params = request.query_params
+        group_by = list(dict.fromkeys(
+            g.strip() for g in params.get("group_by", "borough").split(",") if g.strip()
+        ))
+        if any(g not in DIMENSIONS for g in group_by):
+            return _bad_request(f"group_by must be drawn from {list(DIMENSIONS)}.")
+        status_filter = params.get("status") or None
+        if status_filter and status_filter not in Proposal.Status.values:
+            return _bad_request(f"status must be one of {Proposal.Status.values}.")
+        unit_type = params.get("unit_type") or None
+        if unit_type and unit_type not in ProposalUnitMix.UnitType.values:
+            return _bad_request(f"unit_type must be one of {ProposalUnitMix.UnitType.values}.")
+        try:
+            neighborhood_id = int(params["neighborhood"]) if params.get("neighborhood") else None
+        except ValueError:
+            return _bad_request("neighborhood must be an integer.")
+
+        rows = portfolio_rollup(
+            group_by,
+            borough=params.get("borough") or None,
+            neighborhood_id=neighborhood_id,
+            status=status_filter,
+            unit_type=unit_type,
+        )
+        return Response({
+            "group_by": group_by,
+            "results": PortfolioRollupSerializer(rows, many=True).data,
+        })
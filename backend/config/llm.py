@@ -7,13 +7,33 @@ can call a simple, testable interface.
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
+import time
+import weakref
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import requests
 
+from .llm_json import parse_json_object
+
+logger = logging.getLogger(__name__)
+
+# USD per 1K tokens as (prompt, completion). Override or extend with the
+# LLM_PRICING_JSON environment variable, e.g. '{"my-model": [0.001, 0.002]}'.
+DEFAULT_MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4.1": (0.002, 0.008),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+    "gpt-4.1-nano": (0.0001, 0.0004),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 class LLMConfigurationError(RuntimeError):
     pass
@@ -22,6 +42,64 @@ class LLMConfigurationError(RuntimeError):
 @dataclass
 class LLMResponse:
     text: str
+    model: str = ""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    ttfb_ms: int = 0
+    latency_ms: int = 0
+    retries: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost_usd(self) -> Optional[float]:
+        return estimate_cost_usd(self.model, self.prompt_tokens, self.completion_tokens)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-call instrumentation, suitable for attaching to pipeline steps."""
+        return {
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "ttfb_ms": self.ttfb_ms,
+            "latency_ms": self.latency_ms,
+            "retries": self.retries,
+            "cost_usd": self.cost_usd,
+        }
+
+
+def _model_pricing() -> Dict[str, Tuple[float, float]]:
+    pricing = dict(DEFAULT_MODEL_PRICING)
+    override = os.environ.get("LLM_PRICING_JSON")
+    if override:
+        try:
+            pricing.update({k: tuple(v) for k, v in json.loads(override).items()})
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("Ignoring malformed LLM_PRICING_JSON")
+    return pricing
+
+
+def estimate_cost_usd(
+    model: str, prompt_tokens: int, completion_tokens: int
+) -> Optional[float]:
+    """
+    Estimate the USD cost of a call from its token usage.
+
+    Provider model names often carry a date suffix (gpt-4.1-mini-2025-04-14),
+    so the longest known prefix wins. Unknown models return None.
+    """
+
+    pricing = _model_pricing()
+    matches = [name for name in pricing if model == name or model.startswith(f"{name}-")]
+    if not matches:
+        return None
+    prompt_rate, completion_rate = pricing[max(matches, key=len)]
+    return round(
+        prompt_tokens / 1000 * prompt_rate + completion_tokens / 1000 * completion_rate,
+        6,
+    )
 
 
 def _get_openai_base_and_key() -> tuple[str, str]:
@@ -41,22 +119,36 @@ def _get_openai_base_and_key() -> tuple[str, str]:
     return base_url.rstrip("/"), api_key
 
 
-def call_llm(
-    prompt: str,
-    *,
-    system_prompt: Optional[str] = None,
-    model: Optional[str] = None,
-    temperature: float = 0.2,
-    max_tokens: int = 2048,
-) -> LLMResponse:
+def _response_format(json_schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     """
-    Call an OpenAI-compatible chat completion endpoint.
+    Structured-output request for providers that support it.
 
-    This intentionally avoids depending on heavy SDKs and just uses requests so
-    it works with any provider that implements the OpenAI /v1/chat/completions
-    interface.
+    LLM_STRUCTURED_OUTPUT selects the mode: "json_object" (default; plain
+    JSON mode, which most OpenAI-compatible providers accept), "json_schema"
+    (OpenAI strict schemas) or "off". A provider that rejects the request
+    with a 400 is retried once without response_format either way.
     """
 
+    if json_schema is None:
+        return None
+    mode = os.environ.get("LLM_STRUCTURED_OUTPUT", "json_object").lower()
+    if mode == "json_schema":
+        return {"type": "json_schema", "json_schema": {**json_schema, "strict": True}}
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def _build_chat_request(
+    prompt: str,
+    system_prompt: Optional[str],
+    model: Optional[str],
+    temperature: float,
+    max_tokens: int,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """Resolve the endpoint URL, headers and JSON payload for a chat call."""
+
     base_url, api_key = _get_openai_base_and_key()
     model_name = model or os.environ.get("OPENAI_MODEL", "gpt-4.1-mini")
 
@@ -73,22 +165,116 @@ def call_llm(
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
+    response_format = _response_format(json_schema)
+    if response_format is not None:
+        payload["response_format"] = response_format
 
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
+    return url, headers, payload
 
-    resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-    resp.raise_for_status()
-    data = resp.json()
 
+def _without_response_format(payload: Dict[str, Any]) -> Dict[str, Any]:
+    logger.warning("LLM provider rejected response_format; retrying without it")
+    return {key: value for key, value in payload.items() if key != "response_format"}
+
+
+def _retry_settings() -> Tuple[int, float]:
+    return (
+        int(os.environ.get("LLM_MAX_RETRIES", "2")),
+        float(os.environ.get("LLM_TIMEOUT_S", "60")),
+    )
+
+
+def _backoff_s(retries: int) -> float:
+    return min(0.5 * 2 ** (retries - 1), 8.0)
+
+
+def _parse_chat_response(
+    data: Dict[str, Any], payload: Dict[str, Any], *, ttfb_ms: int, latency_ms: int, retries: int
+) -> LLMResponse:
     try:
         text = data["choices"][0]["message"]["content"]
     except (KeyError, IndexError) as exc:  # pragma: no cover - defensive
         raise RuntimeError(f"Unexpected LLM response shape: {data}") from exc
 
-    return LLMResponse(text=text)
+    usage = data.get("usage") or {}
+    return LLMResponse(
+        text=text,
+        model=data.get("model") or payload["model"],
+        prompt_tokens=int(usage.get("prompt_tokens") or 0),
+        completion_tokens=int(usage.get("completion_tokens") or 0),
+        ttfb_ms=ttfb_ms,
+        latency_ms=latency_ms,
+        retries=retries,
+    )
+
+
+def _extract_json(response: LLMResponse) -> Dict[str, Any]:
+    # Tolerates prose or code fences around the object and repairs a tail
+    # cut off by max_tokens, so a slightly malformed reply is not a lost call.
+    return parse_json_object(response.text.strip())
+
+
+def call_llm(
+    prompt: str,
+    *,
+    system_prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: int = 2048,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> LLMResponse:
+    """
+    Call an OpenAI-compatible chat completion endpoint.
+
+    This intentionally avoids depending on heavy SDKs and just uses requests so
+    it works with any provider that implements the OpenAI /v1/chat/completions
+    interface.
+
+    Rate limits, 5xx responses and timeouts (LLM_TIMEOUT_S, default 60) are
+    retried with exponential backoff (LLM_MAX_RETRIES, default 2). The returned
+    LLMResponse carries the provider's token usage plus time to first byte,
+    total latency and the number of retries.
+    """
+
+    url, headers, payload = _build_chat_request(
+        prompt, system_prompt, model, temperature, max_tokens, json_schema
+    )
+    max_retries, timeout_s = _retry_settings()
+    started = time.perf_counter()
+    retries = 0
+    while True:
+        attempt_started = time.perf_counter()
+        try:
+            # stream=True returns as soon as headers arrive, which gives us
+            # time to first byte; the body is read by resp.json() below.
+            resp = requests.post(
+                url, headers=headers, data=json.dumps(payload), timeout=timeout_s, stream=True
+            )
+        except (requests.Timeout, requests.ConnectionError):
+            if retries >= max_retries:
+                raise
+        else:
+            if resp.status_code == 400 and "response_format" in payload:
+                resp.close()
+                payload = _without_response_format(payload)
+                continue
+            if resp.status_code not in RETRYABLE_STATUS_CODES or retries >= max_retries:
+                break
+            resp.close()
+        retries += 1
+        time.sleep(_backoff_s(retries))
+
+    ttfb_ms = int((time.perf_counter() - attempt_started) * 1000)
+    resp.raise_for_status()
+    data = resp.json()
+    latency_ms = int((time.perf_counter() - started) * 1000)
+    return _parse_chat_response(
+        data, payload, ttfb_ms=ttfb_ms, latency_ms=latency_ms, retries=retries
+    )
 
 
 def call_llm_json(
@@ -98,12 +284,41 @@ def call_llm_json(
     model: Optional[str] = None,
     temperature: float = 0.1,
     max_tokens: int = 1024,
+    json_schema: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Convenience wrapper that expects the model to return valid JSON.
 
     The caller is responsible for constraining the prompt so that the response
-    is a single JSON object. If parsing fails, a RuntimeError is raised.
+    is a single JSON object; pass ``json_schema`` ({"name": ..., "schema": ...})
+    to have providers that support structured output enforce it. Truncated
+    objects are repaired where possible; if nothing parses, a RuntimeError
+    is raised.
+    """
+
+    payload, _response = call_llm_json_response(
+        prompt,
+        system_prompt=system_prompt,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        json_schema=json_schema,
+    )
+    return payload
+
+
+def call_llm_json_response(
+    prompt: str,
+    *,
+    system_prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.1,
+    max_tokens: int = 1024,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], LLMResponse]:
+    """
+    Like call_llm_json, but also returns the underlying LLMResponse so callers
+    can record its usage and timing metrics.
     """
 
     response = call_llm(
@@ -112,15 +327,131 @@ def call_llm_json(
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
+        json_schema=json_schema,
+    )
+    return _extract_json(response), response
+
+
+# --- Async client -----------------------------------------------------------
+#
+# One pooled httpx.AsyncClient per event loop: a client cannot be shared
+# across loops, and under ASGI each worker runs a single long-lived loop, so
+# in practice this is one client per worker process.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_async_client():
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        max_connections = int(os.environ.get("LLM_ASYNC_MAX_CONNECTIONS", "500"))
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(100, max_connections),
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def acall_llm(
+    prompt: str,
+    *,
+    system_prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+    max_tokens: int = 2048,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> LLMResponse:
+    """
+    Async variant of call_llm built on a pooled httpx.AsyncClient.
+
+    Waiting on the provider does not hold a thread, so a single ASGI worker
+    can keep hundreds of calls in flight (LLM_ASYNC_MAX_CONNECTIONS caps the
+    connection pool). Retry, timeout and instrumentation behavior match the
+    sync client.
+    """
+
+    import httpx
+
+    url, headers, payload = _build_chat_request(
+        prompt, system_prompt, model, temperature, max_tokens, json_schema
+    )
+    max_retries, timeout_s = _retry_settings()
+    client = _get_async_client()
+    started = time.perf_counter()
+    retries = 0
+    while True:
+        attempt_started = time.perf_counter()
+        try:
+            async with client.stream(
+                "POST", url, headers=headers, json=payload, timeout=timeout_s
+            ) as resp:
+                ttfb_ms = int((time.perf_counter() - attempt_started) * 1000)
+                if resp.status_code == 400 and "response_format" in payload:
+                    payload = _without_response_format(payload)
+                    continue
+                if resp.status_code not in RETRYABLE_STATUS_CODES or retries >= max_retries:
+                    await resp.aread()
+                    resp.raise_for_status()
+                    data = resp.json()
+                    break
+        except (httpx.TimeoutException, httpx.TransportError):
+            if retries >= max_retries:
+                raise
+        retries += 1
+        await asyncio.sleep(_backoff_s(retries))
+
+    latency_ms = int((time.perf_counter() - started) * 1000)
+    return _parse_chat_response(
+        data, payload, ttfb_ms=ttfb_ms, latency_ms=latency_ms, retries=retries
+    )
+
+
+async def acall_llm_json(
+    prompt: str,
+    *,
+    system_prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.1,
+    max_tokens: int = 1024,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Async variant of call_llm_json."""
+
+    payload, _response = await acall_llm_json_response(
+        prompt,
+        system_prompt=system_prompt,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        json_schema=json_schema,
     )
+    return payload
 
-    text = response.text.strip()
-    # Try to locate the first JSON object in the response.
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        raise RuntimeError(f"LLM did not return JSON: {text[:2000]}")
 
-    snippet = text[start : end + 1]
-    return json.loads(snippet)
+async def acall_llm_json_response(
+    prompt: str,
+    *,
+    system_prompt: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.1,
+    max_tokens: int = 1024,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], LLMResponse]:
+    """Async variant of call_llm_json_response."""
 
+    response = await acall_llm(
+        prompt,
+        system_prompt=system_prompt,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        json_schema=json_schema,
+    )
+    return _extract_json(response), response
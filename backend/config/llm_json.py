@@ -0,0 +1,148 @@
+"""
+Tolerant JSON extraction for LLM responses.
+
+Models occasionally wrap JSON in prose or code fences, or stop mid-object when
+they hit ``max_tokens``. IncrementalJSONParser tracks bracket and string state
+as text arrives (whole responses or streamed chunks) so a truncated object can
+be closed at the last complete member instead of discarding the whole call.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONRepairError(RuntimeError):
+    """Raised when no JSON object can be recovered from the text."""
+
+
+class IncrementalJSONParser:
+    """
+    Feed text chunks with ``feed()`` and read the best-effort object with
+    ``result()`` at any point.
+
+    Scanning starts at the first ``{``. While scanning, the parser remembers
+    every position where a member or element ended (commas and container
+    openers at any depth) together with the bracket stack at that point, so
+    ``result()`` can cut back to the latest position that closes into valid
+    JSON.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: List[str] = []
+        self._length = 0
+        self._started = False
+        self._done = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        # (cut position, stack snapshot) pairs; text[:pos] + closers is a candidate.
+        self._cut_points: List[Tuple[int, Tuple[str, ...]]] = []
+
+    @property
+    def complete(self) -> bool:
+        """True once the outermost object has been closed."""
+        return self._done
+
+    def feed(self, chunk: str) -> None:
+        if self._done or not chunk:
+            return
+        if not self._started:
+            start = chunk.find("{")
+            if start == -1:
+                return
+            chunk = chunk[start:]
+            self._started = True
+
+        offset = self._length
+        consumed = len(chunk)
+        for index, char in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(char)
+                self._cut_points.append((offset + index + 1, tuple(self._stack)))
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._done = True
+                    consumed = index + 1
+                    break
+            elif char == ",":
+                self._cut_points.append((offset + index, tuple(self._stack)))
+
+        self._buffer.append(chunk[:consumed])
+        self._length += consumed
+
+    def text(self) -> str:
+        return "".join(self._buffer)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Return the parsed object, repairing a truncated tail if needed.
+
+        Raises JSONRepairError if no ``{`` was seen or nothing parses.
+        """
+
+        if not self._started:
+            raise JSONRepairError("No JSON object found in LLM response.")
+
+        text = self.text()
+        candidates: List[str] = [text]
+        if not self._done:
+            if self._in_string and not self._escape:
+                candidates.append(text + '"' + _close(self._stack))
+            elif text.rstrip()[-1:] in ('"', "}", "]"):
+                # A bare number or literal at the tail may itself be cut off
+                # ("7" of "72"), so only close directly after a complete value.
+                candidates.append(text + _close(self._stack))
+            for position, stack in reversed(self._cut_points):
+                candidates.append(text[:position] + _close(stack))
+
+        for candidate in candidates:
+            try:
+                parsed = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+        raise JSONRepairError(f"Could not repair JSON from LLM response: {text[:2000]}")
+
+
+def _close(stack) -> str:
+    return "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """
+    Parse the first JSON object in ``text``, tolerating surrounding prose,
+    code fences and a truncated tail.
+
+    If a brace-delimited span turns out not to be JSON (prose such as
+    "{see below}"), scanning resumes at the next ``{``.
+    """
+
+    start = text.find("{")
+    error: Optional[JSONRepairError] = None
+    while start != -1:
+        parser = IncrementalJSONParser()
+        parser.feed(text[start:])
+        try:
+            return parser.result()
+        except JSONRepairError as exc:
+            error = error or exc
+        start = text.find("{", start + 1)
+    raise error or JSONRepairError(f"LLM did not return JSON: {text[:2000]}")
@@ -0,0 +1,300 @@
+"""
+Local stand-in for an OpenAI-compatible /v1/chat/completions endpoint.
+
+Point OPENAI_BASE_URL at this server to exercise the production LLM client
+(retries, usage capture, JSON parsing) without spending API credits. Latency,
+streaming and failure behavior are configurable so load tests can reproduce
+slow providers, rate limiting and outages.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_PREVIOUS_SCORE_RE = re.compile(r"previous overall community-alignment score was ([0-9]+(?:\.[0-9]+)?)")
+
+CANNED_DRAFT = """# Community Land Trust Residences
+
+## Site Program
+- 100% permanently affordable rental units at 30-60% AMI.
+- Unit mix weighted toward family-sized 2BR and 3BR apartments.
+
+## Governance and Ownership
+- Land held by a community land trust with a resident-majority board.
+
+## Community Benefits
+- Ground-floor space reserved for existing local small businesses.
+- Publicly accessible courtyard and community room.
+
+## Anti-Displacement Commitments
+- Right-to-return for displaced tenants and a 5-year local residency preference.
+"""
+
+
+@dataclass
+class LatencyModel:
+    """
+    Response latency distribution, parsed from specs such as ``fixed:200``,
+    ``uniform:100,400``, ``normal:300,50`` or ``lognormal:300,0.5`` (median
+    milliseconds and sigma). All values are milliseconds.
+    """
+
+    kind: str = "fixed"
+    params: List[float] = field(default_factory=lambda: [0.0])
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, raw = spec.partition(":")
+        params = [float(p) for p in raw.split(",") if p.strip()] or [0.0]
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        return cls(kind=kind, params=params)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            value = median * rng.lognormvariate(0.0, sigma)
+        else:
+            value = self.params[0]
+        return max(0.0, value)
+
+
+@dataclass
+class StubConfig:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    # Fraction of the sampled latency spent before the first byte.
+    ttfb_fraction: float = 0.3
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    rate_timeout: float = 0.0
+    # How long a "timed out" request hangs before the connection is dropped.
+    hang_s: float = 65.0
+    stream_chunk_chars: int = 40
+    seed: Optional[int] = None
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def canned_completion(
+    messages: List[Dict[str, Any]], rng: random.Random, json_mode: bool = False
+) -> str:
+    """
+    Deterministic-shaped content for a chat request.
+
+    Critic and re-score prompts ask for a JSON object, so they get a critic
+    payload whose score drifts upward from any previous score; everything
+    else gets a markdown proposal draft.
+    """
+
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    system = "\n".join(
+        str(m.get("content", "")) for m in messages if m.get("role") == "system"
+    )
+    # The system prompt states the response contract when there is one; the
+    # user prompt may quote earlier feedback that merely mentions JSON.
+    if not json_mode and "JSON" not in (system or prompt):
+        return CANNED_DRAFT
+
+    previous = _PREVIOUS_SCORE_RE.search(prompt)
+    if previous:
+        score = min(100.0, float(previous.group(1)) + rng.uniform(-1.0, 6.0))
+    else:
+        score = rng.uniform(55.0, 80.0)
+    return json.dumps(
+        {
+            "overall_score": round(score, 1),
+            "summary": "Strong affordability commitments; ground-floor retail plan needs detail.",
+            "displacement_risk": "low",
+            "affordability_assessment": "deep and permanent",
+            "local_business_impact": "positive if legacy tenants are prioritized",
+            "recommendations": [
+                "Add a commercial right-of-first-refusal for legacy businesses.",
+                "Commit to tenant organizing support funding.",
+                "Increase the share of 3BR units.",
+            ],
+        }
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "GreenTapeLLMStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    # Set per server instance by make_stub_server().
+    config: StubConfig
+    rng: random.Random
+    rng_lock: threading.Lock
+
+    def log_message(self, format, *args):  # noqa: A002 - BaseHTTPRequestHandler API
+        pass
+
+    def _draw(self):
+        with self.rng_lock:
+            return self.rng.random(), self.config.latency.sample_ms(self.rng) / 1000
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        cfg = self.config
+        roll, latency_s = self._draw()
+        if roll < cfg.rate_timeout:
+            time.sleep(cfg.hang_s)
+            self.close_connection = True
+            return
+        roll -= cfg.rate_timeout
+        if roll < cfg.rate_429:
+            time.sleep(latency_s * cfg.ttfb_fraction)
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                headers={"Retry-After": "1"},
+            )
+            return
+        roll -= cfg.rate_429
+        if roll < cfg.rate_500:
+            time.sleep(latency_s * cfg.ttfb_fraction)
+            self._send_json(500, {"error": {"message": "Injected server error"}})
+            return
+
+        messages = payload.get("messages") or []
+        with self.rng_lock:
+            content = canned_completion(
+                messages, self.rng, json_mode=bool(payload.get("response_format"))
+            )
+        # Like a real provider, stop at max_tokens and report finish_reason
+        # "length" so clients have to cope with truncated output.
+        finish_reason = "stop"
+        max_tokens = payload.get("max_tokens")
+        if max_tokens and _estimate_tokens(content) > max_tokens:
+            content = content[: max_tokens * 4]
+            finish_reason = "length"
+        model = payload.get("model") or "stub-model"
+        usage = {
+            "prompt_tokens": sum(_estimate_tokens(str(m.get("content", ""))) for m in messages),
+            "completion_tokens": _estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+
+        time.sleep(latency_s * cfg.ttfb_fraction)
+        if payload.get("stream"):
+            self._stream(
+                completion_id, model, content, usage, finish_reason,
+                latency_s * (1 - cfg.ttfb_fraction),
+            )
+            return
+
+        time.sleep(latency_s * (1 - cfg.ttfb_fraction))
+        self._send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def _stream(
+        self,
+        completion_id: str,
+        model: str,
+        content: str,
+        usage: Dict[str, int],
+        finish_reason: str,
+        remaining_s: float,
+    ):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        size = max(1, self.config.stream_chunk_chars)
+        chunks = [content[i : i + size] for i in range(0, len(content), size)] or [""]
+        delay = remaining_s / len(chunks)
+
+        def emit(body: Dict[str, Any]):
+            self.wfile.write(f"data: {json.dumps(body)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        base = {"id": completion_id, "object": "chat.completion.chunk", "model": model}
+        for index, chunk in enumerate(chunks):
+            delta = {"content": chunk}
+            if index == 0:
+                delta["role"] = "assistant"
+            emit({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            time.sleep(delay)
+        emit({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_stub_server(host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """
+    Build (but do not start) a threaded stub server. Port 0 picks a free port;
+    read it back from ``server.server_address``.
+    """
+
+    cfg = config or StubConfig()
+    handler = type(
+        "ConfiguredStubHandler",
+        (StubHandler,),
+        {"config": cfg, "rng": random.Random(cfg.seed), "rng_lock": threading.Lock()},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_stub_in_thread(host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None):
+    """Start a stub server on a daemon thread and return ``(server, base_url)``."""
+
+    server = make_stub_server(host, port, config)
+    thread = threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True)
+    thread.start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}/v1"
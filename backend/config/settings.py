@@ -61,6 +61,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 # Use SQLite by default for local dev. Set USE_MSSQL=1 to use SQL Server.
 if os.environ.get("USE_MSSQL", "").lower() in ("1", "true", "yes"):
@@ -133,7 +134,98 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "America/New_York"
 
+# --- Proposal events (SSE) ---
+# Streams end after PROPOSAL_EVENTS_STREAM_S and the client reconnects with
+# Last-Event-ID, so idle connections do not pin a worker indefinitely.
+PROPOSAL_EVENTS_STREAM_S = float(os.environ.get("PROPOSAL_EVENTS_STREAM_S", "55"))
+PROPOSAL_EVENTS_POLL_S = float(os.environ.get("PROPOSAL_EVENTS_POLL_S", "0.5"))
+PROPOSAL_EVENTS_HEARTBEAT_S = float(os.environ.get("PROPOSAL_EVENTS_HEARTBEAT_S", "15"))
+PROPOSAL_EVENTS_RETRY_MS = int(os.environ.get("PROPOSAL_EVENTS_RETRY_MS", "3000"))
+
+# --- Green-Tape pipeline ---
+# The optimizer loop stops early when the re-scored draft reaches the target
+# score, improves by less than the minimum step, or would exceed a budget.
+GREEN_TAPE_TARGET_SCORE = float(os.environ.get("GREEN_TAPE_TARGET_SCORE", "85"))
+GREEN_TAPE_MIN_IMPROVEMENT = float(os.environ.get("GREEN_TAPE_MIN_IMPROVEMENT", "2"))
+GREEN_TAPE_TOKEN_BUDGET = int(os.environ.get("GREEN_TAPE_TOKEN_BUDGET", "24000"))
+GREEN_TAPE_LATENCY_BUDGET_S = float(os.environ.get("GREEN_TAPE_LATENCY_BUDGET_S", "120"))
+# Optional cheaper model for the between-rounds re-score pass.
+GREEN_TAPE_RESCORE_MODEL = os.environ.get("GREEN_TAPE_RESCORE_MODEL") or None
+
+# --- Celery queues ---
+# LLM-bound, scoring (DB-bound) and maintenance tasks go to separate queues so
+# a burst of slow LLM runs cannot starve scoring. Each queue gets its own
+# worker (see docker-compose.yml): llm on a threads pool with high concurrency,
+# scoring on prefork with prefetch 1, maintenance on a small prefork pool.
+# Time limits are (soft, hard) seconds; the threads pool does not enforce
+# them, so LLM runs rely on GREEN_TAPE_LATENCY_BUDGET_S and HTTP timeouts.
+CELERY_TASK_DEFAULT_QUEUE = "maintenance"
+TASK_QUEUE_ASSIGNMENTS = {
+    "llm": ["proposals.tasks.run_green_tape"],
+    "scoring": [
+        "proposals.tasks.calculate_feasibility_score",
+        "proposals.tasks.rescore_proposals",
+        "proposals.tasks.generate_financial_projections",
+    ],
+    "maintenance": [
+        "proposals.tasks.regenerate_projections",
+        "proposals.tasks.rebuild_site_contexts",
+        "proposals.tasks.refresh_market_data_cache",
+        "analytics.tasks.refresh_neighborhood_rankings",
+    ],
+}
+TASK_QUEUE_TIME_LIMITS = {
+    "llm": (GREEN_TAPE_LATENCY_BUDGET_S + 60, GREEN_TAPE_LATENCY_BUDGET_S + 120),
+    "scoring": (
+        float(os.environ.get("CELERY_SCORING_SOFT_TIME_LIMIT_S", "60")),
+        float(os.environ.get("CELERY_SCORING_TIME_LIMIT_S", "90")),
+    ),
+    "maintenance": (
+        float(os.environ.get("CELERY_MAINTENANCE_SOFT_TIME_LIMIT_S", "600")),
+        float(os.environ.get("CELERY_MAINTENANCE_TIME_LIMIT_S", "900")),
+    ),
+}
+CELERY_TASK_ROUTES = {
+    task: {"queue": queue} for queue, tasks in TASK_QUEUE_ASSIGNMENTS.items() for task in tasks
+}
+CELERY_TASK_ANNOTATIONS = {
+    task: {
+        "soft_time_limit": TASK_QUEUE_TIME_LIMITS[queue][0],
+        "time_limit": TASK_QUEUE_TIME_LIMITS[queue][1],
+    }
+    for queue, tasks in TASK_QUEUE_ASSIGNMENTS.items()
+    for task in tasks
+}
+
+# --- Feasibility scoring ---
+# "stored_procedure" runs sp_CalculateFeasibilityScore (SQL Server only),
+# "python" uses the NumPy engine in proposals/scoring.py, and "auto" picks the
+# stored procedure on SQL Server and the Python engine otherwise.
+FEASIBILITY_SCORING_BACKEND = os.environ.get("FEASIBILITY_SCORING_BACKEND", "auto")
+# Same choices for financial projections (sp_GenerateFinancialProjections vs
+# proposals/projections.py).
+FINANCIAL_PROJECTION_BACKEND = os.environ.get("FINANCIAL_PROJECTION_BACKEND", "auto")
+# Saves that change a proposal's scored fields queue one batch rescore this many
+# seconds later; further saves of the same proposal inside the window ride along.
+FEASIBILITY_RECALC_DEBOUNCE_S = int(os.environ.get("FEASIBILITY_RECALC_DEBOUNCE_S", "10"))
+
 # --- Cache ---
+# Site contexts are invalidated by signals when their source rows change, so
+# the TTL is only a safety net for writes that bypass signals (raw SQL,
+# queryset.update()).
+SITE_CONTEXT_CACHE_TIMEOUT = int(os.environ.get("SITE_CONTEXT_CACHE_TIMEOUT", str(60 * 60 * 24)))
+
+# In-process LRU in front of the shared cache for hot reference data (see
+# proposals/caching.py). Workers re-check namespace versions every
+# LOCAL_CACHE_VERSION_CHECK_S seconds, which bounds cross-worker staleness.
+LOCAL_CACHE_MAXSIZE = int(os.environ.get("LOCAL_CACHE_MAXSIZE", "2048"))
+LOCAL_CACHE_VERSION_CHECK_S = float(os.environ.get("LOCAL_CACHE_VERSION_CHECK_S", "2"))
+LOCAL_CACHE_MAX_AGE_S = float(os.environ.get("LOCAL_CACHE_MAX_AGE_S", "300"))
+
+# Host the post-refresh warm-up renders cached pages for (pagination links in
+# cached responses are absolute).
+CACHE_WARMUP_HOST = os.environ.get("CACHE_WARMUP_HOST", ALLOWED_HOSTS[0])
+
 # Use Redis when REDIS_URL is set; otherwise use local memory (no Redis needed for local dev)
 if os.environ.get("REDIS_URL"):
     CACHES = {
@@ -151,3 +243,8 @@ else:
             "TIMEOUT": 60 * 15,
         }
     }
+
+# Whether every process (web and Celery workers) sees the same cache. Markers
+# that a worker clears when its job starts (debounced rescores and rankings
+# refreshes) and the proposal event log only work across processes when it is.
+SHARED_CACHE = bool(os.environ.get("REDIS_URL"))
@@ -4,6 +4,9 @@ from .models import (
     Borough,
     DemographicProfile,
     FinancialProjection,
+    GreenTapeRun,
+    GreenTapeStep,
+    IngestionWatermark,
     MarketData,
     Neighborhood,
     Proposal,
@@ -43,6 +46,12 @@ class DemographicProfileAdmin(admin.ModelAdmin):
     list_filter = ["year", "neighborhood__borough"]
 
 
+@admin.register(IngestionWatermark)
+class IngestionWatermarkAdmin(admin.ModelAdmin):
+    list_display = ["source", "path", "high_water", "rows_read", "rows_written", "ingested_at"]
+    list_filter = ["source"]
+
+
 class ProposalUnitMixInline(admin.TabularInline):
     model = ProposalUnitMix
     extra = 0
@@ -66,3 +75,18 @@ class ProposalAdmin(admin.ModelAdmin):
 class ProposalStatusHistoryAdmin(admin.ModelAdmin):
     list_display = ["proposal", "old_status", "new_status", "changed_at", "changed_by"]
     list_filter = ["new_status"]
+
+
+class GreenTapeStepInline(admin.TabularInline):
+    model = GreenTapeStep
+    extra = 0
+    fields = ["sequence", "kind", "iteration", "duration_ms"]
+    readonly_fields = fields
+
+
+@admin.register(GreenTapeRun)
+class GreenTapeRunAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "neighborhood", "overall_score", "duration_ms", "created_at"]
+    list_filter = ["neighborhood__borough"]
+    raw_id_fields = ["draft", "final_draft"]
+    inlines = [GreenTapeStepInline]
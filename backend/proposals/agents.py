@@ -11,11 +11,28 @@ The prompts and calling patterns are tuned for OpenAI-style chat models but
 kept provider-neutral enough to work with any OpenAI-compatible endpoint.
 """
 
+import functools
+import hashlib
+import json
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-
-from config.llm import LLMConfigurationError, call_llm, call_llm_json
-from .models import Neighborhood
+from decimal import Decimal
+from typing import Any, Dict, Generator, List, Optional
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import transaction
+
+from config.llm import (
+    LLMConfigurationError,
+    LLMResponse,
+    acall_llm,
+    acall_llm_json_response,
+    call_llm,
+    call_llm_json_response,
+)
+from .models import GreenTapeRun, GreenTapeStep, GreenTapeText, Neighborhood
 from .nyc_data import get_neighborhood_site_context
 
 
@@ -74,6 +91,47 @@ class CriticFeedback:
     recommendations: List[str]
 
 
+# Structured-output schemas for providers that support response_format.
+# overall_score comes first so that a reply cut off by max_tokens still
+# carries the score once the truncated tail is repaired.
+CRITIC_FEEDBACK_SCHEMA: Dict[str, Any] = {
+    "name": "critic_feedback",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "overall_score": {"type": "number"},
+            "summary": {"type": "string"},
+            "displacement_risk": {"type": "string"},
+            "affordability_assessment": {"type": "string"},
+            "local_business_impact": {"type": "string"},
+            "recommendations": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": [
+            "overall_score",
+            "summary",
+            "displacement_risk",
+            "affordability_assessment",
+            "local_business_impact",
+            "recommendations",
+        ],
+        "additionalProperties": False,
+    },
+}
+
+RESCORE_SCHEMA: Dict[str, Any] = {
+    "name": "critic_rescore",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "overall_score": {"type": "number"},
+            "recommendations": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["overall_score", "recommendations"],
+        "additionalProperties": False,
+    },
+}
+
+
 @dataclass
 class OptimizationResult:
     improved_draft_text: str
@@ -178,12 +236,12 @@ Carefully read the proposal and then provide:
 Response contract (CRITICAL):
 - Respond ONLY with a single valid JSON object.
 - Do not include Markdown, backticks, or any text before or after the JSON.
-- Use this exact key set:
+- Use this exact key set, in this order:
+  - overall_score (number between 0 and 100)
   - summary (string)
   - displacement_risk (string)
   - affordability_assessment (string)
   - local_business_impact (string)
-  - overall_score (number between 0 and 100)
   - recommendations (array of short strings)
 """.strip()
 
@@ -245,9 +303,43 @@ Formatting and style requirements:
     return "\n\n".join([header, fb_block, instructions, proposal_section])
 
 
+def build_rescore_prompt(
+    revised_draft: str,
+    previous_feedback: CriticFeedback,
+    context: GreenTapeContext,
+) -> str:
+    """
+    Short critic prompt used to re-score each revision between optimizer rounds.
+
+    It only asks for a score and a few recommendations so it stays far cheaper
+    than the full community board review.
+    """
+
+    n = context.neighborhood
+    instructions = f"""
+Re-score this revised proposal for {n.name}, {n.borough.code} using the same
+Everyday Peace-style indicators as before (displacement risk, affordability
+depth, local business impact, community cohesion, access to services).
+
+The previous overall community-alignment score was {previous_feedback.overall_score}.
+
+Respond ONLY with a single JSON object with exactly these keys:
+  - overall_score (number between 0 and 100)
+  - recommendations (array of at most 3 short strings)
+""".strip()
+
+    proposal_section = f"--- REVISED PROPOSAL START ---\n{revised_draft}\n--- REVISED PROPOSAL END ---"
+
+    return "\n\n".join([instructions, proposal_section])
+
+
 def parse_critic_output(payload: Dict[str, Any]) -> CriticFeedback:
     """
     Parse the critic's JSON response into a strongly-typed object.
+
+    A missing overall_score raises KeyError rather than defaulting to 0, so
+    an unusable reply falls back to the neutral critic instead of scoring the
+    draft as a failure.
     """
 
     return CriticFeedback(
@@ -255,11 +347,97 @@ def parse_critic_output(payload: Dict[str, Any]) -> CriticFeedback:
         displacement_risk=str(payload.get("displacement_risk", "")),
         affordability_assessment=str(payload.get("affordability_assessment", "")),
         local_business_impact=str(payload.get("local_business_impact", "")),
-        overall_score=float(payload.get("overall_score", 0.0)),
+        overall_score=float(payload["overall_score"]),
         recommendations=list(payload.get("recommendations", [])),
     )
 
 
+OPTIMIZER_MAX_TOKENS = 2000
+RESCORE_MAX_TOKENS = 300
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough OpenAI-style heuristic (~4 characters per token); good enough for
+    # budgeting without pulling in a tokenizer.
+    return len(text) // 4 + 1
+
+
+def _tokens_used(response: Optional[LLMResponse], prompt: str, output: str) -> int:
+    """Provider-reported usage when available, otherwise a length estimate."""
+    if response is not None and response.total_tokens:
+        return response.total_tokens
+    return _estimate_tokens(prompt) + _estimate_tokens(output)
+
+
+@dataclass
+class LLMRequest:
+    """A chat call requested by the pipeline, executed by a sync or async driver."""
+
+    prompt: str
+    system_prompt: Optional[str] = None
+    temperature: float = 0.2
+    max_tokens: int = 2048
+    model: Optional[str] = None
+    expect_json: bool = False
+    json_schema: Optional[Dict[str, Any]] = None
+
+    def kwargs(self) -> Dict[str, Any]:
+        kwargs = {
+            "system_prompt": self.system_prompt,
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+        if self.json_schema is not None:
+            kwargs["json_schema"] = self.json_schema
+        return kwargs
+
+
+PipelineSteps = Generator[LLMRequest, Any, Dict[str, Any]]
+
+
+def _build_context(
+    neighborhood: Neighborhood,
+    lot_size_sqft: float,
+    user_goal: str,
+    additional_notes: str,
+    site_context: Dict[str, Any],
+) -> GreenTapeContext:
+    return GreenTapeContext(
+        neighborhood=neighborhood,
+        lot_size_sqft=lot_size_sqft,
+        user_goal=user_goal,
+        additional_notes=additional_notes,
+        site_context=site_context,
+    )
+
+
+def _resolve_loop_settings(
+    target_score: Optional[float],
+    min_improvement: Optional[float],
+    token_budget: Optional[int],
+    latency_budget_s: Optional[float],
+) -> Dict[str, Any]:
+    return {
+        "target_score": (
+            settings.GREEN_TAPE_TARGET_SCORE if target_score is None else target_score
+        ),
+        "min_improvement": (
+            settings.GREEN_TAPE_MIN_IMPROVEMENT if min_improvement is None else min_improvement
+        ),
+        "token_budget": (
+            settings.GREEN_TAPE_TOKEN_BUDGET if token_budget is None else token_budget
+        ),
+        "latency_budget_s": (
+            settings.GREEN_TAPE_LATENCY_BUDGET_S if latency_budget_s is None else latency_budget_s
+        ),
+    }
+
+
 def run_green_tape_pipeline(
     *,
     neighborhood: Neighborhood,
@@ -267,25 +445,133 @@ def run_green_tape_pipeline(
     user_goal: str,
     additional_notes: str = "",
     max_iterations: int = 1,
+    target_score: Optional[float] = None,
+    min_improvement: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    latency_budget_s: Optional[float] = None,
 ) -> Dict[str, Any]:
     """
     High-level orchestration of the Green-Tape self-improvement loop.
 
+    ``max_iterations`` is an upper bound: the optimizer stops early once the
+    re-scored draft reaches ``target_score``, improves by less than
+    ``min_improvement`` points, or the next round would exceed the token or
+    latency budget. Unset knobs fall back to the GREEN_TAPE_* settings.
+
     Returns a dictionary that is easy to serialize back to the frontend.
     """
 
-    context = GreenTapeContext(
-        neighborhood=neighborhood,
-        lot_size_sqft=lot_size_sqft,
-        user_goal=user_goal,
-        additional_notes=additional_notes,
-        site_context=get_neighborhood_site_context(neighborhood),
+    run_started = time.perf_counter()
+    context = _build_context(
+        neighborhood,
+        lot_size_sqft,
+        user_goal,
+        additional_notes,
+        get_neighborhood_site_context(neighborhood),
     )
+    steps = _pipeline_steps(
+        context,
+        max_iterations=max_iterations,
+        run_started=run_started,
+        **_resolve_loop_settings(target_score, min_improvement, token_budget, latency_budget_s),
+    )
+
+    request = next(steps)
+    while True:
+        try:
+            if request.expect_json:
+                result = call_llm_json_response(request.prompt, **request.kwargs())
+            else:
+                result = call_llm(request.prompt, **request.kwargs())
+        except Exception as exc:
+            step = functools.partial(steps.throw, exc)
+        else:
+            step = functools.partial(steps.send, result)
+        try:
+            request = step()
+        except StopIteration as done:
+            return done.value
+
+
+async def arun_green_tape_pipeline(
+    *,
+    neighborhood: Neighborhood,
+    lot_size_sqft: float,
+    user_goal: str,
+    additional_notes: str = "",
+    max_iterations: int = 1,
+    target_score: Optional[float] = None,
+    min_improvement: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    latency_budget_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Async twin of run_green_tape_pipeline for ASGI views.
+
+    Both drivers share the same step logic; this one awaits the async LLM
+    client so a worker is free while the provider responds. ``neighborhood``
+    must be loaded with its borough (select_related) since lazy relation
+    access is not allowed from async code.
+    """
+
+    run_started = time.perf_counter()
+    loop_settings = await sync_to_async(_resolve_loop_settings)(
+        target_score, min_improvement, token_budget, latency_budget_s
+    )
+    context = _build_context(
+        neighborhood,
+        lot_size_sqft,
+        user_goal,
+        additional_notes,
+        await sync_to_async(get_neighborhood_site_context)(neighborhood),
+    )
+    steps = _pipeline_steps(
+        context, max_iterations=max_iterations, run_started=run_started, **loop_settings
+    )
+
+    request = next(steps)
+    while True:
+        try:
+            if request.expect_json:
+                result = await acall_llm_json_response(request.prompt, **request.kwargs())
+            else:
+                result = await acall_llm(request.prompt, **request.kwargs())
+        except Exception as exc:
+            step = functools.partial(steps.throw, exc)
+        else:
+            step = functools.partial(steps.send, result)
+        try:
+            request = step()
+        except StopIteration as done:
+            return done.value
+
+
+def _pipeline_steps(
+    context: GreenTapeContext,
+    *,
+    max_iterations: int,
+    target_score: float,
+    min_improvement: float,
+    token_budget: Optional[int],
+    latency_budget_s: Optional[float],
+    run_started: float,
+) -> PipelineSteps:
+    """
+    The draft -> critic -> adaptive optimizer loop as a generator.
+
+    Each LLM call is yielded as an LLMRequest; the driver sends back the
+    LLMResponse (or ``(json, LLMResponse)`` for JSON requests) or throws the
+    call's exception into the generator. This keeps the sync and async
+    entry points on exactly the same logic.
+    """
+
+    neighborhood = context.neighborhood
 
     # Step 1: Draft generation
     gen_prompt = build_generation_prompt(context)
+    step_started = time.perf_counter()
     try:
-        draft_resp = call_llm(
+        draft_resp = yield LLMRequest(
             gen_prompt,
             system_prompt=(
                 "You are Green-Tape, an expert New York City public-interest "
@@ -298,7 +584,10 @@ def run_green_tape_pipeline(
             max_tokens=2000,
         )
         draft_text = draft_resp.text
+        draft_metrics = draft_resp.metrics()
     except LLMConfigurationError:
+        draft_resp = None
+        draft_metrics = None
         # Helpful fallback for local dev when no key is configured.
         draft_text = (
             "[Green-Tape draft placeholder]\n\n"
@@ -307,12 +596,16 @@ def run_green_tape_pipeline(
             f"PROMPT SNIPPET:\n{gen_prompt[:800]}"
         )
     draft_result = DraftResult(draft_text=draft_text, prompt_used=gen_prompt)
+    draft_ms = _elapsed_ms(step_started)
 
     # Step 2: Critic evaluation
     critic_prompt = build_critic_prompt(draft_result.draft_text, context)
+    step_started = time.perf_counter()
     try:
-        critic_json = call_llm_json(
+        critic_json, critic_resp = yield LLMRequest(
             critic_prompt,
+            expect_json=True,
+            json_schema=CRITIC_FEEDBACK_SCHEMA,
             system_prompt=(
                 "You simulate a New York City community board and advocacy "
                 "coalition. You are strict about displacement, affordability, "
@@ -324,7 +617,9 @@ def run_green_tape_pipeline(
         )
         critic_feedback = parse_critic_output(critic_json)
         critic_raw = critic_json
+        critic_ok = True
     except (LLMConfigurationError, Exception) as exc:
+        critic_resp = None
         # Fall back to a neutral critic if the LLM is not available or JSON parsing fails.
         critic_feedback = CriticFeedback(
             summary="Fallback critic: unable to reach LLM or parse JSON.",
@@ -339,19 +634,54 @@ def run_green_tape_pipeline(
             ],
         )
         critic_raw = {"error": str(exc)}
-
-    # Step 3: Self-correction / optimization
-    optimized_draft_text = draft_result.draft_text
+        critic_ok = False
+    critic_ms = _elapsed_ms(step_started)
+
+    # Step 3: Adaptive self-correction / optimization. Each revision is
+    # re-scored with a cheap critic pass and the loop stops as soon as the
+    # score reaches the target, stops improving, or the budget runs out.
+    best_text = draft_result.draft_text
+    best_score: Optional[float] = critic_feedback.overall_score if critic_ok else None
+    current_feedback = critic_feedback
     optimization_steps: List[Dict[str, Any]] = []
+    tokens_used = _tokens_used(draft_resp, gen_prompt, draft_text) + _tokens_used(
+        critic_resp, critic_prompt, json.dumps(critic_raw, default=str)
+    )
+    stop_reason = "max_iterations"
 
     for iteration in range(max_iterations):
+        if best_score is not None and best_score >= target_score:
+            stop_reason = "target_reached"
+            break
+
         opt_prompt = build_optimizer_prompt(
-            original_draft=optimized_draft_text,
-            feedback=critic_feedback,
+            original_draft=best_text,
+            feedback=current_feedback,
             context=context,
         )
+        projected_tokens = (
+            _estimate_tokens(opt_prompt) + 2 * OPTIMIZER_MAX_TOKENS + RESCORE_MAX_TOKENS
+        )
+        if token_budget is not None and tokens_used + projected_tokens > token_budget:
+            stop_reason = "token_budget"
+            break
+        if latency_budget_s is not None:
+            durations = [s["duration_ms"] for s in optimization_steps] or [draft_ms]
+            projected_s = (time.perf_counter() - run_started) + (
+                sum(durations) / len(durations) / 1000
+            )
+            if projected_s > latency_budget_s:
+                stop_reason = "latency_budget"
+                break
+
+        step_started = time.perf_counter()
+        step: Dict[str, Any] = {
+            "iteration": iteration + 1,
+            "optimizer_prompt": opt_prompt,
+        }
+        optimization_steps.append(step)
         try:
-            opt_resp = call_llm(
+            opt_resp = yield LLMRequest(
                 opt_prompt,
                 system_prompt=(
                     "You are Green-Tape revising your own New York City housing "
@@ -361,23 +691,79 @@ def run_green_tape_pipeline(
                     "proposal text in markdown, with no extra commentary."
                 ),
                 temperature=0.25,
-                max_tokens=2000,
+                max_tokens=OPTIMIZER_MAX_TOKENS,
             )
             improved_text = opt_resp.text
+            step["metrics"] = opt_resp.metrics()
         except LLMConfigurationError:
             improved_text = (
                 "[Green-Tape optimizer placeholder]\n\n"
                 "LLM is not configured; returning previous draft unchanged.\n\n"
                 f"PROMPT SNIPPET:\n{opt_prompt[:800]}"
             )
-        optimization_steps.append(
-            {
-                "iteration": iteration + 1,
-                "optimizer_prompt": opt_prompt,
-                "improved_draft": improved_text,
-            }
+            step.update(
+                improved_draft=improved_text,
+                score=None,
+                duration_ms=_elapsed_ms(step_started),
+            )
+            best_text = improved_text
+            stop_reason = "llm_unavailable"
+            break
+        tokens_used += _tokens_used(opt_resp, opt_prompt, improved_text)
+        step["improved_draft"] = improved_text
+
+        rescore_prompt = build_rescore_prompt(improved_text, current_feedback, context)
+        step["rescore_prompt"] = rescore_prompt
+        try:
+            rescore_json, rescore_resp = yield LLMRequest(
+                rescore_prompt,
+                expect_json=True,
+                json_schema=RESCORE_SCHEMA,
+                system_prompt=(
+                    "You simulate a New York City community board giving a quick "
+                    "re-score of a revised proposal. Always respond with a single "
+                    "valid JSON object that matches the requested schema."
+                ),
+                model=settings.GREEN_TAPE_RESCORE_MODEL,
+                temperature=0.0,
+                max_tokens=RESCORE_MAX_TOKENS,
+            )
+            step["rescore_metrics"] = rescore_resp.metrics()
+            score = float(rescore_json["overall_score"])
+            step["rescore_raw"] = rescore_json
+        except Exception as exc:
+            step.update(
+                rescore_raw={"error": str(exc)},
+                score=None,
+                duration_ms=_elapsed_ms(step_started),
+            )
+            # Without a score there is no evidence the revision is worse, so
+            # keep it, but stop rather than iterate blind.
+            best_text = improved_text
+            stop_reason = "rescore_failed"
+            break
+        tokens_used += _tokens_used(
+            rescore_resp, rescore_prompt, json.dumps(rescore_json, default=str)
         )
-        optimized_draft_text = improved_text
+        step.update(score=score, duration_ms=_elapsed_ms(step_started))
+
+        improvement = score - best_score if best_score is not None else None
+        if improvement is None or improvement > 0:
+            best_text = improved_text
+            best_score = score
+            current_feedback = CriticFeedback(
+                summary=current_feedback.summary,
+                displacement_risk=current_feedback.displacement_risk,
+                affordability_assessment=current_feedback.affordability_assessment,
+                local_business_impact=current_feedback.local_business_impact,
+                overall_score=score,
+                recommendations=[
+                    str(r) for r in rescore_json.get("recommendations", [])
+                ] or current_feedback.recommendations,
+            )
+        if improvement is not None and improvement < min_improvement:
+            stop_reason = "plateau"
+            break
 
     return {
         "context": {
@@ -385,15 +771,21 @@ def run_green_tape_pipeline(
             "neighborhood_name": neighborhood.name,
             "borough_code": neighborhood.borough.code,
             "borough_name": neighborhood.borough.name,
-            "lot_size_sqft": lot_size_sqft,
-            "user_goal": user_goal,
-            "additional_notes": additional_notes,
+            "lot_size_sqft": context.lot_size_sqft,
+            "user_goal": context.user_goal,
+            "additional_notes": context.additional_notes,
         },
+        "site_context": context.site_context,
         "draft": {
             "text": draft_result.draft_text,
             "prompt": draft_result.prompt_used,
+            "duration_ms": draft_ms,
+            "metrics": draft_metrics,
         },
         "critic": {
+            "prompt": critic_prompt,
+            "duration_ms": critic_ms,
+            "metrics": critic_resp.metrics() if critic_resp is not None else None,
             "raw_text": critic_raw,
             "parsed": {
                 "summary": critic_feedback.summary,
@@ -405,8 +797,166 @@ def run_green_tape_pipeline(
             },
         },
         "optimizer": {
-            "final_draft": optimized_draft_text,
+            "final_draft": best_text,
+            "best_score": best_score,
+            "stop_reason": stop_reason,
+            "max_iterations": max_iterations,
+            "tokens_used": tokens_used,
             "steps": optimization_steps,
         },
+        "duration_ms": _elapsed_ms(run_started),
+    }
+
+
+def _intern_texts(texts: List[str]) -> Dict[str, GreenTapeText]:
+    """
+    Map each text to its content-addressed GreenTapeText row.
+
+    Existing digests are looked up in one query and only unseen bodies are
+    inserted, so a run that repeats prompt boilerplate or carries a draft
+    forward unchanged stores each distinct text exactly once.
+    """
+
+    by_digest = {hashlib.sha256(t.encode("utf-8")).hexdigest(): t for t in texts}
+    existing = {
+        row.sha256: row
+        for row in GreenTapeText.objects.filter(sha256__in=by_digest.keys())
     }
+    missing = [
+        GreenTapeText(sha256=digest, body=body)
+        for digest, body in by_digest.items()
+        if digest not in existing
+    ]
+    if missing:
+        GreenTapeText.objects.bulk_create(missing, ignore_conflicts=True)
+        existing.update(
+            {
+                row.sha256: row
+                for row in GreenTapeText.objects.filter(
+                    sha256__in=[m.sha256 for m in missing]
+                )
+            }
+        )
+
+    digest_for = {t: d for d, t in by_digest.items()}
+    return {t: existing[digest_for[t]] for t in texts}
+
+
+def record_green_tape_run(*, user, neighborhood: Neighborhood, result: Dict[str, Any]) -> GreenTapeRun:
+    """
+    Persist a pipeline result so it can be replayed and compared without
+    calling the LLM again.
+    """
+
+    ctx = result["context"]
+    draft = result["draft"]
+    critic = result["critic"]
+    optimizer = result["optimizer"]
+
+    def dump(raw: Any) -> str:
+        return json.dumps(raw, sort_keys=True, default=str)
+
+    def as_score(value: Optional[float]) -> Optional[Decimal]:
+        return Decimal(str(round(value, 2))) if value is not None else None
+
+    def metric_fields(metrics: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not metrics:
+            return {}
+        cost = metrics.get("cost_usd")
+        return {
+            "model": metrics.get("model") or "",
+            "prompt_tokens": metrics.get("prompt_tokens") or 0,
+            "completion_tokens": metrics.get("completion_tokens") or 0,
+            "ttfb_ms": metrics.get("ttfb_ms"),
+            "latency_ms": metrics.get("latency_ms"),
+            "retries": metrics.get("retries") or 0,
+            "cost_usd": Decimal(str(cost)) if cost is not None else None,
+        }
+
+    texts = [
+        draft["prompt"],
+        draft["text"],
+        critic["prompt"],
+        dump(critic["raw_text"]),
+        optimizer["final_draft"],
+    ]
+    for step in optimizer["steps"]:
+        texts.extend([step["optimizer_prompt"], step["improved_draft"]])
+        if "rescore_prompt" in step:
+            texts.extend([step["rescore_prompt"], dump(step.get("rescore_raw"))])
+
+    with transaction.atomic():
+        stored = _intern_texts(texts)
+        best_score = optimizer.get("best_score")
+        if best_score is None:
+            best_score = critic["parsed"].get("overall_score")
+        run = GreenTapeRun.objects.create(
+            user=user,
+            neighborhood=neighborhood,
+            lot_size_sqft=Decimal(str(ctx["lot_size_sqft"])),
+            user_goal=ctx["user_goal"],
+            additional_notes=ctx.get("additional_notes", ""),
+            max_iterations=optimizer["max_iterations"],
+            site_context=result.get("site_context") or {},
+            draft=stored[draft["text"]],
+            final_draft=stored[optimizer["final_draft"]],
+            critic_feedback=critic["parsed"],
+            critic_raw=critic["raw_text"],
+            overall_score=as_score(best_score),
+            stop_reason=optimizer.get("stop_reason", ""),
+            duration_ms=result.get("duration_ms", 0),
+        )
+
+        steps = [
+            GreenTapeStep(
+                run=run,
+                sequence=1,
+                kind=GreenTapeStep.Kind.DRAFT,
+                prompt=stored[draft["prompt"]],
+                output=stored[draft["text"]],
+                duration_ms=draft.get("duration_ms", 0),
+                **metric_fields(draft.get("metrics")),
+            ),
+            GreenTapeStep(
+                run=run,
+                sequence=2,
+                kind=GreenTapeStep.Kind.CRITIC,
+                prompt=stored[critic["prompt"]],
+                output=stored[dump(critic["raw_text"])],
+                score=as_score(critic["parsed"].get("overall_score")),
+                duration_ms=critic.get("duration_ms", 0),
+                **metric_fields(critic.get("metrics")),
+            ),
+        ]
+        for step in optimizer["steps"]:
+            steps.append(
+                GreenTapeStep(
+                    run=run,
+                    sequence=len(steps) + 1,
+                    kind=GreenTapeStep.Kind.OPTIMIZER,
+                    iteration=step["iteration"],
+                    prompt=stored[step["optimizer_prompt"]],
+                    output=stored[step["improved_draft"]],
+                    score=as_score(step.get("score")),
+                    duration_ms=step.get("duration_ms", 0),
+                    **metric_fields(step.get("metrics")),
+                )
+            )
+            if "rescore_prompt" in step:
+                steps.append(
+                    GreenTapeStep(
+                        run=run,
+                        sequence=len(steps) + 1,
+                        kind=GreenTapeStep.Kind.CRITIC,
+                        iteration=step["iteration"],
+                        prompt=stored[step["rescore_prompt"]],
+                        output=stored[dump(step.get("rescore_raw"))],
+                        score=as_score(step.get("score")),
+                        duration_ms=(step.get("rescore_metrics") or {}).get("latency_ms") or 0,
+                        **metric_fields(step.get("rescore_metrics")),
+                    )
+                )
+        GreenTapeStep.objects.bulk_create(steps)
+
+    return run
 
@@ -0,0 +1,254 @@
+"""
+Two-tier cache for hot, slow-changing reference data.
+
+Reads go to a bounded in-process LRU first and to the Django cache (Redis in
+production) only on a local miss. Local entries are stamped with their
+namespace's version; bumping the version in the shared cache invalidates the
+namespace in every worker. Workers re-check a namespace's version at most
+once per LOCAL_CACHE_VERSION_CHECK_S, so a hot read usually costs no network
+round trip, and a bump reaches every worker within that interval. Local
+copies never outlive LOCAL_CACHE_MAX_AGE_S, which bounds staleness for writes
+that change the shared tier without bumping.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+_MISSING = object()
+
+
+class TwoTierCache:
+    def __init__(self, maxsize: Optional[int] = None, version_check_s: Optional[float] = None):
+        self._maxsize = maxsize
+        self._version_check_s = version_check_s
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float, Any]]" = OrderedDict()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize if self._maxsize is not None else settings.LOCAL_CACHE_MAXSIZE
+
+    @property
+    def version_check_s(self) -> float:
+        if self._version_check_s is not None:
+            return self._version_check_s
+        return settings.LOCAL_CACHE_VERSION_CHECK_S
+
+    # --- Versions ----------------------------------------------------------
+
+    @staticmethod
+    def _version_key(namespace: str) -> str:
+        return f"l2ver:{namespace}"
+
+    def version(self, namespace: str) -> int:
+        """Current version of ``namespace``, re-read from the shared cache when due."""
+        now = time.monotonic()
+        with self._lock:
+            known = self._versions.get(namespace)
+        if known is not None and now - known[1] < self.version_check_s:
+            return known[0]
+
+        key = self._version_key(namespace)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, 1, timeout=None)
+            version = cache.get(key, 1)
+        with self._lock:
+            self._versions[namespace] = (version, now)
+        return version
+
+    def bump(self, namespace: str) -> int:
+        """Invalidate ``namespace`` in every process; returns the new version."""
+        key = self._version_key(namespace)
+        cache.add(key, 1, timeout=None)
+        try:
+            version = cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); start a fresh sequence.
+            cache.set(key, 2, timeout=None)
+            version = 2
+        with self._lock:
+            self._versions[namespace] = (version, time.monotonic())
+            for entry_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[entry_key]
+        return version
+
+    # --- Local tier --------------------------------------------------------
+
+    def _local_get(self, namespace: str, key: str, version: int) -> Any:
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return _MISSING
+            entry_version, expires_at, value = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                del self._entries[entry_key]
+                return _MISSING
+            self._entries.move_to_end(entry_key)
+            return value
+
+    def _local_set(self, namespace: str, key: str, version: int, value: Any, timeout: Optional[float]):
+        max_age = settings.LOCAL_CACHE_MAX_AGE_S
+        expires_at = time.monotonic() + (min(timeout, max_age) if timeout else max_age)
+        with self._lock:
+            self._entries[(namespace, key)] = (version, expires_at, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def namespace(self, name: str, *, versioned: bool = False) -> "CacheNamespace":
+        return CacheNamespace(self, name, versioned=versioned)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.hits = self.misses = 0
+
+
+class CacheNamespace:
+    """
+    A namespace in a TwoTierCache.
+
+    In a ``versioned`` namespace the shared keys carry the namespace version
+    too (Django's cache ``version=``), so invalidate() retires every entry
+    in both tiers with one counter increment. Unversioned namespaces keep
+    stable shared keys for targeted delete_many(); the local tiers of other
+    workers still drop the whole namespace.
+    """
+
+    def __init__(self, cache_tiers: TwoTierCache, name: str, *, versioned: bool = False):
+        self._tiers = cache_tiers
+        self.name = name
+        self.versioned = versioned
+
+    def _shared_version(self, version: int) -> Optional[int]:
+        return version if self.versioned else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        tiers = self._tiers
+        version = tiers.version(self.name)
+        value = tiers._local_get(self.name, key, version)
+        if value is not _MISSING:
+            tiers.hits += 1
+            return value
+        tiers.misses += 1
+        value = cache.get(key, _MISSING, version=self._shared_version(version))
+        if value is _MISSING:
+            return default
+        tiers._local_set(self.name, key, version, value, None)
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        tiers = self._tiers
+        version = tiers.version(self.name)
+        found: Dict[str, Any] = {}
+        remote = []
+        for key in keys:
+            value = tiers._local_get(self.name, key, version)
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        tiers.hits += len(found)
+        tiers.misses += len(remote)
+        if remote:
+            shared = cache.get_many(remote, version=self._shared_version(version))
+            for key, value in shared.items():
+                tiers._local_set(self.name, key, version, value, None)
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None) -> None:
+        version = self._tiers.version(self.name)
+        cache.set(key, value, timeout=timeout, version=self._shared_version(version))
+        self._tiers._local_set(self.name, key, version, value, timeout)
+
+    def set_many(self, data: Dict[str, Any], timeout: Optional[float] = None) -> None:
+        version = self._tiers.version(self.name)
+        cache.set_many(data, timeout=timeout, version=self._shared_version(version))
+        for key, value in data.items():
+            self._tiers._local_set(self.name, key, version, value, timeout)
+
+    def get_or_set(
+        self, key: str, default: Callable[[], Any], timeout: Optional[float] = None
+    ) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = default()
+            self.set(key, value, timeout)
+        return value
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete shared entries and drop this namespace from every local tier."""
+        version = self._tiers.version(self.name)
+        cache.delete_many(list(keys), version=self._shared_version(version))
+        self._tiers.bump(self.name)
+
+    def invalidate(self) -> int:
+        """Retire the whole namespace; returns the new version."""
+        return self._tiers.bump(self.name)
+
+
+def pending_marker_timeout(due_in_s: float, grace_s: float) -> float:
+    """
+    Lifetime of a marker that coalesces requests into a job due in
+    ``due_in_s`` seconds.
+
+    With a shared cache the job clears the marker when it starts, so the
+    marker may outlive the window by ``grace_s`` and keep absorbing requests
+    while the job waits in a backed-up queue. A per-process cache never sees
+    the worker's clear, so there the marker expires when the job falls due
+    and later requests queue a job of their own.
+    """
+
+    return due_in_s + grace_s if settings.SHARED_CACHE else due_in_s
+
+
+def cached_view(namespace: CacheNamespace, timeout: int):
+    """
+    Cache a DRF view method's GET response data in ``namespace``.
+
+    Replaces cache_page for endpoints whose data changes in bulk: keys are the
+    request path within the namespace's current generation, so
+    ``namespace.invalidate()`` retires every cached page with one counter
+    increment on any backend, with no key scans.
+    """
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != "GET":
+                return view_method(self, request, *args, **kwargs)
+            key = f"view:{request.get_full_path()}"
+            data = namespace.get(key, _MISSING)
+            if data is not _MISSING:
+                return Response(data)
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                namespace.set(key, response.data, timeout)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+local_cache = TwoTierCache()
+
+# Generation-counted namespaces for cached API responses.
+market_views = local_cache.namespace("market_views", versioned=True)
@@ -0,0 +1,87 @@
+"""
+Per-proposal completion events for push notifications.
+
+Tasks publish "score_ready" / "projections_ready" (or "*_failed") events
+carrying the new values; the SSE endpoint streams them so a client refreshes
+once instead of polling the proposal detail.
+
+Events live in the Django cache, so workers and web processes share them
+without a separate pub/sub channel. That needs a shared cache (REDIS_URL):
+with the per-process local-memory default, the endpoint is disabled. Each
+proposal has an incrementing sequence and every event is stored under its
+own key, so concurrent publishers never overwrite each other and a
+reconnecting client resumes from its Last-Event-ID.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+
+SCORE_READY = "score_ready"
+SCORE_FAILED = "score_failed"
+PROJECTIONS_READY = "projections_ready"
+PROJECTIONS_FAILED = "projections_failed"
+
+EVENT_TTL_S = 60 * 10
+# A client further behind than this only receives the latest events.
+MAX_BACKLOG = 50
+
+
+def _seq_key(proposal_id: int) -> str:
+    return f"events:proposal:{proposal_id}:seq"
+
+
+def _event_key(proposal_id: int, seq: int) -> str:
+    return f"events:proposal:{proposal_id}:{seq}"
+
+
+def publish(
+    proposal_id: int,
+    event_type: str,
+    data: Dict[str, Any],
+    task_id: Optional[str] = None,
+) -> int:
+    """Record an event for ``proposal_id``; returns its sequence number."""
+
+    key = _seq_key(proposal_id)
+    cache.add(key, 0, timeout=None)
+    try:
+        seq = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); start a fresh sequence.
+        cache.set(key, 1, timeout=None)
+        seq = 1
+    cache.set(
+        _event_key(proposal_id, seq),
+        {
+            "id": seq,
+            "type": event_type,
+            "proposal_id": proposal_id,
+            "task_id": task_id,
+            "data": data,
+            "published_at": time.time(),
+        },
+        timeout=EVENT_TTL_S,
+    )
+    return seq
+
+
+def latest_id(proposal_id: int) -> int:
+    return cache.get(_seq_key(proposal_id)) or 0
+
+
+def events_since(proposal_id: int, last_id: int) -> List[Dict[str, Any]]:
+    """Events after ``last_id`` still in the cache, oldest first."""
+
+    current = latest_id(proposal_id)
+    if current == last_id:
+        return []
+    if current < last_id:
+        # The sequence was evicted and restarted; everything stored is new.
+        last_id = 0
+    first = max(last_id + 1, current - MAX_BACKLOG + 1)
+    found = cache.get_many([_event_key(proposal_id, seq) for seq in range(first, current + 1)])
+    return [found[key] for key in sorted(found, key=lambda k: int(k.rsplit(":", 1)[1]))]
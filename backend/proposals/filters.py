@@ -1,6 +1,6 @@
 import django_filters
 
-from .models import Neighborhood, Proposal
+from .models import GreenTapeRun, Neighborhood, Proposal
 
 
 class NeighborhoodFilter(django_filters.FilterSet):
@@ -26,3 +26,16 @@ class ProposalFilter(django_filters.FilterSet):
     class Meta:
         model = Proposal
         fields = ["borough", "status", "min_units", "max_units", "min_score", "owner"]
+
+
+class GreenTapeRunFilter(django_filters.FilterSet):
+    neighborhood = django_filters.NumberFilter(field_name="neighborhood_id")
+    borough = django_filters.CharFilter(
+        field_name="neighborhood__borough__code", lookup_expr="iexact"
+    )
+    created_after = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lte")
+
+    class Meta:
+        model = GreenTapeRun
+        fields = ["neighborhood", "borough", "created_after", "created_before"]
@@ -0,0 +1,719 @@
+"""
+Streaming ingestion of NYC open-data extracts.
+
+Each source reads a CSV or Parquet file in fixed-size chunks, validates and
+transforms rows, and upserts them with batched ``bulk_create(update_conflicts=
+True)``. Memory is bounded by the chunk size (row sources) or by the number
+of distinct output rows (aggregating sources such as PLUTO lots and DOB
+permits), never by the size of the file.
+
+Re-ingesting is incremental. A file whose SHA-256 matches the source's
+IngestionWatermark is skipped without being parsed. Market and demographic
+rows carry a content hash, and only inserted or changed rows are written, so
+the report's ``neighborhood_ids`` (and the downstream cache invalidation)
+cover only neighborhoods whose data actually changed.
+
+Sources and the columns they read (case-insensitive):
+
+- ``neighborhoods``: borough, neighborhood, latitude, longitude, area_sq_miles
+- ``lots`` (PLUTO-style): borough, neighborhood, zonedist1, and any of
+  residfar / commfar / facilfar / max_far, plus max_height_ft or numfloors;
+  optional category. Aggregated to one ZoningDistrict per neighborhood/code.
+- ``permits`` (DOB): borough, neighborhood, issuance_date. Counted per month
+  into MarketData.permits_issued for months that already have market rows.
+- ``rents`` (market series): borough, neighborhood, period, median_rent,
+  median_sale_price, vacancy_rate_pct; optional permits_issued.
+- ``demographics`` (ACS): borough, neighborhood, year, population,
+  median_income; optional population_growth_pct, transit_score.
+
+``borough`` may be a code (MN), a name (Manhattan) or a PLUTO borocode (1-5).
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import hashlib
+import itertools
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from django.db import connection, transaction
+
+from .market_changes import recompute_market_changes
+from .models import (
+    Borough,
+    DemographicProfile,
+    IngestionWatermark,
+    MarketData,
+    Neighborhood,
+    ZoningDistrict,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_ERROR_SAMPLES = 20
+
+# PLUTO "borocode" values.
+BOROCODES = {"1": "MN", "2": "BX", "3": "BK", "4": "QN", "5": "SI"}
+
+# Used when an extract has no transit column; matches the seed data's midpoint.
+DEFAULT_TRANSIT_SCORE = Decimal("50.0")
+
+
+class IngestError(Exception):
+    """The file cannot be ingested at all (unknown source, missing columns...)."""
+
+
+class RowError(ValueError):
+    """A single row is invalid and is skipped."""
+
+
+@dataclass
+class IngestReport:
+    source: str
+    path: str
+    dry_run: bool = False
+    rows_read: int = 0
+    rows_written: int = 0
+    rows_unchanged: int = 0
+    rows_skipped: int = 0
+    chunks: int = 0
+    file_unchanged: bool = False
+    high_water: Optional[str] = None
+    neighborhood_ids: Set[int] = field(default_factory=set)
+    errors: List[str] = field(default_factory=list)
+
+    def skip(self, line: int, message: str) -> None:
+        self.rows_skipped += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append(f"row {line}: {message}")
+
+
+# --- Readers -----------------------------------------------------------------
+
+
+def _normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+
+
+def iter_chunks(path: Path, chunk_size: int, fmt: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of at most ``chunk_size`` rows with lower-cased column names."""
+
+    fmt = (fmt or path.suffix.lstrip(".")).lower()
+    if fmt == "csv":
+        with path.open(newline="", encoding="utf-8-sig") as handle:
+            reader = csv.DictReader(handle)
+            while True:
+                chunk = [_normalize(row) for row in itertools.islice(reader, chunk_size)]
+                if not chunk:
+                    return
+                yield chunk
+    elif fmt in ("parquet", "pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise IngestError("Reading Parquet files requires pyarrow (pip install pyarrow).") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield [_normalize(row) for row in batch.to_pylist()]
+    else:
+        raise IngestError(f"Unsupported file format {fmt!r}; expected csv or parquet.")
+
+
+# --- Field parsers -------------------------------------------------------------
+
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _required(row: Dict[str, Any], name: str) -> Any:
+    value = row.get(name)
+    if _blank(value):
+        raise RowError(f"missing {name}")
+    return value
+
+
+def _decimal(value: Any, name: str, places: int = 2) -> Decimal:
+    try:
+        parsed = Decimal(str(value).replace(",", "").replace("$", "").strip())
+    except InvalidOperation:
+        raise RowError(f"invalid {name}: {value!r}") from None
+    if not parsed.is_finite():
+        raise RowError(f"invalid {name}: {value!r}")
+    return parsed.quantize(Decimal(1).scaleb(-places))
+
+
+def _int(value: Any, name: str) -> int:
+    return int(_decimal(value, name, places=0))
+
+
+def _date(value: Any, name: str) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = str(value).strip()
+    # Full-text formats first, then the date prefix of timestamps such as
+    # "2025-01-15T00:00:00.000" or "01/15/2025 12:00:00 AM".
+    for candidate, pattern in (
+        (text, "%Y-%m-%d"),
+        (text, "%m/%d/%Y"),
+        (text, "%Y-%m"),
+        (text[:10], "%Y-%m-%d"),
+        (text[:10], "%m/%d/%Y"),
+    ):
+        try:
+            return datetime.datetime.strptime(candidate, pattern).date()
+        except ValueError:
+            continue
+    raise RowError(f"invalid {name}: {value!r}")
+
+
+def _month(value: Any, name: str) -> datetime.date:
+    return _date(value, name).replace(day=1)
+
+
+# --- Neighborhood resolution ---------------------------------------------------
+
+
+class NeighborhoodResolver:
+    """Maps (borough, neighborhood name) to IDs from one up-front query."""
+
+    def __init__(self) -> None:
+        self.boroughs: Dict[str, Borough] = {}
+        for borough in Borough.objects.all():
+            self.boroughs[borough.code.lower()] = borough
+            self.boroughs[borough.name.lower()] = borough
+        for number, code in BOROCODES.items():
+            if code.lower() in self.boroughs:
+                self.boroughs[number] = self.boroughs[code.lower()]
+        self.ids: Dict[Tuple[int, str], int] = {
+            (borough_id, name.lower()): pk
+            for pk, borough_id, name in Neighborhood.objects.values_list("id", "borough_id", "name")
+        }
+
+    def borough(self, row: Dict[str, Any]) -> Borough:
+        raw = str(_required(row, "borough")).strip().lower()
+        raw = raw[:-2] if raw.endswith(".0") else raw  # numeric borocodes from Parquet/Excel
+        try:
+            return self.boroughs[raw]
+        except KeyError:
+            raise RowError(f"unknown borough {raw!r}") from None
+
+    def neighborhood_id(self, row: Dict[str, Any]) -> int:
+        borough = self.borough(row)
+        name = str(_required(row, "neighborhood")).strip()
+        try:
+            return self.ids[(borough.id, name.lower())]
+        except KeyError:
+            raise RowError(f"unknown neighborhood {name!r} in {borough.code}") from None
+
+    def remember(self, neighborhood: Neighborhood) -> None:
+        self.ids[(neighborhood.borough_id, neighborhood.name.lower())] = neighborhood.id
+
+
+# --- Upsert --------------------------------------------------------------------
+
+
+def upsert(
+    model,
+    objs: Sequence[Any],
+    *,
+    unique_fields: Sequence[str],
+    update_fields: Sequence[str],
+    batch_size: int = 1000,
+) -> int:
+    """
+    Insert or update ``objs`` on ``unique_fields``; returns the row count.
+
+    Uses a single INSERT ... ON CONFLICT per batch where the backend supports
+    it, otherwise one lookup plus bulk_update/bulk_create per call.
+    """
+
+    if not objs:
+        return 0
+    if connection.features.supports_update_conflicts_with_target:
+        model.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+        return len(objs)
+
+    key_attrs = [model._meta.get_field(name).attname for name in unique_fields]
+
+    def key(obj) -> tuple:
+        return tuple(getattr(obj, attr) for attr in key_attrs)
+
+    lead = key_attrs[0]
+    existing = {
+        tuple(row[1:]): row[0]
+        for row in model.objects.filter(
+            **{f"{lead}__in": {getattr(o, lead) for o in objs}}
+        ).values_list("pk", *key_attrs)
+    }
+    to_update, to_create = [], []
+    for obj in objs:
+        pk = existing.get(key(obj))
+        if pk is None:
+            to_create.append(obj)
+        else:
+            obj.pk = pk
+            to_update.append(obj)
+    model.objects.bulk_create(to_create, batch_size=batch_size)
+    model.objects.bulk_update(to_update, update_fields, batch_size=batch_size)
+    return len(objs)
+
+
+def _dedupe(objs: Iterable[Any], key: Callable[[Any], tuple]) -> List[Any]:
+    """Last row wins when a chunk repeats a key."""
+    return list({key(obj): obj for obj in objs}.values())
+
+
+# --- Sources -------------------------------------------------------------------
+
+
+class Source:
+    name = ""
+    required: Tuple[str, ...] = ()
+
+    def __init__(self, resolver: NeighborhoodResolver, report: IngestReport):
+        self.resolver = resolver
+        self.report = report
+
+    def check_columns(self, columns: Iterable[str]) -> None:
+        missing = [c for c in self.required if c not in set(columns)]
+        if missing:
+            raise IngestError(f"{self.name}: missing required columns {', '.join(missing)}")
+
+    def process_chunk(self, rows: List[Dict[str, Any]], first_line: int, dry_run: bool) -> None:
+        raise NotImplementedError
+
+    def finish(self, dry_run: bool) -> None:
+        """Flush aggregated state after the last chunk."""
+
+
+class RowSource(Source):
+    """One output row per input row, upserted chunk by chunk."""
+
+    model = None
+    unique_fields: Tuple[str, ...] = ()
+    value_fields: Tuple[str, ...] = ()
+    optional_fields: Tuple[str, ...] = ()
+    # Set on sources whose model is ContentHashed: unchanged rows are skipped.
+    change_detection = False
+    high_water_field: Optional[str] = None
+
+    def build(self, row: Dict[str, Any]):
+        raise NotImplementedError
+
+    def update_fields(self, columns: Iterable[str]) -> List[str]:
+        # Optional columns absent from the file keep their stored values.
+        present = set(columns)
+        return list(self.value_fields) + [f for f in self.optional_fields if f in present]
+
+    def process_chunk(self, rows, first_line, dry_run):
+        objs = []
+        for offset, row in enumerate(rows):
+            try:
+                objs.append(self.build(row))
+            except RowError as exc:
+                self.report.skip(first_line + offset, str(exc))
+        attrs = [self.model._meta.get_field(f).attname for f in self.unique_fields]
+        objs = _dedupe(objs, lambda o: tuple(getattr(o, a) for a in attrs))
+        if self.high_water_field and objs:
+            latest = str(max(getattr(o, self.high_water_field) for o in objs))
+            if self.report.high_water is None or latest > self.report.high_water:
+                self.report.high_water = latest
+        update_fields = self.update_fields(rows[0].keys())
+        if self.change_detection:
+            objs = self.changed(objs, attrs, update_fields)
+            update_fields.append("content_hash")
+        if dry_run:
+            return
+        with transaction.atomic():
+            self.report.rows_written += upsert(
+                self.model,
+                objs,
+                unique_fields=self.unique_fields,
+                update_fields=update_fields,
+            )
+        self.report.neighborhood_ids.update(self.neighborhood_ids(objs))
+
+    def changed(self, objs, attrs: List[str], update_fields: List[str]) -> List[Any]:
+        """
+        Return the objs that are new or differ from their stored row.
+
+        Columns the file does not carry keep their stored values, so they are
+        copied from the stored row before hashing.
+        """
+
+        if not objs:
+            return objs
+        kept = [f for f in self.optional_fields if f not in update_fields]
+        filters = {f"{attr}__in": {getattr(o, attr) for o in objs} for attr in attrs}
+        stored = {
+            tuple(getattr(row, a) for a in attrs): row
+            for row in self.model.objects.filter(**filters).only(*attrs, "content_hash", *kept)
+        }
+        changed = []
+        for obj in objs:
+            current = stored.get(tuple(getattr(obj, a) for a in attrs))
+            if current is not None:
+                for name in kept:
+                    setattr(obj, name, getattr(current, name))
+            obj.content_hash = obj.compute_content_hash()
+            if current is None or current.content_hash != obj.content_hash:
+                changed.append(obj)
+        self.report.rows_unchanged += len(objs) - len(changed)
+        return changed
+
+    def neighborhood_ids(self, objs) -> Iterable[int]:
+        return (o.neighborhood_id for o in objs)
+
+
+class NeighborhoodSource(RowSource):
+    name = "neighborhoods"
+    required = ("borough", "neighborhood", "latitude", "longitude", "area_sq_miles")
+    model = Neighborhood
+    unique_fields = ("borough", "name")
+    value_fields = ("latitude", "longitude", "area_sq_miles")
+
+    def build(self, row):
+        return Neighborhood(
+            borough=self.resolver.borough(row),
+            name=str(_required(row, "neighborhood")).strip(),
+            latitude=_decimal(_required(row, "latitude"), "latitude", 6),
+            longitude=_decimal(_required(row, "longitude"), "longitude", 6),
+            area_sq_miles=_decimal(_required(row, "area_sq_miles"), "area_sq_miles"),
+        )
+
+    def process_chunk(self, rows, first_line, dry_run):
+        super().process_chunk(rows, first_line, dry_run)
+        if not dry_run:
+            # Newly inserted rows have no PK from an upsert on every backend;
+            # reload so later rows and the report can resolve them.
+            names = {str(r.get("neighborhood", "")).strip() for r in rows}
+            for hood in Neighborhood.objects.filter(name__in=names):
+                self.resolver.remember(hood)
+                self.report.neighborhood_ids.add(hood.id)
+
+    def neighborhood_ids(self, objs):
+        return ()
+
+
+class RentSource(RowSource):
+    name = "rents"
+    required = ("borough", "neighborhood", "period", "median_rent", "median_sale_price", "vacancy_rate_pct")
+    model = MarketData
+    unique_fields = ("neighborhood", "period")
+    value_fields = ("median_rent", "median_sale_price", "vacancy_rate_pct")
+    optional_fields = ("permits_issued",)
+    change_detection = True
+    high_water_field = "period"
+
+    def build(self, row):
+        permits = row.get("permits_issued")
+        return MarketData(
+            neighborhood_id=self.resolver.neighborhood_id(row),
+            period=_month(_required(row, "period"), "period"),
+            median_rent=_decimal(_required(row, "median_rent"), "median_rent"),
+            median_sale_price=_decimal(_required(row, "median_sale_price"), "median_sale_price"),
+            vacancy_rate_pct=_decimal(_required(row, "vacancy_rate_pct"), "vacancy_rate_pct"),
+            permits_issued=0 if _blank(permits) else _int(permits, "permits_issued"),
+        )
+
+    def finish(self, dry_run):
+        # Upserts bypass the model signals that maintain the change columns.
+        if not dry_run:
+            recompute_market_changes(self.report.neighborhood_ids)
+
+
+class DemographicSource(RowSource):
+    name = "demographics"
+    required = ("borough", "neighborhood", "year", "population", "median_income")
+    model = DemographicProfile
+    unique_fields = ("neighborhood", "year")
+    value_fields = ("population", "median_income")
+    optional_fields = ("population_growth_pct", "transit_score")
+    change_detection = True
+    high_water_field = "year"
+
+    def build(self, row):
+        growth = row.get("population_growth_pct")
+        transit = row.get("transit_score")
+        return DemographicProfile(
+            neighborhood_id=self.resolver.neighborhood_id(row),
+            year=_int(_required(row, "year"), "year"),
+            population=_int(_required(row, "population"), "population"),
+            median_income=_decimal(_required(row, "median_income"), "median_income"),
+            population_growth_pct=(
+                Decimal("0.00") if _blank(growth) else _decimal(growth, "population_growth_pct")
+            ),
+            transit_score=(
+                DEFAULT_TRANSIT_SCORE if _blank(transit) else _decimal(transit, "transit_score", 1)
+            ),
+        )
+
+
+def zoning_category(code: str) -> Optional[str]:
+    """ZoningDistrict category for a NYC zoning district code, or None to skip."""
+    code = code.upper()
+    if "/" in code or code.startswith("MX"):
+        return "mixed"
+    return {"R": "residential", "C": "commercial", "M": "manufacturing"}.get(code[:1])
+
+
+class LotSource(Source):
+    """PLUTO-style lots, aggregated to one zoning district per neighborhood/code."""
+
+    name = "lots"
+    required = ("borough", "neighborhood", "zonedist1")
+    far_columns = ("max_far", "residfar", "commfar", "facilfar")
+
+    def __init__(self, resolver, report):
+        super().__init__(resolver, report)
+        # (neighborhood_id, code) -> [category, max_far, max_height_ft]
+        self.districts: Dict[Tuple[int, str], List[Any]] = {}
+
+    def check_columns(self, columns):
+        super().check_columns(columns)
+        columns = set(columns)
+        if not columns & set(self.far_columns):
+            raise IngestError(f"lots: need one of {', '.join(self.far_columns)}")
+        if not columns & {"max_height_ft", "numfloors"}:
+            raise IngestError("lots: need max_height_ft or numfloors")
+
+    def process_chunk(self, rows, first_line, dry_run):
+        for offset, row in enumerate(rows):
+            try:
+                self._add(row)
+            except RowError as exc:
+                self.report.skip(first_line + offset, str(exc))
+
+    def _add(self, row):
+        hood_id = self.resolver.neighborhood_id(row)
+        code = str(_required(row, "zonedist1")).strip().upper()
+        category = str(row.get("category") or "").strip().lower() or zoning_category(code)
+        if category not in dict(ZoningDistrict.CATEGORY_CHOICES):
+            raise RowError(f"unsupported zoning district {code!r}")
+
+        fars = [_decimal(row[c], c) for c in self.far_columns if not _blank(row.get(c))]
+        if not fars:
+            raise RowError("missing FAR")
+        if not _blank(row.get("max_height_ft")):
+            height = _int(row["max_height_ft"], "max_height_ft")
+        elif not _blank(row.get("numfloors")):
+            # PLUTO has no height limit column; ~10 ft per built floor.
+            height = _int(_decimal(row["numfloors"], "numfloors") * 10, "numfloors")
+        else:
+            raise RowError("missing height")
+
+        current = self.districts.get((hood_id, code))
+        if current is None:
+            self.districts[(hood_id, code)] = [category, max(fars), height]
+        else:
+            current[1] = max(current[1], *fars)
+            current[2] = max(current[2], height)
+
+    def finish(self, dry_run):
+        objs = [
+            ZoningDistrict(
+                neighborhood_id=hood_id,
+                code=code[:10],
+                category=category,
+                max_far=min(far, Decimal("999.99")),
+                max_height_ft=height,
+                residential_allowed=category != "manufacturing",
+            )
+            for (hood_id, code), (category, far, height) in self.districts.items()
+        ]
+        if dry_run:
+            return
+        for start in range(0, len(objs), DEFAULT_CHUNK_SIZE):
+            batch = objs[start : start + DEFAULT_CHUNK_SIZE]
+            with transaction.atomic():
+                self.report.rows_written += upsert(
+                    ZoningDistrict,
+                    batch,
+                    unique_fields=("neighborhood", "code"),
+                    update_fields=("category", "max_far", "max_height_ft", "residential_allowed"),
+                )
+        self.report.neighborhood_ids.update(hood_id for hood_id, _code in self.districts)
+
+
+class PermitSource(Source):
+    """DOB permit issuances, counted per neighborhood and month."""
+
+    name = "permits"
+    required = ("borough", "neighborhood", "issuance_date")
+
+    def __init__(self, resolver, report):
+        super().__init__(resolver, report)
+        self.counts: Dict[Tuple[int, datetime.date], int] = defaultdict(int)
+
+    def process_chunk(self, rows, first_line, dry_run):
+        for offset, row in enumerate(rows):
+            try:
+                key = (
+                    self.resolver.neighborhood_id(row),
+                    _month(_required(row, "issuance_date"), "issuance_date"),
+                )
+            except RowError as exc:
+                self.report.skip(first_line + offset, str(exc))
+                continue
+            self.counts[key] += 1
+
+    def finish(self, dry_run):
+        # MarketData rows need prices and rents, so permits only fill months
+        # that a rents extract (or the seed) already created.
+        by_hood: Dict[int, Dict[datetime.date, int]] = defaultdict(dict)
+        for (hood_id, period), count in self.counts.items():
+            by_hood[hood_id][period] = count
+
+        hood_ids = list(by_hood)
+        for start in range(0, len(hood_ids), 500):
+            batch_ids = hood_ids[start : start + 500]
+            rows = []
+            for market in MarketData.objects.filter(neighborhood_id__in=batch_ids):
+                count = by_hood[market.neighborhood_id].pop(market.period, None)
+                if count is None:
+                    continue
+                if count == market.permits_issued:
+                    self.report.rows_unchanged += 1
+                    continue
+                market.permits_issued = count
+                market.content_hash = market.compute_content_hash()
+                rows.append(market)
+            if not dry_run:
+                with transaction.atomic():
+                    MarketData.objects.bulk_update(
+                        rows, ["permits_issued", "content_hash"], batch_size=1000
+                    )
+                self.report.rows_written += len(rows)
+                self.report.neighborhood_ids.update(m.neighborhood_id for m in rows)
+
+        unmatched = sum(len(periods) for periods in by_hood.values())
+        if unmatched:
+            self.report.errors.append(
+                f"{unmatched} neighborhood-months of permits had no market data row"
+            )
+
+
+SOURCES: Dict[str, type] = {
+    source.name: source
+    for source in (NeighborhoodSource, LotSource, PermitSource, RentSource, DemographicSource)
+}
+
+
+def ingest_file(
+    source: str,
+    path,
+    *,
+    fmt: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+    progress: Optional[Callable[[IngestReport], None]] = None,
+    force: bool = False,
+) -> IngestReport:
+    """
+    Stream ``path`` into the database as ``source``.
+
+    Every chunk is written in its own transaction, so a failure part-way keeps
+    the chunks already loaded; re-running is safe because all writes are
+    upserts. Bulk writes bypass model signals, so cached site contexts and
+    market pages for the touched neighborhoods are invalidated here.
+
+    A file identical to the last one ingested for this source and path is
+    skipped unless ``force`` is set. The watermark is only advanced after the
+    whole file has been processed.
+    """
+
+    try:
+        source_cls = SOURCES[source]
+    except KeyError:
+        raise IngestError(f"Unknown source {source!r}; choose from {', '.join(SOURCES)}") from None
+
+    path = Path(path)
+    report = IngestReport(source=source, path=str(path), dry_run=dry_run)
+    digest, size = file_fingerprint(path)
+    watermark_key = {"source": source, "path": str(path.resolve())}
+    if not force and not dry_run:
+        watermark = IngestionWatermark.objects.filter(**watermark_key).first()
+        if watermark is not None and watermark.file_sha256 == digest:
+            report.file_unchanged = True
+            report.high_water = watermark.high_water or None
+            logger.info("Skipping %s from %s: unchanged since %s", source, path, watermark.ingested_at)
+            return report
+
+    handler = source_cls(NeighborhoodResolver(), report)
+
+    line = 2  # first data row, after the header
+    for chunk in iter_chunks(path, chunk_size, fmt):
+        if report.chunks == 0:
+            handler.check_columns(chunk[0].keys())
+        handler.process_chunk(chunk, line, dry_run)
+        report.chunks += 1
+        report.rows_read += len(chunk)
+        line += len(chunk)
+        if progress:
+            progress(report)
+    handler.finish(dry_run)
+
+    if not dry_run:
+        IngestionWatermark.objects.update_or_create(
+            **watermark_key,
+            defaults={
+                "file_sha256": digest,
+                "file_size": size,
+                "high_water": report.high_water or "",
+                "rows_read": report.rows_read,
+                "rows_written": report.rows_written,
+            },
+        )
+        if report.neighborhood_ids:
+            invalidate_after_ingest(
+                report.neighborhood_ids, reference=source in ("neighborhoods", "lots")
+            )
+    logger.info(
+        "Ingested %s from %s: read=%s written=%s unchanged=%s skipped=%s",
+        source, path, report.rows_read, report.rows_written, report.rows_unchanged,
+        report.rows_skipped,
+    )
+    return report
+
+
+def file_fingerprint(path: Path) -> Tuple[str, int]:
+    """SHA-256 hex digest and size of ``path``, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    size = 0
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def invalidate_after_ingest(neighborhood_ids: Iterable[int], *, reference: bool = False) -> None:
+    """Refresh caches and queue one batch rescore for the changed neighborhoods."""
+    from analytics.rankings import schedule_rankings_refresh
+
+    from .caching import market_views
+    from .nyc_data import invalidate_reference_data, schedule_site_context_rebuild
+    from .scoring import schedule_rescore
+
+    ids = sorted(set(neighborhood_ids))
+    schedule_site_context_rebuild(ids)
+    market_views.invalidate()
+    if reference:
+        invalidate_reference_data()
+    schedule_rescore(ids)
+    schedule_rankings_refresh()
@@ -0,0 +1,87 @@
+"""
+Aggregation of per-step LLM instrumentation recorded on GreenTapeStep rows.
+
+SQLite and SQL Server disagree on percentile functions, so the grouped
+latency percentiles are computed in Python over a bounded time window.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from django.db.models import QuerySet
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+GROUP_BY_FIELDS = {
+    "step": "kind",
+    "model": "model",
+    "day": "day",
+}
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def aggregate_step_metrics(
+    steps: QuerySet,
+    *,
+    group_by: Iterable[str] = ("step",),
+    days: int = 7,
+) -> List[Dict[str, Any]]:
+    """
+    Group LLM-backed steps and report call counts, p50/p95 latency and time to
+    first byte, token totals, retries and estimated cost per group.
+    """
+
+    keys = [GROUP_BY_FIELDS[g] for g in group_by]
+    since = timezone.now() - timedelta(days=days)
+    rows = (
+        steps.filter(run__created_at__gte=since, latency_ms__isnull=False)
+        .annotate(day=TruncDate("run__created_at"))
+        .values(
+            "kind", "model", "day", "latency_ms", "ttfb_ms",
+            "prompt_tokens", "completion_tokens", "retries", "cost_usd",
+        )
+    )
+
+    groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        groups[tuple(row[k] for k in keys)].append(row)
+
+    result = []
+    for group_key, members in sorted(groups.items(), key=lambda kv: [str(k) for k in kv[0]]):
+        latencies = sorted(m["latency_ms"] for m in members)
+        ttfbs = sorted(m["ttfb_ms"] for m in members if m["ttfb_ms"] is not None)
+        prompt_tokens = sum(m["prompt_tokens"] for m in members)
+        completion_tokens = sum(m["completion_tokens"] for m in members)
+        costs = [m["cost_usd"] for m in members if m["cost_usd"] is not None]
+        entry: Dict[str, Any] = {
+            name: value for name, value in zip(group_by, group_key)
+        }
+        entry.update(
+            {
+                "calls": len(members),
+                "p50_latency_ms": percentile(latencies, 50),
+                "p95_latency_ms": percentile(latencies, 95),
+                "p50_ttfb_ms": percentile(ttfbs, 50),
+                "p95_ttfb_ms": percentile(ttfbs, 95),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "avg_tokens_per_call": round(
+                    (prompt_tokens + completion_tokens) / len(members), 1
+                ),
+                "retries": sum(m["retries"] for m in members),
+                "cost_usd": float(sum(costs)) if costs else None,
+            }
+        )
+        result.append(entry)
+    return result
@@ -0,0 +1,135 @@
+"""
+Concurrency harness for the Green-Tape pipeline.
+
+Drives ``run_green_tape_pipeline`` (the same code path the API uses) from a
+thread pool and reports throughput and latency percentiles. Pair it with the
+local LLM stub in ``config.llm_stub`` to load-test without provider costs.
+"""
+
+from __future__ import annotations
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db import close_old_connections
+
+from .agents import run_green_tape_pipeline
+from .llm_metrics import percentile
+from .models import Neighborhood
+
+
+@dataclass
+class LoadTestReport:
+    runs: int
+    errors: int
+    concurrency: int
+    wall_s: float
+    latencies_ms: List[float]
+    step_latencies_ms: Dict[str, List[float]] = field(default_factory=dict)
+    stop_reasons: Dict[str, int] = field(default_factory=dict)
+    retries: int = 0
+    error_samples: List[str] = field(default_factory=list)
+
+    @property
+    def throughput_rps(self) -> float:
+        return (self.runs - self.errors) / self.wall_s if self.wall_s else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "concurrency": self.concurrency,
+            "wall_s": round(self.wall_s, 3),
+            "throughput_rps": round(self.throughput_rps, 3),
+            "p50_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "p99_ms": percentile(ordered, 99),
+            "max_ms": ordered[-1] if ordered else None,
+            "retries": self.retries,
+            "stop_reasons": dict(self.stop_reasons),
+            "steps": {
+                step: {
+                    "calls": len(values),
+                    "p50_ms": percentile(sorted(values), 50),
+                    "p95_ms": percentile(sorted(values), 95),
+                }
+                for step, values in self.step_latencies_ms.items()
+            },
+        }
+
+
+def _one_run(neighborhood: Neighborhood, lot_size_sqft: float, user_goal: str, max_iterations: int):
+    close_old_connections()
+    try:
+        started = time.perf_counter()
+        result = run_green_tape_pipeline(
+            neighborhood=neighborhood,
+            lot_size_sqft=lot_size_sqft,
+            user_goal=user_goal,
+            max_iterations=max_iterations,
+        )
+        return (time.perf_counter() - started) * 1000, result
+    finally:
+        close_old_connections()
+
+
+def run_load_test(
+    *,
+    neighborhoods: Sequence[Neighborhood],
+    total_runs: int,
+    concurrency: int,
+    max_iterations: int = 1,
+    lot_size_sqft: float = 20000.0,
+    user_goal: str = "Deeply affordable CLT housing with anti-displacement protections.",
+    progress: Optional[Any] = None,
+) -> LoadTestReport:
+    """Run ``total_runs`` pipelines, at most ``concurrency`` at a time."""
+
+    if not neighborhoods:
+        raise ValueError("At least one neighborhood is required.")
+
+    report = LoadTestReport(
+        runs=total_runs, errors=0, concurrency=concurrency, wall_s=0.0, latencies_ms=[]
+    )
+    hoods = itertools.cycle(neighborhoods)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="green-tape-load") as pool:
+        futures = [
+            pool.submit(_one_run, next(hoods), lot_size_sqft, user_goal, max_iterations)
+            for _ in range(total_runs)
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                latency_ms, result = future.result()
+            except Exception as exc:
+                report.errors += 1
+                if len(report.error_samples) < 5:
+                    report.error_samples.append(repr(exc))
+                continue
+            report.latencies_ms.append(latency_ms)
+            _collect_step_metrics(report, result)
+            if progress and done % max(1, total_runs // 10) == 0:
+                progress(done, total_runs)
+    report.wall_s = time.perf_counter() - started
+    return report
+
+
+def _collect_step_metrics(report: LoadTestReport, result: Dict[str, Any]) -> None:
+    def add(step: str, metrics: Optional[Dict[str, Any]]):
+        if not metrics:
+            return
+        report.step_latencies_ms.setdefault(step, []).append(metrics["latency_ms"])
+        report.retries += metrics.get("retries") or 0
+
+    add("draft", result["draft"].get("metrics"))
+    add("critic", result["critic"].get("metrics"))
+    optimizer = result["optimizer"]
+    for step in optimizer["steps"]:
+        add("optimizer", step.get("metrics"))
+        add("rescore", step.get("rescore_metrics"))
+    reason = optimizer.get("stop_reason", "")
+    report.stop_reasons[reason] = report.stop_reasons.get(reason, 0) + 1
@@ -3,6 +3,8 @@ from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.db import connection
 
+from analytics.rankings import refresh_rankings
+
 SQL_DIR = Path(__file__).resolve().parent.parent.parent.parent / "sql"
 
 DEPLOY_ORDER = [
@@ -33,4 +35,6 @@ class Command(BaseCommand):
                             self.style.ERROR(f"  [{label}] {sql_file.name} — FAILED: {e}")
                         )
 
+        # The rankings snapshot is built from vw_NeighborhoodRankings.
+        self.stdout.write(f"  Ranked neighborhoods: {refresh_rankings()}")
         self.stdout.write(self.style.SUCCESS("T-SQL deployment complete."))
@@ -0,0 +1,87 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.llm_stub import LatencyModel, StubConfig, start_stub_in_thread
+from proposals.loadtest import run_load_test
+from proposals.models import Neighborhood
+
+
+class Command(BaseCommand):
+    help = "Load-test the Green-Tape pipeline at a target concurrency and report latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--max-iterations", type=int, default=1)
+        parser.add_argument(
+            "--with-stub", action="store_true",
+            help="Start an in-process LLM stub and point OPENAI_BASE_URL at it",
+        )
+        parser.add_argument("--stub-latency", default="lognormal:800,0.4")
+        parser.add_argument("--stub-rate-429", type=float, default=0.0)
+        parser.add_argument("--stub-rate-500", type=float, default=0.0)
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        neighborhoods = list(Neighborhood.objects.select_related("borough")[:50])
+        if not neighborhoods:
+            raise CommandError("No neighborhoods found; run seed_nyc_data first.")
+
+        server = None
+        if options["with_stub"]:
+            try:
+                latency = LatencyModel.parse(options["stub_latency"])
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+            server, base_url = start_stub_in_thread(
+                config=StubConfig(
+                    latency=latency,
+                    rate_429=options["stub_rate_429"],
+                    rate_500=options["stub_rate_500"],
+                )
+            )
+            os.environ["OPENAI_BASE_URL"] = base_url
+            os.environ.setdefault("OPENAI_API_KEY", "stub")
+            self.stdout.write(f"LLM stub started at {base_url}")
+        elif not (os.environ.get("OPENAI_API_KEY") or os.environ.get("LLM_API_KEY")):
+            raise CommandError(
+                "No LLM key configured; pass --with-stub or point OPENAI_BASE_URL at llm_stub_server."
+            )
+
+        try:
+            report = run_load_test(
+                neighborhoods=neighborhoods,
+                total_runs=options["runs"],
+                concurrency=options["concurrency"],
+                max_iterations=options["max_iterations"],
+                progress=lambda done, total: self.stdout.write(f"  {done}/{total} runs"),
+            )
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        summary = report.summary()
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        self.stdout.write(
+            f"Runs: {summary['runs']}  errors: {summary['errors']}  "
+            f"concurrency: {summary['concurrency']}  wall: {summary['wall_s']}s"
+        )
+        self.stdout.write(f"Throughput: {summary['throughput_rps']} runs/s")
+        self.stdout.write(
+            f"Latency ms  p50={summary['p50_ms']:.0f}  p95={summary['p95_ms']:.0f}  "
+            f"p99={summary['p99_ms']:.0f}  max={summary['max_ms']:.0f}"
+            if summary["p50_ms"] is not None else "Latency: no successful runs"
+        )
+        for step, stats in summary["steps"].items():
+            self.stdout.write(
+                f"  {step:<10} calls={stats['calls']:<5} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms"
+            )
+        self.stdout.write(f"Retries: {summary['retries']}  stop reasons: {summary['stop_reasons']}")
+        for sample in report.error_samples:
+            self.stderr.write(f"  error: {sample}")
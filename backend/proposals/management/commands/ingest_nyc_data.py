@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from proposals.ingest import DEFAULT_CHUNK_SIZE, SOURCES, IngestError, ingest_file
+
+
+class Command(BaseCommand):
+    help = "Stream a NYC open-data extract (CSV or Parquet) into neighborhoods, zoning, market and demographic tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", choices=sorted(SOURCES))
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                            help="File format (default: from the file extension)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing")
+        parser.add_argument("--force", action="store_true",
+                            help="Re-process the file even if it matches the last ingested copy")
+
+    def handle(self, *args, **options):
+        def progress(report):
+            if report.chunks % 20 == 0:
+                self.stdout.write(f"  {report.rows_read} rows read, {report.rows_skipped} skipped")
+
+        try:
+            report = ingest_file(
+                options["source"],
+                options["path"],
+                fmt=options["format"],
+                chunk_size=options["chunk_size"],
+                dry_run=options["dry_run"],
+                progress=progress,
+                force=options["force"],
+            )
+        except (IngestError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        if report.file_unchanged:
+            self.stdout.write(f"{report.source}: {report.path} is unchanged since the last ingest; "
+                              "nothing to do (use --force to re-process)")
+            return
+
+        verb = "Validated" if report.dry_run else "Ingested"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report.source}: {report.rows_read} rows read, "
+            f"{report.rows_written} written, {report.rows_unchanged} unchanged, "
+            f"{report.rows_skipped} skipped, "
+            f"{len(report.neighborhood_ids)} neighborhoods touched"
+        ))
+        if report.high_water:
+            self.stdout.write(f"  latest period in file: {report.high_water}")
+        for error in report.errors:
+            self.stderr.write(f"  {error}")
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from config.llm_stub import LatencyModel, StubConfig, make_stub_server
+
+
+class Command(BaseCommand):
+    help = "Run a local OpenAI-compatible /v1/chat/completions stub for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8089)
+        parser.add_argument(
+            "--latency", default="lognormal:800,0.4",
+            help="Latency distribution: fixed:MS, uniform:MIN,MAX, normal:MEAN,SD, lognormal:MEDIAN,SIGMA",
+        )
+        parser.add_argument("--ttfb-fraction", type=float, default=0.3)
+        parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+        parser.add_argument("--rate-500", type=float, default=0.0, help="Fraction of requests answered with 500")
+        parser.add_argument("--rate-timeout", type=float, default=0.0, help="Fraction of requests that hang")
+        parser.add_argument("--hang-s", type=float, default=65.0)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            latency = LatencyModel.parse(options["latency"])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        config = StubConfig(
+            latency=latency,
+            ttfb_fraction=options["ttfb_fraction"],
+            rate_429=options["rate_429"],
+            rate_500=options["rate_500"],
+            rate_timeout=options["rate_timeout"],
+            hang_s=options["hang_s"],
+            seed=options["seed"],
+        )
+        server = make_stub_server(options["host"], options["port"], config)
+        host, port = server.server_address[:2]
+        self.stdout.write(
+            self.style.SUCCESS(f"LLM stub listening on http://{host}:{port}/v1")
+        )
+        self.stdout.write(f"  export OPENAI_BASE_URL=http://{host}:{port}/v1 OPENAI_API_KEY=stub")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
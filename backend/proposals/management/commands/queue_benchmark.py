@@ -0,0 +1,78 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from proposals.models import Proposal
+from proposals.queue_benchmark import run_queue_benchmark
+from proposals.tasks import calculate_feasibility_score, run_green_tape
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure scoring-task latency with idle workers and during an LLM sweep "
+        "(needs a broker and running llm/scoring workers)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=30)
+        parser.add_argument("--llm-tasks", type=int, default=100)
+        parser.add_argument("--interval", type=float, default=0.2, help="Seconds between probes")
+        parser.add_argument("--timeout", type=float, default=60.0)
+        parser.add_argument("--max-iterations", type=int, default=1)
+        parser.add_argument(
+            "--shared-queue", action="store_true",
+            help="Send the LLM sweep to the scoring queue to reproduce the unrouted baseline",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        proposal = Proposal.objects.select_related("neighborhood").order_by("id").first()
+        user = get_user_model().objects.order_by("id").first()
+        if proposal is None or user is None:
+            raise CommandError("Needs at least one proposal and one user; run seed_nyc_data first.")
+
+        sweep_queue = "scoring" if options["shared_queue"] else None
+
+        def probe():
+            return calculate_feasibility_score.apply_async(args=[proposal.id])
+
+        def sweep():
+            return run_green_tape.apply_async(
+                kwargs={
+                    "user_id": user.id,
+                    "neighborhood_id": proposal.neighborhood_id,
+                    "lot_size_sqft": 20000.0,
+                    "user_goal": "Deeply affordable CLT housing with anti-displacement protections.",
+                    "max_iterations": options["max_iterations"],
+                },
+                queue=sweep_queue,
+            )
+
+        report = run_queue_benchmark(
+            probe=probe,
+            sweep=sweep,
+            samples=options["samples"],
+            sweep_size=options["llm_tasks"],
+            interval_s=options["interval"],
+            timeout_s=options["timeout"],
+            progress=self.stdout.write,
+        )
+
+        summary = report.summary()
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        self.stdout.write(f"LLM sweep: {summary['sweep_size']} tasks on the {sweep_queue or 'llm'} queue")
+        for label, key in (("idle", "idle"), ("during sweep", "under_llm_sweep")):
+            stats = summary[key]
+            self.stdout.write(
+                f"  scoring {label:<13} n={stats['samples']:<4} p50={stats['p50_ms']}ms "
+                f"p95={stats['p95_ms']}ms max={stats['max_ms']}ms"
+            )
+        self.stdout.write(f"p95 ratio (sweep / idle): {summary['p95_ratio']}  errors: {summary['errors']}")
+        if not summary["sweep_pending"]:
+            self.stderr.write("The sweep finished before probing ended; raise --llm-tasks for a heavier load.")
+        for sample in report.error_samples:
+            self.stderr.write(f"  error: {sample}")
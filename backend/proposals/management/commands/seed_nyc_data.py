@@ -5,6 +5,7 @@ from decimal import Decimal
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 
+from analytics.rankings import refresh_rankings
 from proposals.models import (
     Borough,
     DemographicProfile,
@@ -121,6 +122,7 @@ class Command(BaseCommand):
         self._seed_market_data()
         self._seed_demographics()
         self._create_demo_user()
+        self.stdout.write(f"  Ranked neighborhoods: {refresh_rankings()}")
 
         self.stdout.write(self.style.SUCCESS("NYC data seeded successfully."))
 
@@ -0,0 +1,117 @@
+"""
+Stored period-over-period and year-over-year market changes.
+
+vw_MarketTrends used to derive price and rent changes with LAG windows over
+all of proposals_marketdata, which the database often evaluated for every
+neighborhood before applying a neighborhood filter. The changes are now
+computed here whenever a neighborhood's market rows are written (model
+signals for single saves, the rents ingest source for bulk loads) and stored
+on MarketData, so a trend lookup is an index seek on (neighborhood, period).
+"""
+
+from __future__ import annotations
+
+import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+
+from .models import MarketData
+
+CHANGE_FIELDS = (
+    "price_change_pct",
+    "rent_change_pct",
+    "price_change_yoy_pct",
+    "rent_change_yoy_pct",
+)
+# Largest magnitude DECIMAL(7,2) holds; bigger changes are stored as NULL.
+MAX_CHANGE_PCT = Decimal("99999.99")
+
+_CENT = Decimal("0.01")
+
+Row = Tuple[int, datetime.date, Decimal, Decimal]
+
+
+def pct_change(current: Optional[Decimal], previous: Optional[Decimal]) -> Optional[Decimal]:
+    """(current - previous) / previous in percent, rounded to the cent."""
+    if current is None or not previous:
+        return None
+    change = ((Decimal(current) - Decimal(previous)) / Decimal(previous) * 100).quantize(
+        _CENT, rounding=ROUND_HALF_UP
+    )
+    return change if abs(change) <= MAX_CHANGE_PCT else None
+
+
+def _year_earlier(period: datetime.date) -> datetime.date:
+    try:
+        return period.replace(year=period.year - 1)
+    except ValueError:  # 29 February
+        return period.replace(year=period.year - 1, day=28)
+
+
+def compute_changes(rows: Sequence[Row]) -> List[Tuple[int, Tuple[Optional[Decimal], ...]]]:
+    """
+    ``rows`` are one neighborhood's (id, period, sale price, rent) ordered by
+    period; returns (id, CHANGE_FIELDS values) for each row.
+    """
+
+    by_period = {period: (price, rent) for _id, period, price, rent in rows}
+    changes = []
+    previous = None
+    for pk, period, price, rent in rows:
+        prev_price, prev_rent = previous or (None, None)
+        year_price, year_rent = by_period.get(_year_earlier(period), (None, None))
+        changes.append((
+            pk,
+            (
+                pct_change(price, prev_price),
+                pct_change(rent, prev_rent),
+                pct_change(price, year_price),
+                pct_change(rent, year_rent),
+            ),
+        ))
+        previous = (price, rent)
+    return changes
+
+
+def recompute_market_changes(
+    neighborhood_ids: Optional[Iterable[int]] = None,
+    *,
+    model=MarketData,
+    batch_size: int = 500,
+) -> int:
+    """
+    Refresh the stored changes for ``neighborhood_ids`` (all neighborhoods
+    when None); returns the number of rows rewritten. ``model`` lets data
+    migrations pass their historical MarketData.
+    """
+
+    if neighborhood_ids is None:
+        hood_ids = sorted(set(model.objects.values_list("neighborhood_id", flat=True)))
+    else:
+        hood_ids = sorted(set(neighborhood_ids))
+
+    written = 0
+    for start in range(0, len(hood_ids), batch_size):
+        rows = (
+            model.objects.filter(neighborhood_id__in=hood_ids[start : start + batch_size])
+            .order_by("neighborhood_id", "period")
+            .values_list(
+                "neighborhood_id", "id", "period", "median_sale_price", "median_rent",
+                *CHANGE_FIELDS,
+            )
+        )
+        stale = []
+        for _hood, group in groupby(rows, key=lambda r: r[0]):
+            group = list(group)
+            stored = {r[1]: r[5:] for r in group}
+            for pk, values in compute_changes([r[1:5] for r in group]):
+                if values != stored[pk]:
+                    stale.append(model(pk=pk, **dict(zip(CHANGE_FIELDS, values))))
+        if stale:
+            with transaction.atomic():
+                model.objects.bulk_update(stale, CHANGE_FIELDS, batch_size=1000)
+            written += len(stale)
+    return written
@@ -0,0 +1,77 @@
+# Generated by Django 5.1.15 on 2026-10-19 12:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GreenTapeText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('body', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GreenTapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_size_sqft', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('user_goal', models.TextField()),
+                ('additional_notes', models.TextField(blank=True)),
+                ('max_iterations', models.IntegerField(default=1)),
+                ('site_context', models.JSONField(blank=True, default=dict)),
+                ('critic_feedback', models.JSONField(blank=True, default=dict)),
+                ('critic_raw', models.JSONField(blank=True, default=dict)),
+                ('overall_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('duration_ms', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('neighborhood', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='green_tape_runs', to='proposals.neighborhood')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='green_tape_runs', to=settings.AUTH_USER_MODEL)),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='proposals.greentapetext')),
+                ('final_draft', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='proposals.greentapetext')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GreenTapeStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.IntegerField()),
+                ('kind', models.CharField(choices=[('draft', 'Draft'), ('critic', 'Critic'), ('optimizer', 'Optimizer')], max_length=20)),
+                ('iteration', models.IntegerField(default=0)),
+                ('duration_ms', models.IntegerField(default=0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='steps', to='proposals.greentaperun')),
+                ('output', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='proposals.greentapetext')),
+                ('prompt', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='proposals.greentapetext')),
+            ],
+            options={
+                'ordering': ['run', 'sequence'],
+                'unique_together': {('run', 'sequence')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='greentaperun',
+            index=models.Index(fields=['user', '-created_at'], name='gtrun_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greentaperun',
+            index=models.Index(fields=['neighborhood', '-created_at'], name='gtrun_hood_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greentaperun',
+            index=models.Index(fields=['-created_at'], name='gtrun_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0002_green_tape_run_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greentaperun',
+            name='stop_reason',
+            field=models.CharField(blank=True, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='greentapestep',
+            name='score',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+    ]
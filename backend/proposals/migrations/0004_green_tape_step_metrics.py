@@ -0,0 +1,52 @@
+# Generated by Django 5.1.15 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0003_green_tape_adaptive_loop'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greentapestep',
+            name='completion_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='greentapestep',
+            name='cost_usd',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='greentapestep',
+            name='latency_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='greentapestep',
+            name='model',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='greentapestep',
+            name='prompt_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='greentapestep',
+            name='retries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='greentapestep',
+            name='ttfb_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='greentapestep',
+            index=models.Index(fields=['kind', 'model'], name='gtstep_kind_model_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-19 12:53
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def drop_duplicate_districts(apps, schema_editor):
+    """Keep the newest row of each (neighborhood, code) so the constraint can be added."""
+    ZoningDistrict = apps.get_model("proposals", "ZoningDistrict")
+    duplicates = (
+        ZoningDistrict.objects.order_by()
+        .values("neighborhood_id", "code")
+        .annotate(rows=Count("id"), keep=Max("id"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        ZoningDistrict.objects.filter(
+            neighborhood_id=group["neighborhood_id"], code=group["code"]
+        ).exclude(id=group["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0004_green_tape_step_metrics'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_districts, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='zoningdistrict',
+            unique_together={('neighborhood', 'code')},
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.15 on 2026-10-19 12:57
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+from proposals.migrations._sqlite_views import preserve_sqlite_views
+
+# Frozen copies of the models' CONTENT_FIELDS at the time of this migration.
+HASHED_FIELDS = {
+    "MarketData": (
+        "neighborhood", "period", "median_sale_price", "median_rent",
+        "vacancy_rate_pct", "permits_issued",
+    ),
+    "DemographicProfile": (
+        "neighborhood", "year", "population", "median_income",
+        "population_growth_pct", "transit_score",
+    ),
+}
+
+
+def content_hash(instance, fields) -> str:
+    """Frozen copy of proposals.models.content_hash as of this migration."""
+    parts = []
+    for name in fields:
+        field = instance._meta.get_field(name)
+        value = getattr(instance, field.attname)
+        if isinstance(field, models.DecimalField) and value is not None:
+            value = format(Decimal(value), f".{field.decimal_places}f")
+        parts.append(str(value))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def backfill_content_hashes(apps, schema_editor):
+    for model_name, fields in HASHED_FIELDS.items():
+        model = apps.get_model("proposals", model_name)
+        batch = []
+        for row in model.objects.all().iterator(chunk_size=2000):
+            row.content_hash = content_hash(row, fields)
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ["content_hash"])
+                batch = []
+        model.objects.bulk_update(batch, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0005_zoning_district_unique_code'),
+    ]
+
+    operations = [
+        *preserve_sqlite_views(
+            migrations.AddField(
+                model_name='demographicprofile',
+                name='content_hash',
+                field=models.CharField(blank=True, default='', editable=False, max_length=64),
+            ),
+            migrations.AddField(
+                model_name='marketdata',
+                name='content_hash',
+                field=models.CharField(blank=True, default='', editable=False, max_length=64),
+            ),
+        ),
+        migrations.CreateModel(
+            name='IngestionWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=30)),
+                ('path', models.CharField(max_length=500)),
+                ('file_sha256', models.CharField(max_length=64)),
+                ('file_size', models.BigIntegerField()),
+                ('high_water', models.CharField(blank=True, max_length=20)),
+                ('rows_read', models.IntegerField(default=0)),
+                ('rows_written', models.IntegerField(default=0)),
+                ('ingested_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['source', 'path'],
+                'unique_together': {('source', 'path')},
+            },
+        ),
+        migrations.RunPython(backfill_content_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.1.15 on 2026-10-19 13:39
+
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby
+
+from django.db import migrations, models
+
+from proposals.migrations._sqlite_views import preserve_sqlite_views
+
+# Frozen copies of proposals.market_changes as of this migration.
+CHANGE_FIELDS = (
+    "price_change_pct",
+    "rent_change_pct",
+    "price_change_yoy_pct",
+    "rent_change_yoy_pct",
+)
+MAX_CHANGE_PCT = Decimal("99999.99")
+
+
+def pct_change(current, previous):
+    if current is None or not previous:
+        return None
+    change = ((Decimal(current) - Decimal(previous)) / Decimal(previous) * 100).quantize(
+        Decimal("0.01"), rounding=ROUND_HALF_UP
+    )
+    return change if abs(change) <= MAX_CHANGE_PCT else None
+
+
+def year_earlier(period):
+    try:
+        return period.replace(year=period.year - 1)
+    except ValueError:  # 29 February
+        return period.replace(year=period.year - 1, day=28)
+
+
+def backfill_market_changes(apps, schema_editor):
+    MarketData = apps.get_model("proposals", "MarketData")
+    rows = MarketData.objects.order_by("neighborhood_id", "period").values_list(
+        "neighborhood_id", "id", "period", "median_sale_price", "median_rent"
+    )
+    batch = []
+    for _hood, group in groupby(rows.iterator(chunk_size=2000), key=lambda r: r[0]):
+        group = list(group)
+        by_period = {period: (price, rent) for _h, _pk, period, price, rent in group}
+        previous = (None, None)
+        for _h, pk, period, price, rent in group:
+            year_price, year_rent = by_period.get(year_earlier(period), (None, None))
+            values = (
+                pct_change(price, previous[0]),
+                pct_change(rent, previous[1]),
+                pct_change(price, year_price),
+                pct_change(rent, year_rent),
+            )
+            batch.append(MarketData(pk=pk, **dict(zip(CHANGE_FIELDS, values))))
+            previous = (price, rent)
+        if len(batch) >= 2000:
+            MarketData.objects.bulk_update(batch, CHANGE_FIELDS)
+            batch = []
+    MarketData.objects.bulk_update(batch, CHANGE_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0006_ingestion_change_detection'),
+    ]
+
+    operations = [
+        *preserve_sqlite_views(
+            migrations.AddField(
+                model_name='marketdata',
+                name='price_change_pct',
+                field=models.DecimalField(decimal_places=2, editable=False, max_digits=7, null=True),
+            ),
+            migrations.AddField(
+                model_name='marketdata',
+                name='price_change_yoy_pct',
+                field=models.DecimalField(decimal_places=2, editable=False, max_digits=7, null=True),
+            ),
+            migrations.AddField(
+                model_name='marketdata',
+                name='rent_change_pct',
+                field=models.DecimalField(decimal_places=2, editable=False, max_digits=7, null=True),
+            ),
+            migrations.AddField(
+                model_name='marketdata',
+                name='rent_change_yoy_pct',
+                field=models.DecimalField(decimal_places=2, editable=False, max_digits=7, null=True),
+            ),
+        ),
+        migrations.RunPython(backfill_market_changes, migrations.RunPython.noop),
+    ]
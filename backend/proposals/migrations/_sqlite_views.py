@@ -0,0 +1,40 @@
+"""
+Helpers for migrations that remake tables the SQLite analytics views read.
+
+SQLite rebuilds a table to add or alter most columns, and the rename at the
+end of that rebuild fails while a view references the table. Wrap such
+operations in ``preserve_sqlite_views()``: views are dropped first and
+recreated afterwards from their own stored definitions, so the migration
+does not depend on the current view SQL.
+"""
+
+from django.db import migrations
+
+_stashed = {}
+
+
+def _drop_views(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'view'")
+        views = cursor.fetchall()
+        for name, _sql in views:
+            cursor.execute(f'DROP VIEW IF EXISTS "{name}"')
+    _stashed[connection.alias] = views
+
+
+def _restore_views(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for _name, sql in _stashed.pop(connection.alias, []):
+            cursor.execute(sql)
+
+
+def preserve_sqlite_views(*operations):
+    return [
+        migrations.RunPython(_drop_views, _restore_views),
+        *operations,
+        migrations.RunPython(_restore_views, _drop_views),
+    ]
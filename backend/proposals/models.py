@@ -1,5 +1,8 @@
+import hashlib
+from decimal import Decimal
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 
 class Borough(models.Model):
@@ -51,12 +54,57 @@ class ZoningDistrict(models.Model):
 
     class Meta:
         ordering = ["code"]
+        unique_together = ["neighborhood", "code"]
 
     def __str__(self):
         return f"{self.code} ({self.neighborhood})"
 
 
-class MarketData(models.Model):
+def content_hash(instance, fields) -> str:
+    """SHA-256 of ``fields`` on ``instance``."""
+    parts = []
+    for name in fields:
+        field = instance._meta.get_field(name)
+        value = getattr(instance, field.attname)
+        if isinstance(field, models.DecimalField) and value is not None:
+            # Same digest for Decimal("2100") and the stored 2100.00.
+            value = format(Decimal(value), f".{field.decimal_places}f")
+        parts.append(str(value))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ContentHashed(models.Model):
+    """
+    Stores a digest of the row's data columns.
+
+    Bulk ingestion compares incoming digests with stored ones so unchanged
+    rows are not rewritten (and do not invalidate anything downstream).
+    """
+
+    CONTENT_FIELDS: tuple = ()
+
+    content_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
+
+    class Meta:
+        abstract = True
+
+    def compute_content_hash(self) -> str:
+        return content_hash(self, self.CONTENT_FIELDS)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.compute_content_hash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content_hash" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "content_hash"]
+        super().save(*args, **kwargs)
+
+
+class MarketData(ContentHashed):
+    CONTENT_FIELDS = (
+        "neighborhood", "period", "median_sale_price", "median_rent",
+        "vacancy_rate_pct", "permits_issued",
+    )
+
     neighborhood = models.ForeignKey(
         Neighborhood, on_delete=models.CASCADE, related_name="market_data"
     )
@@ -65,6 +113,13 @@ class MarketData(models.Model):
     median_rent = models.DecimalField(max_digits=10, decimal_places=2)
     vacancy_rate_pct = models.DecimalField(max_digits=5, decimal_places=2)
     permits_issued = models.IntegerField()
+    # Percent changes versus the neighborhood's previous period and the same
+    # period a year earlier, maintained by proposals.market_changes so trend
+    # reads need no LAG window.
+    price_change_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True, editable=False)
+    rent_change_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True, editable=False)
+    price_change_yoy_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True, editable=False)
+    rent_change_yoy_pct = models.DecimalField(max_digits=7, decimal_places=2, null=True, editable=False)
 
     class Meta:
         ordering = ["-period"]
@@ -74,7 +129,12 @@ class MarketData(models.Model):
         return f"{self.neighborhood} - {self.period}"
 
 
-class DemographicProfile(models.Model):
+class DemographicProfile(ContentHashed):
+    CONTENT_FIELDS = (
+        "neighborhood", "year", "population", "median_income",
+        "population_growth_pct", "transit_score",
+    )
+
     neighborhood = models.ForeignKey(
         Neighborhood, on_delete=models.CASCADE, related_name="demographics"
     )
@@ -94,6 +154,31 @@ class DemographicProfile(models.Model):
         return f"{self.neighborhood} ({self.year})"
 
 
+class IngestionWatermark(models.Model):
+    """
+    The last successful ingest of an extract, per source and file.
+
+    A file whose digest matches its watermark is skipped outright;
+    ``high_water`` records the latest period (or year) the file contained.
+    """
+
+    source = models.CharField(max_length=30)
+    path = models.CharField(max_length=500)
+    file_sha256 = models.CharField(max_length=64)
+    file_size = models.BigIntegerField()
+    high_water = models.CharField(max_length=20, blank=True)
+    rows_read = models.IntegerField(default=0)
+    rows_written = models.IntegerField(default=0)
+    ingested_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["source", "path"]
+        unique_together = ["source", "path"]
+
+    def __str__(self):
+        return f"{self.source}: {self.path}"
+
+
 class Proposal(models.Model):
     class Status(models.TextChoices):
         DRAFT = "draft", "Draft"
@@ -128,12 +213,59 @@ class Proposal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Inputs to the feasibility score; saves that leave them unchanged skip
+    # the recalculation.
+    SCORED_FIELDS = ("neighborhood_id", "lot_size_sqft", "total_units")
+
     class Meta:
         ordering = ["-updated_at"]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_scored = instance._scored_values()
+        return instance
+
+    def _scored_values(self) -> dict:
+        # Read __dict__ so deferred fields are not fetched.
+        return {
+            name: self._meta.get_field(name).to_python(self.__dict__[name])
+            for name in self.SCORED_FIELDS
+            if name in self.__dict__
+        }
+
+    def changed_scored_fields(self) -> set:
+        """
+        SCORED_FIELDS whose value differs from the loaded row. Instances not
+        loaded from the database report every field as changed.
+        """
+        loaded = getattr(self, "_loaded_scored", None)
+        if loaded is None:
+            return set(self.SCORED_FIELDS)
+        current = self._scored_values()
+        return {name for name, value in current.items() if loaded.get(name, models.DEFERRED) != value}
+
+    def _mark_scored_clean(self, fields=None):
+        clean = self._scored_values()
+        if fields is not None:
+            names = {self._meta.get_field(name).attname for name in fields}
+            clean = {name: value for name, value in clean.items() if name in names}
+        self._loaded_scored = {**getattr(self, "_loaded_scored", {}), **clean}
+
+    def save(self, *args, **kwargs):
+        # The dashboard signals lock the row before the write and apply the
+        # delta after it; both must happen in one transaction.
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+        self._mark_scored_clean(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._mark_scored_clean(fields)
+
 
 class ProposalUnitMix(models.Model):
     class UnitType(models.TextChoices):
@@ -157,6 +289,11 @@ class ProposalUnitMix(models.Model):
     def __str__(self):
         return f"{self.proposal.title} - {self.get_unit_type_display()} x{self.count}"
 
+    def save(self, *args, **kwargs):
+        # As Proposal.save: the cube signals lock the row before the write.
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+
 
 class FinancialProjection(models.Model):
     proposal = models.ForeignKey(
@@ -191,3 +328,102 @@ class ProposalStatusHistory(models.Model):
 
     def __str__(self):
         return f"{self.proposal.title}: {self.old_status} -> {self.new_status}"
+
+
+class GreenTapeText(models.Model):
+    """
+    Content-addressed storage for Green-Tape prompts and drafts.
+
+    Prompts are largely boilerplate and drafts are frequently carried forward
+    unchanged between steps, so every text is stored once and referenced by
+    its SHA-256 digest.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256[:12]
+
+
+class GreenTapeRun(models.Model):
+    """A persisted execution of the Green-Tape draft/critic/optimizer pipeline."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="green_tape_runs"
+    )
+    neighborhood = models.ForeignKey(
+        Neighborhood, on_delete=models.CASCADE, related_name="green_tape_runs"
+    )
+    lot_size_sqft = models.DecimalField(max_digits=12, decimal_places=2)
+    user_goal = models.TextField()
+    additional_notes = models.TextField(blank=True)
+    max_iterations = models.IntegerField(default=1)
+    site_context = models.JSONField(default=dict, blank=True)
+    draft = models.ForeignKey(
+        GreenTapeText, on_delete=models.PROTECT, related_name="+"
+    )
+    final_draft = models.ForeignKey(
+        GreenTapeText, on_delete=models.PROTECT, related_name="+"
+    )
+    critic_feedback = models.JSONField(default=dict, blank=True)
+    critic_raw = models.JSONField(default=dict, blank=True)
+    overall_score = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True
+    )
+    stop_reason = models.CharField(max_length=30, blank=True)
+    duration_ms = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="gtrun_user_created_idx"),
+            models.Index(
+                fields=["neighborhood", "-created_at"], name="gtrun_hood_created_idx"
+            ),
+            models.Index(fields=["-created_at"], name="gtrun_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Green-Tape run #{self.pk} ({self.neighborhood})"
+
+
+class GreenTapeStep(models.Model):
+    class Kind(models.TextChoices):
+        DRAFT = "draft", "Draft"
+        CRITIC = "critic", "Critic"
+        OPTIMIZER = "optimizer", "Optimizer"
+
+    run = models.ForeignKey(GreenTapeRun, on_delete=models.CASCADE, related_name="steps")
+    sequence = models.IntegerField()
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    iteration = models.IntegerField(default=0)
+    prompt = models.ForeignKey(
+        GreenTapeText, on_delete=models.PROTECT, related_name="+"
+    )
+    output = models.ForeignKey(
+        GreenTapeText, on_delete=models.PROTECT, related_name="+"
+    )
+    score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    duration_ms = models.IntegerField(default=0)
+    # LLM call instrumentation; left at defaults for steps that fell back
+    # because no provider was reachable.
+    model = models.CharField(max_length=100, blank=True)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    ttfb_ms = models.IntegerField(null=True, blank=True)
+    latency_ms = models.IntegerField(null=True, blank=True)
+    retries = models.IntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
+
+    class Meta:
+        ordering = ["run", "sequence"]
+        unique_together = ["run", "sequence"]
+        indexes = [
+            models.Index(fields=["kind", "model"], name="gtstep_kind_model_idx"),
+        ]
+
+    def __str__(self):
+        return f"Run #{self.run_id} step {self.sequence} ({self.kind})"
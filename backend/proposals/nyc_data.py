@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import logging
+from collections import defaultdict
 from dataclasses import asdict, dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
+from django.conf import settings
 from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
 
+from .caching import local_cache
 from .models import DemographicProfile, MarketData, Neighborhood, ZoningDistrict
+from .queueing import broker_down, enqueue
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -47,12 +55,27 @@ class NeighborhoodSiteContext:
     demographics: DemographicSnapshot
 
 
-def _build_zoning_snapshot(neighborhood: Neighborhood) -> ZoningSnapshot:
-    zones = list(
-        ZoningDistrict.objects.filter(neighborhood=neighborhood).values(
-            "code", "category", "max_far", "max_height_ft"
-        )
-    )
+# Seconds a scheduled rebuild waits so a burst of row changes collapses into one.
+SITE_CONTEXT_REBUILD_DELAY_S = 2
+
+# Two-tier cache namespaces (see caching.py). Site contexts are invalidated
+# per neighborhood; reference data is small and retired as a whole.
+site_context_cache = local_cache.namespace("site_ctx")
+reference_cache = local_cache.namespace("reference", versioned=True)
+ZONING_PROFILES_KEY = "ref:zoning_profiles"
+
+_ZONING_FIELDS = ("code", "category", "max_far", "max_height_ft")
+
+
+def _site_context_key(neighborhood_id: int) -> str:
+    return f"nyc_site_ctx:{neighborhood_id}"
+
+
+def _rebuild_pending_key(neighborhood_id: int) -> str:
+    return f"nyc_site_ctx:rebuild:{neighborhood_id}"
+
+
+def _zoning_snapshot(zones: List[Dict[str, Any]]) -> ZoningSnapshot:
     codes = [z["code"] for z in zones]
     has_residential = any(z["category"] == "residential" for z in zones)
     has_commercial = any(z["category"] == "commercial" for z in zones)
@@ -71,10 +94,7 @@ def _build_zoning_snapshot(neighborhood: Neighborhood) -> ZoningSnapshot:
     )
 
 
-def _build_market_snapshot(neighborhood: Neighborhood) -> MarketSnapshot:
-    latest: Optional[MarketData] = (
-        MarketData.objects.filter(neighborhood=neighborhood).order_by("-period").first()
-    )
+def _market_snapshot(latest: Optional[MarketData]) -> MarketSnapshot:
     if not latest:
         return MarketSnapshot(
             period=None,
@@ -93,12 +113,7 @@ def _build_market_snapshot(neighborhood: Neighborhood) -> MarketSnapshot:
     )
 
 
-def _build_demographic_snapshot(neighborhood: Neighborhood) -> DemographicSnapshot:
-    latest: Optional[DemographicProfile] = (
-        DemographicProfile.objects.filter(neighborhood=neighborhood)
-        .order_by("-year")
-        .first()
-    )
+def _demographic_snapshot(latest: Optional[DemographicProfile]) -> DemographicSnapshot:
     if not latest:
         return DemographicSnapshot(
             year=None,
@@ -117,24 +132,32 @@ def _build_demographic_snapshot(neighborhood: Neighborhood) -> DemographicSnapsh
     )
 
 
-def get_neighborhood_site_context(neighborhood: Neighborhood) -> Dict[str, Any]:
-    """
-    Aggregate NYC open-data-style signals for a neighborhood.
+def _build_zoning_snapshot(neighborhood: Neighborhood) -> ZoningSnapshot:
+    return _zoning_snapshot(
+        list(ZoningDistrict.objects.filter(neighborhood=neighborhood).values(*_ZONING_FIELDS))
+    )
 
-    For the MVP this is built from our local seed data (zoning, market,
-    demographics) and cached, but the function is intentionally shaped so we
-    can later swap in real NYC Open Data ingestion without changing callers.
-    """
 
-    cache_key = f"nyc_site_ctx:{neighborhood.id}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+def _build_market_snapshot(neighborhood: Neighborhood) -> MarketSnapshot:
+    return _market_snapshot(
+        MarketData.objects.filter(neighborhood=neighborhood).order_by("-period").first()
+    )
+
+
+def _build_demographic_snapshot(neighborhood: Neighborhood) -> DemographicSnapshot:
+    return _demographic_snapshot(
+        DemographicProfile.objects.filter(neighborhood=neighborhood)
+        .order_by("-year")
+        .first()
+    )
 
-    zoning = _build_zoning_snapshot(neighborhood)
-    market = _build_market_snapshot(neighborhood)
-    demo = _build_demographic_snapshot(neighborhood)
 
+def _site_context_payload(
+    neighborhood: Neighborhood,
+    zoning: ZoningSnapshot,
+    market: MarketSnapshot,
+    demo: DemographicSnapshot,
+) -> Dict[str, Any]:
     ctx = NeighborhoodSiteContext(
         neighborhood_id=neighborhood.id,
         neighborhood_name=neighborhood.name,
@@ -145,7 +168,7 @@ def get_neighborhood_site_context(neighborhood: Neighborhood) -> Dict[str, Any]:
         demographics=demo,
     )
 
-    payload: Dict[str, Any] = {
+    return {
         "neighborhood_id": ctx.neighborhood_id,
         "neighborhood_name": ctx.neighborhood_name,
         "borough_name": ctx.borough_name,
@@ -155,7 +178,200 @@ def get_neighborhood_site_context(neighborhood: Neighborhood) -> Dict[str, Any]:
         "demographics": asdict(ctx.demographics),
     }
 
-    # Cache for 10 minutes – this data is slow-changing.
-    cache.set(cache_key, payload, timeout=60 * 10)
+
+def get_neighborhood_site_context(neighborhood: Neighborhood) -> Dict[str, Any]:
+    """
+    Aggregate NYC open-data-style signals for a neighborhood.
+
+    For the MVP this is built from our local seed data (zoning, market,
+    demographics) and cached, but the function is intentionally shaped so we
+    can later swap in real NYC Open Data ingestion without changing callers.
+    """
+
+    cache_key = _site_context_key(neighborhood.id)
+    cached = site_context_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    payload = _site_context_payload(
+        neighborhood,
+        _build_zoning_snapshot(neighborhood),
+        _build_market_snapshot(neighborhood),
+        _build_demographic_snapshot(neighborhood),
+    )
+
+    # Long-lived: entries are invalidated and rebuilt whenever the source rows
+    # change (see schedule_site_context_rebuild), so the TTL is only a backstop.
+    site_context_cache.set(cache_key, payload, timeout=settings.SITE_CONTEXT_CACHE_TIMEOUT)
     return payload
 
+
+def build_site_contexts(neighborhood_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Build site contexts for many neighborhoods straight from the database.
+
+    Uses four set-based queries regardless of how many neighborhoods are
+    requested: neighborhoods with boroughs, zoning districts, and the latest
+    market and demographic rows (picked per neighborhood with a correlated
+    subquery). Unknown IDs are skipped. Nothing is read from or written to
+    the cache.
+    """
+
+    ids = set(neighborhood_ids)
+    if not ids:
+        return {}
+
+    neighborhoods = Neighborhood.objects.select_related("borough").filter(id__in=ids)
+
+    zones_by_hood: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for zone in (
+        ZoningDistrict.objects.filter(neighborhood_id__in=ids)
+        .order_by("neighborhood_id", "code")
+        .values("neighborhood_id", *_ZONING_FIELDS)
+    ):
+        zones_by_hood[zone["neighborhood_id"]].append(zone)
+
+    latest_period = (
+        MarketData.objects.filter(neighborhood=OuterRef("neighborhood"))
+        .order_by("-period")
+        .values("period")[:1]
+    )
+    market_by_hood = {
+        row.neighborhood_id: row
+        for row in MarketData.objects.filter(
+            neighborhood_id__in=ids, period=Subquery(latest_period)
+        )
+    }
+
+    latest_year = (
+        DemographicProfile.objects.filter(neighborhood=OuterRef("neighborhood"))
+        .order_by("-year")
+        .values("year")[:1]
+    )
+    demo_by_hood = {
+        row.neighborhood_id: row
+        for row in DemographicProfile.objects.filter(
+            neighborhood_id__in=ids, year=Subquery(latest_year)
+        )
+    }
+
+    return {
+        n.id: _site_context_payload(
+            n,
+            _zoning_snapshot(zones_by_hood.get(n.id, [])),
+            _market_snapshot(market_by_hood.get(n.id)),
+            _demographic_snapshot(demo_by_hood.get(n.id)),
+        )
+        for n in neighborhoods
+    }
+
+
+def get_site_contexts(neighborhood_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Bulk variant of get_neighborhood_site_context, keyed by neighborhood ID.
+
+    Cached entries are fetched with one get_many; all misses are built
+    together by build_site_contexts and written back with one set_many, so
+    sweeps over hundreds of neighborhoods cost a handful of queries instead
+    of three per neighborhood.
+    """
+
+    keys = {_site_context_key(nid): nid for nid in set(neighborhood_ids)}
+    if not keys:
+        return {}
+
+    contexts = {
+        keys[key]: value
+        for key, value in site_context_cache.get_many(keys).items()
+    }
+    missing = [nid for nid in keys.values() if nid not in contexts]
+    if missing:
+        built = build_site_contexts(missing)
+        site_context_cache.set_many(
+            {_site_context_key(nid): payload for nid, payload in built.items()},
+            timeout=settings.SITE_CONTEXT_CACHE_TIMEOUT,
+        )
+        contexts.update(built)
+    return contexts
+
+
+def schedule_site_context_rebuild(neighborhood_ids: Iterable[int]) -> None:
+    """
+    Drop cached site contexts and queue a background rebuild.
+
+    Called after zoning, market or demographic rows commit. The stale entry
+    is deleted right away so readers never see it; the rebuild is debounced
+    per neighborhood so a bulk load queues one task per neighborhood rather
+    than one per row. If the broker is unreachable the entry simply stays
+    empty and the next reader rebuilds it.
+    """
+
+    ids = sorted(set(neighborhood_ids))
+    if not ids:
+        return
+    site_context_cache.delete_many([_site_context_key(nid) for nid in ids])
+    if broker_down():
+        return
+
+    to_queue = [
+        nid
+        for nid in ids
+        if cache.add(_rebuild_pending_key(nid), True, timeout=SITE_CONTEXT_REBUILD_DELAY_S * 30)
+    ]
+    if not to_queue:
+        return
+
+    from .tasks import rebuild_site_contexts
+
+    queued = enqueue(rebuild_site_contexts, args=[to_queue], countdown=SITE_CONTEXT_REBUILD_DELAY_S)
+    if queued is None:
+        cache.delete_many([_rebuild_pending_key(nid) for nid in to_queue])
+
+
+def refresh_site_contexts(neighborhood_ids: Iterable[int]) -> int:
+    """
+    Rebuild and cache site contexts from the database; returns the count.
+
+    The pending markers are cleared before reading so that a change that
+    commits while the rebuild runs schedules another one.
+    """
+
+    ids = set(neighborhood_ids)
+    cache.delete_many([_rebuild_pending_key(nid) for nid in ids])
+    built = build_site_contexts(ids)
+    site_context_cache.set_many(
+        {_site_context_key(nid): payload for nid, payload in built.items()},
+        timeout=settings.SITE_CONTEXT_CACHE_TIMEOUT,
+    )
+    return len(built)
+
+
+def get_zoning_profiles() -> Dict[int, Dict[str, List[str]]]:
+    """
+    Zoning categories and district codes per neighborhood ID.
+
+    Served from the two-tier cache; ZoningDistrict changes retire it via
+    invalidate_reference_data.
+    """
+
+    def build() -> Dict[int, Dict[str, List[str]]]:
+        profiles: Dict[int, Dict[str, List[str]]] = defaultdict(
+            lambda: {"categories": [], "codes": []}
+        )
+        for zone in ZoningDistrict.objects.order_by("neighborhood_id", "code").values(
+            "neighborhood_id", "code", "category"
+        ):
+            profile = profiles[zone["neighborhood_id"]]
+            profile["categories"].append(zone["category"])
+            profile["codes"].append(zone["code"])
+        return dict(profiles)
+
+    return reference_cache.get_or_set(
+        ZONING_PROFILES_KEY,
+        build,
+        timeout=settings.SITE_CONTEXT_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_reference_data() -> None:
+    reference_cache.invalidate()
@@ -0,0 +1,389 @@
+"""
+In-process financial projections.
+
+A NumPy port of sp_GenerateFinancialProjections. Years are a column axis
+rather than a recursive CTE, so one call projects any number of proposals
+(or assumption scenarios) at once:
+
+    revenue[y]  = annual_revenue * (1 + revenue_growth) ** (y - 1)
+    expenses[y] = annual_revenue * expense_ratio * (1 + expense_inflation) ** (y - 1)
+                  + estimated_cost in year 1
+    net_income  = revenue - expenses
+    cumulative_roi[y] = sum(net_income[1..y]) / estimated_cost * 100
+
+``annual_revenue`` is the unit mix's sum of count * projected_rent * 12.
+With ``sql_rounding`` (the default for stored rows) intermediate values are
+rounded where the procedure's DECIMAL types round them, so stored rows match
+the procedure's to the cent.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+
+from analytics.dashboard import track_proposal_changes
+
+from .models import FinancialProjection, Proposal
+from .scoring import resolve_backend
+
+DEFAULT_YEARS = 10
+MAX_YEARS = 100  # the procedure's MAXRECURSION
+
+ArrayLike = Union[float, np.ndarray]
+
+
+@dataclass(frozen=True)
+class ProjectionAssumptions:
+    """Growth and cost assumptions; defaults are the procedure's constants."""
+
+    revenue_growth: ArrayLike = 0.03
+    expense_inflation: ArrayLike = 0.025
+    expense_ratio: ArrayLike = 0.35
+
+    @classmethod
+    def from_dict(cls, values: Optional[Dict[str, Any]]) -> "ProjectionAssumptions":
+        values = values or {}
+        unknown = set(values) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown projection assumptions: {', '.join(sorted(unknown))}")
+        return cls(**{k: float(v) for k, v in values.items()})
+
+
+@dataclass
+class ProjectionArrays:
+    """Arrays shaped (..., years); ``cumulative_roi`` is NaN where cost is 0."""
+
+    years: np.ndarray
+    revenue: np.ndarray
+    expenses: np.ndarray
+    net_income: np.ndarray
+    cumulative_roi: np.ndarray
+
+
+def projection_backend() -> str:
+    return resolve_backend("FINANCIAL_PROJECTION_BACKEND")
+
+
+def _round_half_up(values: np.ndarray, places: int) -> np.ndarray:
+    # DECIMAL casts round half away from zero. The tiny relative nudge keeps
+    # binary representations such as 2.675 -> 2.67499999... on the right side.
+    scale = 10.0 ** places
+    return np.sign(values) * np.floor(np.abs(values) * scale * (1 + 1e-12) + 0.5) / scale
+
+
+def _column(value: ArrayLike) -> np.ndarray:
+    return np.asarray(value, dtype=np.float64)[..., np.newaxis]
+
+
+def project(
+    annual_revenue: ArrayLike,
+    estimated_cost: ArrayLike,
+    years: int = DEFAULT_YEARS,
+    assumptions: ProjectionAssumptions = ProjectionAssumptions(),
+    *,
+    sql_rounding: bool = True,
+) -> ProjectionArrays:
+    """
+    Project every row of ``annual_revenue`` / ``estimated_cost`` (and of any
+    array-valued assumption; all broadcast together) over ``years`` years.
+    """
+
+    t = np.arange(years, dtype=np.float64)  # y - 1
+    revenue_base, cost, growth, inflation, expense_ratio = (
+        _column(value)
+        for value in np.broadcast_arrays(
+            annual_revenue,
+            estimated_cost,
+            assumptions.revenue_growth,
+            assumptions.expense_inflation,
+            assumptions.expense_ratio,
+        )
+    )
+
+    revenue_factor = (1 + growth) ** t
+    expense_factor = (1 + inflation) ** t
+    if sql_rounding:
+        # POWER() on the DECIMAL(_,4) growth rate returns scale 4.
+        revenue_factor = _round_half_up(revenue_factor, 4)
+        expense_factor = _round_half_up(expense_factor, 4)
+
+    revenue = revenue_base * revenue_factor
+    expenses = revenue_base * expense_ratio * expense_factor + np.where(
+        t == 0, cost, 0.0
+    )
+    if sql_rounding:
+        revenue = _round_half_up(revenue, 2)
+        expenses = _round_half_up(expenses, 2)
+    net_income = revenue - expenses
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cumulative_roi = np.cumsum(net_income, axis=-1) / np.where(cost == 0, np.nan, cost) * 100
+    if sql_rounding:
+        cumulative_roi = _round_half_up(cumulative_roi, 2)
+
+    return ProjectionArrays(
+        years=np.arange(1, years + 1),
+        revenue=revenue,
+        expenses=expenses,
+        net_income=net_income,
+        cumulative_roi=cumulative_roi,
+    )
+
+
+# --- What-if projections --------------------------------------------------------
+
+UnitMix = Tuple[Tuple[str, int, Decimal], ...]
+
+
+@lru_cache(maxsize=4096)
+def unit_mix_revenue(unit_mix: UnitMix) -> Decimal:
+    """
+    Annual gross rent of ``unit_mix`` ((unit_type, count, projected_rent)
+    tuples, sorted), computed as the procedure's SUM does. Slider ticks that
+    only move cost or assumptions reuse the cached value.
+    """
+
+    return sum((count * rent * 12 for _unit_type, count, rent in unit_mix), Decimal("0"))
+
+
+def what_if(
+    unit_mix: Iterable[Dict[str, Any]],
+    estimated_cost: Decimal,
+    years: int = DEFAULT_YEARS,
+    assumptions: ProjectionAssumptions = ProjectionAssumptions(),
+) -> Dict[str, Any]:
+    """
+    Projection rows for an unsaved unit mix and cost, shaped like the stored
+    FinancialProjection rows. Pure computation: nothing is read or written.
+    """
+
+    key = tuple(
+        sorted((unit["unit_type"], unit["count"], unit["projected_rent"]) for unit in unit_mix)
+    )
+    annual_revenue = unit_mix_revenue(key)
+    result = project(float(annual_revenue), float(estimated_cost), years, assumptions)
+    columns = zip(
+        result.years.tolist(),
+        result.revenue.tolist(),
+        result.expenses.tolist(),
+        result.net_income.tolist(),
+        result.cumulative_roi.tolist(),
+    )
+    return {
+        "annual_revenue": f"{annual_revenue:.2f}",
+        "projected_revenue": f"{result.revenue.sum():.2f}",
+        "financial_projections": [
+            {
+                "year": year,
+                "revenue": f"{revenue:.2f}",
+                "expenses": f"{expenses:.2f}",
+                "net_income": f"{net_income:.2f}",
+                "cumulative_roi": f"{roi:.2f}",
+            }
+            for year, revenue, expenses, net_income, roi in columns
+        ],
+    }
+
+
+# --- Stored projections ----------------------------------------------------------
+
+
+def load_projection_inputs(proposal_ids: Iterable[int], chunk_size: int = 2000):
+    """
+    (ids, annual_revenue, estimated_cost) arrays for proposals that can be
+    projected, plus {id: reason} for those the procedure would reject. One
+    query per ``chunk_size`` IDs.
+    """
+
+    wanted = sorted(set(proposal_ids))
+    rows = []
+    for start in range(0, len(wanted), chunk_size):
+        rows.extend(
+            Proposal.objects.filter(id__in=wanted[start : start + chunk_size])
+            .annotate(
+                annual_revenue=Sum(
+                    F("unit_mix__count") * F("unit_mix__projected_rent") * 12,
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                )
+            )
+            .order_by("id")
+            .values_list("id", "estimated_cost", "annual_revenue")
+        )
+    ids, revenue, cost = [], [], []
+    skipped: Dict[int, str] = {}
+    for pid, estimated_cost, annual_revenue in rows:
+        if not estimated_cost:
+            # A zero cost would make cumulative_roi NULL, which the table rejects.
+            skipped[pid] = "missing cost estimate"
+        elif not annual_revenue:
+            skipped[pid] = "no unit mix defined"
+        else:
+            ids.append(pid)
+            revenue.append(float(annual_revenue))
+            cost.append(float(estimated_cost))
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(revenue, dtype=np.float64),
+        np.array(cost, dtype=np.float64),
+        skipped,
+    )
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+def generate_projections(
+    proposal_ids: Iterable[int],
+    years: int = DEFAULT_YEARS,
+    assumptions: ProjectionAssumptions = ProjectionAssumptions(),
+    *,
+    batch_size: int = 2000,
+) -> Dict[str, Any]:
+    """
+    Project ``proposal_ids`` and replace their FinancialProjection rows.
+
+    All proposals are projected in one vectorized pass; old rows are deleted,
+    new ones bulk-created and projected_revenue bulk-updated in a single
+    transaction. Proposals the procedure would reject (no cost estimate, no
+    unit mix) are skipped and returned with the reason.
+    """
+
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}")
+
+    ids, annual_revenue, estimated_cost, skipped = load_projection_inputs(proposal_ids, batch_size)
+    result = project(annual_revenue, estimated_cost, years, assumptions)
+    total_revenue = result.revenue.sum(axis=1).tolist()
+    # Plain lists: element access on ndarrays is far slower in a Python loop.
+    revenue, expenses = result.revenue.tolist(), result.expenses.tolist()
+    net_income, cumulative_roi = result.net_income.tolist(), result.cumulative_roi.tolist()
+
+    rows: List[FinancialProjection] = []
+    proposals: List[Proposal] = []
+    for i, pid in enumerate(ids.tolist()):
+        for y in range(years):
+            rows.append(
+                FinancialProjection(
+                    proposal_id=pid,
+                    year=y + 1,
+                    revenue=_money(revenue[i][y]),
+                    expenses=_money(expenses[i][y]),
+                    net_income=_money(net_income[i][y]),
+                    cumulative_roi=_money(cumulative_roi[i][y]),
+                )
+            )
+        proposals.append(Proposal(id=pid, projected_revenue=_money(total_revenue[i])))
+
+    projected: Sequence[int] = ids.tolist()
+    with transaction.atomic():
+        for start in range(0, len(projected), batch_size):
+            FinancialProjection.objects.filter(
+                proposal_id__in=projected[start : start + batch_size]
+            ).delete()
+        FinancialProjection.objects.bulk_create(rows, batch_size=batch_size)
+        with track_proposal_changes(projected):
+            Proposal.objects.bulk_update(proposals, ["projected_revenue"], batch_size=batch_size)
+
+    return {"proposals": len(projected), "rows": len(rows), "skipped": skipped}
+
+
+# --- Sensitivity analysis --------------------------------------------------------
+
+DEFAULT_SCENARIOS = 10_000
+MAX_SCENARIOS = 50_000
+PERCENTILES = (10, 50, 90)
+
+
+@dataclass(frozen=True)
+class Uncertainty:
+    """A normal distribution clipped to [low, high]."""
+
+    mean: float
+    std: float
+    low: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return np.clip(rng.normal(self.mean, self.std, size), self.low, self.high)
+
+
+@dataclass(frozen=True)
+class SensitivityAssumptions:
+    """
+    Distributions drawn per scenario. Rent growth and expense inflation are
+    centered on the procedure's constants; the procedure itself assumes full
+    occupancy and no overrun.
+    """
+
+    rent_growth: Uncertainty = Uncertainty(0.03, 0.015, -0.05, 0.15)
+    expense_inflation: Uncertainty = Uncertainty(0.025, 0.01, -0.02, 0.12)
+    vacancy: Uncertainty = Uncertainty(0.05, 0.03, 0.0, 0.5)
+    construction_overrun: Uncertainty = Uncertainty(0.08, 0.12, -0.1, 1.0)
+    expense_ratio: float = 0.35
+
+
+def simulate(
+    annual_revenue: float,
+    estimated_cost: float,
+    years: int = DEFAULT_YEARS,
+    scenarios: int = DEFAULT_SCENARIOS,
+    assumptions: SensitivityAssumptions = SensitivityAssumptions(),
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Monte Carlo projection of one proposal.
+
+    Each scenario draws rent growth, expense inflation, a vacancy rate and a
+    construction overrun; all scenarios are projected in one ``project`` call
+    on (scenarios, years) arrays. Vacancy reduces collected rent but not
+    operating expenses, which stay a share of gross rent; an overrun raises
+    the year-1 cost and the ROI denominator. Returns P10/P50/P90 bands of net
+    income and cumulative ROI per year.
+    """
+
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}")
+    if not 1 <= scenarios <= MAX_SCENARIOS:
+        raise ValueError(f"scenarios must be between 1 and {MAX_SCENARIOS}")
+    if not estimated_cost:
+        raise ValueError("estimated_cost is required")
+
+    rng = np.random.default_rng(seed)
+    occupancy = 1 - assumptions.vacancy.sample(rng, scenarios)
+    result = project(
+        annual_revenue * occupancy,
+        estimated_cost * (1 + assumptions.construction_overrun.sample(rng, scenarios)),
+        years,
+        ProjectionAssumptions(
+            revenue_growth=assumptions.rent_growth.sample(rng, scenarios),
+            expense_inflation=assumptions.expense_inflation.sample(rng, scenarios),
+            # Expenses are a share of gross rent; rescale for the vacancy-adjusted base.
+            expense_ratio=assumptions.expense_ratio / occupancy,
+        ),
+        sql_rounding=False,
+    )
+
+    net_income = np.percentile(result.net_income, PERCENTILES, axis=0).round(2).tolist()
+    cumulative_roi = np.percentile(result.cumulative_roi, PERCENTILES, axis=0).round(2).tolist()
+    labels = [f"p{p}" for p in PERCENTILES]
+    return {
+        "scenarios": scenarios,
+        "years": years,
+        "bands": [
+            {
+                "year": year,
+                "net_income": {label: band[y] for label, band in zip(labels, net_income)},
+                "cumulative_roi": {label: band[y] for label, band in zip(labels, cumulative_roi)},
+            }
+            for y, year in enumerate(result.years.tolist())
+        ],
+        "probability_of_payback": round(float((result.cumulative_roi[:, -1] >= 0).mean()), 4),
+    }
@@ -0,0 +1,107 @@
+"""
+Queue-isolation benchmark.
+
+Measures round-trip latency of quick scoring tasks while the workers are
+idle, then again while a sweep of LLM-bound tasks is in flight. With the
+routed queues the two distributions should match; sending the sweep to the
+scoring queue instead reproduces the starvation the routing prevents.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .llm_metrics import percentile
+
+
+@dataclass
+class QueueBenchmarkReport:
+    sweep_size: int
+    idle_ms: List[float] = field(default_factory=list)
+    loaded_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    # Sweep tasks still unfinished when the loaded probe ended; 0 means the
+    # sweep drained too early to load the workers for the whole probe.
+    sweep_pending: int = 0
+    error_samples: List[str] = field(default_factory=list)
+
+    @staticmethod
+    def _stats(values: List[float]) -> Dict[str, Optional[float]]:
+        ordered = sorted(values)
+        return {
+            "samples": len(ordered),
+            "p50_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "max_ms": ordered[-1] if ordered else None,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        idle, loaded = self._stats(self.idle_ms), self._stats(self.loaded_ms)
+        ratio = (
+            round(loaded["p95_ms"] / idle["p95_ms"], 2)
+            if idle["p95_ms"] and loaded["p95_ms"] is not None
+            else None
+        )
+        return {
+            "idle": idle,
+            "under_llm_sweep": loaded,
+            "p95_ratio": ratio,
+            "sweep_size": self.sweep_size,
+            "sweep_pending": self.sweep_pending,
+            "errors": self.errors,
+        }
+
+
+def _probe(
+    submit: Callable[[], Any],
+    samples: int,
+    interval_s: float,
+    timeout_s: float,
+    report: QueueBenchmarkReport,
+) -> List[float]:
+    latencies: List[float] = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        try:
+            submit().get(timeout=timeout_s)
+        except Exception as exc:
+            report.errors += 1
+            if len(report.error_samples) < 5:
+                report.error_samples.append(repr(exc))
+        else:
+            latencies.append(round((time.perf_counter() - started) * 1000, 1))
+        time.sleep(interval_s)
+    return latencies
+
+
+def run_queue_benchmark(
+    *,
+    probe: Callable[[], Any],
+    sweep: Callable[[], Any],
+    samples: int = 30,
+    sweep_size: int = 100,
+    interval_s: float = 0.2,
+    timeout_s: float = 60.0,
+    progress: Optional[Callable[[str], None]] = None,
+) -> QueueBenchmarkReport:
+    """
+    ``probe`` and ``sweep`` each queue one task and return its AsyncResult.
+    Probes run one at a time, ``interval_s`` apart, so each latency is
+    queueing plus execution of a single scoring task.
+    """
+
+    report = QueueBenchmarkReport(sweep_size=sweep_size)
+    if progress:
+        progress("Probing scoring latency on idle workers")
+    report.idle_ms = _probe(probe, samples, interval_s, timeout_s, report)
+
+    if progress:
+        progress(f"Queueing {sweep_size} LLM tasks")
+    pending = [sweep() for _ in range(sweep_size)]
+    if progress:
+        progress("Probing scoring latency during the LLM sweep")
+    report.loaded_ms = _probe(probe, samples, interval_s, timeout_s, report)
+    report.sweep_pending = sum(1 for result in pending if not result.ready())
+    return report
@@ -0,0 +1,57 @@
+"""
+Best-effort task queueing for cache and score maintenance.
+
+Maintenance work (site-context rebuilds, rescoring) is queued from request
+and ingest paths that must not fail or stall when the broker is down.
+Connecting to a missing broker can block for several seconds, so after one
+failure queueing is skipped for BROKER_RETRY_AFTER_S and callers fall back
+to their lazy path.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+BROKER_DOWN_KEY = "tasks:broker_down"
+BROKER_RETRY_AFTER_S = 60
+
+
+def broker_down() -> bool:
+    return bool(cache.get(BROKER_DOWN_KEY))
+
+
+def enqueue(
+    task,
+    *,
+    args: Sequence[Any] = (),
+    kwargs: Optional[Dict[str, Any]] = None,
+    countdown: Optional[float] = None,
+    queue: Optional[str] = None,
+):
+    """
+    Queue ``task``; returns its AsyncResult, or None if it was not queued.
+
+    ``queue`` overrides the task's route for this call, along with the time
+    limits, which follow the queue (TASK_QUEUE_TIME_LIMITS).
+    """
+
+    if broker_down():
+        return None
+    options: Dict[str, Any] = {}
+    if queue is not None:
+        soft_time_limit, time_limit = settings.TASK_QUEUE_TIME_LIMITS[queue]
+        options = {"queue": queue, "soft_time_limit": soft_time_limit, "time_limit": time_limit}
+    try:
+        return task.apply_async(
+            args=list(args), kwargs=kwargs or {}, countdown=countdown, retry=False, **options
+        )
+    except Exception as exc:
+        cache.set(BROKER_DOWN_KEY, True, timeout=BROKER_RETRY_AFTER_S)
+        logger.warning("Could not queue %s: %s", task.name, exc)
+        return None
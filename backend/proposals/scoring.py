@@ -0,0 +1,349 @@
+"""
+In-process feasibility scoring.
+
+A column-wise NumPy port of sp_CalculateFeasibilityScore, so proposals get
+scores on SQLite (where the stored procedure does not exist) and thousands of
+proposals can be scored in one pass from a handful of set-based queries.
+
+The weighting mirrors the procedure exactly:
+
+- market (30): vacancy-rate bands 30 / 25 / 18 / 10
+- demographics (25): growth (capped at 10), income bands 8 / 6 / 3 and
+  transit (up to 7)
+- zoning (25): average-FAR bands 15 / 12 / 8 / 4 plus the residential share
+  of districts (up to 10)
+- density (20): units per 1,000 sq ft of lot, 20 inside 5-20, 14 inside
+  2-30, else 8
+
+As in the procedure, a neighborhood with no market row, no demographic row or
+no zoning districts scores 50, and scores are clamped to 0-100.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count, OuterRef, Q, Subquery
+
+from analytics.dashboard import track_proposal_changes
+
+from .caching import pending_marker_timeout
+from .models import DemographicProfile, MarketData, Proposal, ZoningDistrict
+
+PYTHON = "python"
+STORED_PROCEDURE = "stored_procedure"
+
+NEUTRAL_SCORE = 50.0
+_CENTS = Decimal("0.01")
+
+
+def resolve_backend(setting_name: str) -> str:
+    """
+    The backend named by ``setting_name``, with ``auto`` resolved to the
+    stored procedure on SQL Server and the Python engine everywhere else.
+    """
+
+    backend = getattr(settings, setting_name)
+    if backend == "auto":
+        return STORED_PROCEDURE if connection.vendor == "microsoft" else PYTHON
+    if backend not in (PYTHON, STORED_PROCEDURE):
+        raise ValueError(f"Unknown {setting_name} {backend!r}")
+    return backend
+
+
+def scoring_backend() -> str:
+    return resolve_backend("FEASIBILITY_SCORING_BACKEND")
+
+
+@dataclass
+class ScoringInputs:
+    """One row per proposal; NaN marks data the procedure would see as NULL."""
+
+    proposal_ids: np.ndarray
+    vacancy_rate_pct: np.ndarray
+    population_growth_pct: np.ndarray
+    median_income: np.ndarray
+    transit_score: np.ndarray
+    avg_far: np.ndarray
+    residential_pct: np.ndarray
+    total_units: np.ndarray
+    lot_size_sqft: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.proposal_ids)
+
+
+def load_scoring_inputs(proposal_ids: Iterable[int]) -> ScoringInputs:
+    """
+    Gather scoring inputs for ``proposal_ids`` in four queries, whatever
+    their number. Unknown IDs are skipped.
+    """
+
+    proposals = list(
+        Proposal.objects.filter(id__in=set(proposal_ids))
+        .order_by("id")
+        .values_list("id", "neighborhood_id", "lot_size_sqft", "total_units")
+    )
+    hood_ids = {row[1] for row in proposals}
+
+    latest_period = (
+        MarketData.objects.filter(neighborhood=OuterRef("neighborhood"))
+        .order_by("-period")
+        .values("period")[:1]
+    )
+    vacancy = dict(
+        MarketData.objects.filter(neighborhood_id__in=hood_ids, period=Subquery(latest_period))
+        .values_list("neighborhood_id", "vacancy_rate_pct")
+    )
+
+    latest_year = (
+        DemographicProfile.objects.filter(neighborhood=OuterRef("neighborhood"))
+        .order_by("-year")
+        .values("year")[:1]
+    )
+    demographics = {
+        row[0]: row[1:]
+        for row in DemographicProfile.objects.filter(
+            neighborhood_id__in=hood_ids, year=Subquery(latest_year)
+        ).values_list("neighborhood_id", "population_growth_pct", "median_income", "transit_score")
+    }
+
+    zoning = {
+        row["neighborhood_id"]: (row["avg_far"], row["residential"] / row["districts"] * 100)
+        for row in ZoningDistrict.objects.filter(neighborhood_id__in=hood_ids)
+        .values("neighborhood_id")
+        .annotate(
+            avg_far=Avg("max_far"),
+            districts=Count("id"),
+            residential=Count("id", filter=Q(residential_allowed=True)),
+        )
+        .order_by()
+    }
+
+    missing_demo = (None, None, None)
+    missing_zoning = (None, None)
+
+    def column(values) -> np.ndarray:
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+    hoods = [row[1] for row in proposals]
+    demo = [demographics.get(h, missing_demo) for h in hoods]
+    zones = [zoning.get(h, missing_zoning) for h in hoods]
+    return ScoringInputs(
+        proposal_ids=np.array([row[0] for row in proposals], dtype=np.int64),
+        vacancy_rate_pct=column(vacancy.get(h) for h in hoods),
+        population_growth_pct=column(d[0] for d in demo),
+        median_income=column(d[1] for d in demo),
+        transit_score=column(d[2] for d in demo),
+        avg_far=column(z[0] for z in zones),
+        residential_pct=column(z[1] for z in zones),
+        total_units=column(row[3] for row in proposals),
+        lot_size_sqft=column(row[2] for row in proposals),
+    )
+
+
+def score_inputs(inputs: ScoringInputs) -> np.ndarray:
+    """Vectorized sp_CalculateFeasibilityScore; returns float scores in 0-100."""
+
+    vacancy = inputs.vacancy_rate_pct
+    market = np.select([vacancy < 3, vacancy < 5, vacancy < 8], [30.0, 25.0, 18.0], default=10.0)
+
+    growth = inputs.population_growth_pct
+    income = inputs.median_income
+    demographic = (
+        np.where(growth > 2, 10.0, growth * 5)
+        + np.select([income > 80000, income > 50000], [8.0, 6.0], default=3.0)
+        + inputs.transit_score / 100.0 * 7
+    )
+
+    far = inputs.avg_far
+    zoning = (
+        np.select([far > 5, far > 3, far > 1.5], [15.0, 12.0, 8.0], default=4.0)
+        + inputs.residential_pct / 100.0 * 10
+    )
+
+    lot = inputs.lot_size_sqft
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # NULLIF(lot, 0): a zero lot gives NaN, which falls through to 8.
+        density_ratio = inputs.total_units / np.where(lot == 0, np.nan, lot) * 1000
+    density = np.select(
+        [(density_ratio >= 5) & (density_ratio <= 20), (density_ratio >= 2) & (density_ratio <= 30)],
+        [20.0, 14.0],
+        default=8.0,
+    )
+
+    # A missing market or demographic row makes the procedure's CROSS JOIN
+    # empty, and a neighborhood without districts makes residential_pct NULL;
+    # either way the total is NULL and the procedure falls back to 50.
+    total = market + demographic + zoning + density
+    missing = np.isnan(vacancy) | np.isnan(growth) | np.isnan(inputs.residential_pct)
+    return np.clip(np.where(missing, NEUTRAL_SCORE, total), 0.0, 100.0)
+
+
+def _to_decimal(score: float) -> Decimal:
+    # The procedure assigns the float total to DECIMAL(5,2), which rounds
+    # half away from zero.
+    return Decimal(repr(float(score))).quantize(_CENTS, rounding=ROUND_HALF_UP)
+
+
+def compute_scores(proposal_ids: Iterable[int]) -> Dict[int, Decimal]:
+    """Score ``proposal_ids`` without writing anything."""
+
+    inputs = load_scoring_inputs(proposal_ids)
+    if not len(inputs):
+        return {}
+    scores = score_inputs(inputs)
+    return {int(pid): _to_decimal(score) for pid, score in zip(inputs.proposal_ids, scores)}
+
+
+def write_scores(scores: Dict[int, Decimal], batch_size: int = 1000) -> int:
+    """
+    Persist ``scores`` with bulk UPDATEs. Like the procedure, this touches
+    only feasibility_score (no updated_at bump, no post_save signals).
+    """
+
+    rows: Sequence[Proposal] = [
+        Proposal(id=pid, feasibility_score=score) for pid, score in scores.items()
+    ]
+    with track_proposal_changes(scores):
+        return Proposal.objects.bulk_update(rows, ["feasibility_score"], batch_size=batch_size)
+
+
+def score_proposals(proposal_ids: Iterable[int]) -> Dict[int, Decimal]:
+    """Compute and store scores for ``proposal_ids``; returns them by ID."""
+
+    scores = compute_scores(proposal_ids)
+    write_scores(scores)
+    return scores
+
+
+DEFAULT_RESCORE_CHUNK_SIZE = 1000
+
+
+def _procedure_rescore(proposal_ids: Sequence[int]) -> Dict[int, Decimal]:
+    with track_proposal_changes(proposal_ids), connection.cursor() as cursor:
+        cursor.execute(
+            "EXEC sp_RescoreProposals @proposal_ids = %s",
+            [",".join(str(pid) for pid in proposal_ids)],
+        )
+        return {int(pid): Decimal(str(score)) for pid, score in cursor.fetchall()}
+
+
+def rescore(
+    proposal_ids: Optional[Iterable[int]] = None,
+    neighborhood_ids: Optional[Iterable[int]] = None,
+    *,
+    chunk_size: int = DEFAULT_RESCORE_CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Rescore every proposal in ``proposal_ids`` or in ``neighborhood_ids``.
+
+    Work is split into chunks of ``chunk_size`` proposals. Each chunk is
+    scored in one pass (one set-based procedure call on the stored-procedure
+    backend, one NumPy pass otherwise) and only changed scores are written,
+    with one bulk UPDATE. ``progress(done, total)`` runs after each chunk.
+    """
+
+    targets = Q(pk__in=[])
+    if proposal_ids is not None:
+        targets |= Q(id__in=list(proposal_ids))
+    if neighborhood_ids is not None:
+        targets |= Q(neighborhood_id__in=list(neighborhood_ids))
+    current = dict(
+        Proposal.objects.filter(targets).order_by("id").values_list("id", "feasibility_score")
+    )
+    ids = list(current)
+    backend = scoring_backend()
+
+    updated = 0
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start : start + chunk_size]
+        if backend == STORED_PROCEDURE:
+            updated += len(_procedure_rescore(chunk))
+        else:
+            changed = {
+                pid: score for pid, score in compute_scores(chunk).items() if current[pid] != score
+            }
+            write_scores(changed, batch_size=max(len(changed), 1))
+            updated += len(changed)
+        if progress:
+            progress(min(start + chunk_size, len(ids)), len(ids))
+
+    return {"backend": backend, "proposals": len(ids), "updated": updated}
+
+
+def schedule_rescore(neighborhood_ids: Iterable[int]) -> bool:
+    """
+    Queue a batch rescore for ``neighborhood_ids``; False if nothing was
+    queued. Whole neighborhoods can take minutes, so they run on the
+    maintenance queue instead of holding a scoring worker past its limits.
+    """
+
+    from .queueing import enqueue
+    from .tasks import rescore_proposals
+
+    ids = sorted(set(neighborhood_ids))
+    if not ids:
+        return False
+    return enqueue(rescore_proposals, kwargs={"neighborhood_ids": ids}, queue="maintenance") is not None
+
+
+# --- Debounced recalculation after edits ------------------------------------------
+
+RECALC_PENDING_KEY = "scoring:recalc_pending:{}"
+# With a shared cache a pending marker outlives the debounce window by this
+# much, so a task still waiting in a backed-up queue keeps absorbing later
+# saves (see pending_marker_timeout).
+RECALC_PENDING_GRACE_S = 60
+
+_recalc = threading.local()
+
+
+def schedule_recalc(proposal_ids: Iterable[int]) -> None:
+    """
+    Queue a debounced rescore of ``proposal_ids`` once the current
+    transaction commits.
+
+    IDs collected during one transaction go out as a single batch job.
+    Proposals that already have a rescore pending (marked in the cache) are
+    left to that job, which reads their latest state when it runs
+    FEASIBILITY_RECALC_DEBOUNCE_S later.
+    """
+
+    pending = getattr(_recalc, "ids", None)
+    if pending is None:
+        pending = _recalc.ids = set()
+    pending.update(proposal_ids)
+    # Every call registers a flush, but only the first after commit finds IDs
+    # to send. IDs left behind by a rolled-back transaction join the next
+    # batch, which is harmless.
+    transaction.on_commit(_flush_recalc)
+
+
+def _flush_recalc() -> None:
+    from .queueing import enqueue
+    from .tasks import rescore_proposals
+
+    ids, _recalc.ids = getattr(_recalc, "ids", set()), set()
+    debounce = settings.FEASIBILITY_RECALC_DEBOUNCE_S
+    timeout = pending_marker_timeout(debounce, RECALC_PENDING_GRACE_S)
+    fresh = [pid for pid in sorted(ids) if cache.add(RECALC_PENDING_KEY.format(pid), True, timeout=timeout)]
+    if not fresh:
+        return
+    if enqueue(rescore_proposals, kwargs={"proposal_ids": fresh}, countdown=debounce) is None:
+        # Not queued: let the next save try again.
+        release_recalc(fresh)
+
+
+def release_recalc(proposal_ids: Iterable[int]) -> None:
+    """Clear pending markers so saves from now on queue a new rescore."""
+
+    cache.delete_many([RECALC_PENDING_KEY.format(pid) for pid in proposal_ids])
@@ -1,3 +1,6 @@
+from dataclasses import replace
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
@@ -5,6 +8,8 @@ from .models import (
     Borough,
     DemographicProfile,
     FinancialProjection,
+    GreenTapeRun,
+    GreenTapeStep,
     MarketData,
     Neighborhood,
     Proposal,
@@ -13,6 +18,14 @@ from .models import (
     ZoningDistrict,
 )
 from .agents import run_green_tape_pipeline
+from .projections import (
+    DEFAULT_SCENARIOS,
+    DEFAULT_YEARS,
+    MAX_SCENARIOS,
+    MAX_YEARS,
+    ProjectionAssumptions,
+    SensitivityAssumptions,
+)
 
 User = get_user_model()
 
@@ -240,6 +253,9 @@ class GreenTapeRequestSerializer(serializers.Serializer):
     max_iterations = serializers.IntegerField(
         min_value=1, max_value=3, required=False, default=1
     )
+    target_score = serializers.FloatField(
+        min_value=0.0, max_value=100.0, required=False
+    )
 
 
 class GreenTapeResponseSerializer(serializers.Serializer):
@@ -247,7 +263,161 @@ class GreenTapeResponseSerializer(serializers.Serializer):
     Serialized view of the multi-step pipeline suitable for the frontend.
     """
 
+    run_id = serializers.IntegerField(required=False)
     context = serializers.DictField()
     draft = serializers.DictField()
     critic = serializers.DictField()
     optimizer = serializers.DictField()
+    duration_ms = serializers.IntegerField(required=False)
+
+
+class GreenTapeStepSerializer(serializers.ModelSerializer):
+    prompt = serializers.CharField(source="prompt.body", read_only=True)
+    output = serializers.CharField(source="output.body", read_only=True)
+
+    class Meta:
+        model = GreenTapeStep
+        fields = [
+            "sequence", "kind", "iteration", "prompt", "output", "score", "duration_ms",
+            "model", "prompt_tokens", "completion_tokens", "ttfb_ms", "latency_ms",
+            "retries", "cost_usd",
+        ]
+
+
+class GreenTapeRunListSerializer(serializers.ModelSerializer):
+    neighborhood_name = serializers.CharField(source="neighborhood.name", read_only=True)
+    borough_code = serializers.CharField(source="neighborhood.borough.code", read_only=True)
+
+    class Meta:
+        model = GreenTapeRun
+        fields = [
+            "id", "neighborhood", "neighborhood_name", "borough_code",
+            "lot_size_sqft", "user_goal", "max_iterations",
+            "overall_score", "stop_reason", "duration_ms", "created_at",
+        ]
+
+
+class GreenTapeRunDetailSerializer(GreenTapeRunListSerializer):
+    """
+    Stored run rendered in the same shape as a live pipeline response, so the
+    Self-Improvement Loop page can display history without another LLM call.
+    """
+
+    context = serializers.SerializerMethodField()
+    draft = serializers.SerializerMethodField()
+    critic = serializers.SerializerMethodField()
+    optimizer = serializers.SerializerMethodField()
+    steps = GreenTapeStepSerializer(many=True, read_only=True)
+
+    class Meta(GreenTapeRunListSerializer.Meta):
+        fields = GreenTapeRunListSerializer.Meta.fields + [
+            "site_context", "context", "draft", "critic", "optimizer", "steps",
+        ]
+
+    def _steps_of_kind(self, obj, kind):
+        return [s for s in obj.steps.all() if s.kind == kind]
+
+    def get_context(self, obj):
+        n = obj.neighborhood
+        return {
+            "neighborhood_id": n.id,
+            "neighborhood_name": n.name,
+            "borough_code": n.borough.code,
+            "borough_name": n.borough.name,
+            "lot_size_sqft": float(obj.lot_size_sqft),
+            "user_goal": obj.user_goal,
+            "additional_notes": obj.additional_notes,
+        }
+
+    def get_draft(self, obj):
+        steps = self._steps_of_kind(obj, GreenTapeStep.Kind.DRAFT)
+        return {
+            "text": obj.draft.body,
+            "prompt": steps[0].prompt.body if steps else "",
+        }
+
+    def get_critic(self, obj):
+        return {"raw_text": obj.critic_raw, "parsed": obj.critic_feedback}
+
+    def get_optimizer(self, obj):
+        return {
+            "final_draft": obj.final_draft.body,
+            "best_score": obj.overall_score,
+            "stop_reason": obj.stop_reason,
+            "steps": [
+                {
+                    "iteration": s.iteration,
+                    "optimizer_prompt": s.prompt.body,
+                    "improved_draft": s.output.body,
+                    "score": s.score,
+                    "duration_ms": s.duration_ms,
+                }
+                for s in self._steps_of_kind(obj, GreenTapeStep.Kind.OPTIMIZER)
+            ],
+        }
+
+
+class UncertaintySerializer(serializers.Serializer):
+    mean = serializers.FloatField()
+    std = serializers.FloatField(min_value=0.0)
+
+
+class ProjectionSimulationSerializer(serializers.Serializer):
+    """
+    Monte Carlo request. Each distribution is optional and overrides only
+    the mean and spread; the clipping bounds stay the engine's.
+    """
+
+    years = serializers.IntegerField(min_value=1, max_value=MAX_YEARS, default=DEFAULT_YEARS)
+    scenarios = serializers.IntegerField(
+        min_value=100, max_value=MAX_SCENARIOS, default=DEFAULT_SCENARIOS
+    )
+    seed = serializers.IntegerField(min_value=0, required=False)
+    rent_growth = UncertaintySerializer(required=False)
+    expense_inflation = UncertaintySerializer(required=False)
+    vacancy = UncertaintySerializer(required=False)
+    construction_overrun = UncertaintySerializer(required=False)
+
+    def to_assumptions(self) -> SensitivityAssumptions:
+        defaults = SensitivityAssumptions()
+        overrides = {
+            name: replace(getattr(defaults, name), **self.validated_data[name])
+            for name in ("rent_growth", "expense_inflation", "vacancy", "construction_overrun")
+            if name in self.validated_data
+        }
+        return replace(defaults, **overrides)
+
+
+class WhatIfUnitSerializer(serializers.Serializer):
+    unit_type = serializers.ChoiceField(choices=ProposalUnitMix.UnitType.choices)
+    count = serializers.IntegerField(min_value=0)
+    projected_rent = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0"))
+
+
+class WhatIfProjectionSerializer(serializers.Serializer):
+    """Unsaved unit mix, cost and assumptions for a live projection preview."""
+
+    unit_mix = WhatIfUnitSerializer(many=True)
+    estimated_cost = serializers.DecimalField(
+        max_digits=14, decimal_places=2, min_value=Decimal("0.01")
+    )
+    years = serializers.IntegerField(min_value=1, max_value=MAX_YEARS, default=DEFAULT_YEARS)
+    revenue_growth = serializers.FloatField(min_value=-1.0, max_value=1.0, required=False)
+    expense_inflation = serializers.FloatField(min_value=-1.0, max_value=1.0, required=False)
+    expense_ratio = serializers.FloatField(min_value=0.0, max_value=5.0, required=False)
+
+    def validate_unit_mix(self, value):
+        if not any(unit["count"] and unit["projected_rent"] for unit in value):
+            raise serializers.ValidationError("At least one rented unit type is required.")
+        if len({unit["unit_type"] for unit in value}) != len(value):
+            raise serializers.ValidationError("Each unit type may appear only once.")
+        return value
+
+    def to_assumptions(self) -> ProjectionAssumptions:
+        return ProjectionAssumptions.from_dict(
+            {
+                name: self.validated_data[name]
+                for name in ("revenue_growth", "expense_inflation", "expense_ratio")
+                if name in self.validated_data
+            }
+        )
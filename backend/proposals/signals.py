@@ -1,26 +1,133 @@
 import logging
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-from .models import Proposal
+from analytics.dashboard import apply_changes, contributions, rebuild_dashboard_aggregates
+from analytics.portfolio import apply_cell_changes, proposal_cells, unit_mix_cells
+from analytics.rankings import schedule_rankings_refresh
+
+from .caching import market_views
+from .market_changes import recompute_market_changes
+from .models import (
+    Borough,
+    DemographicProfile,
+    MarketData,
+    Neighborhood,
+    Proposal,
+    ProposalUnitMix,
+    ZoningDistrict,
+)
+from .nyc_data import invalidate_reference_data, schedule_site_context_rebuild
+from .scoring import schedule_recalc
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Proposal)
 def on_proposal_saved(sender, instance, created, update_fields, **kwargs):
-    """Trigger feasibility recalculation when key fields change."""
-    recalc_fields = {"lot_size_sqft", "total_units", "neighborhood_id"}
-
+    """Queue a debounced feasibility recalculation when scored fields change."""
     if created:
         return
 
+    changed = instance.changed_scored_fields()
     if update_fields is not None:
-        changed = set(update_fields) & recalc_fields
-        if not changed:
-            return
+        saved = {sender._meta.get_field(name).attname for name in update_fields}
+        changed &= saved
+    if not changed:
+        return
+
+    schedule_recalc([instance.id])
+    logger.info("Scheduled feasibility recalc for proposal %s (%s)", instance.id, ", ".join(sorted(changed)))
+
+
+@receiver(post_save, sender=MarketData)
+@receiver(post_delete, sender=MarketData)
+def on_market_data_changed(sender, instance, **kwargs):
+    """Recompute the neighborhood's stored price and rent changes."""
+    recompute_market_changes([instance.neighborhood_id])
+
+
+@receiver(post_save, sender=MarketData)
+@receiver(post_delete, sender=MarketData)
+@receiver(post_save, sender=DemographicProfile)
+@receiver(post_delete, sender=DemographicProfile)
+@receiver(post_save, sender=ZoningDistrict)
+@receiver(post_delete, sender=ZoningDistrict)
+def on_site_data_changed(sender, instance, **kwargs):
+    """Invalidate and rebuild the neighborhood's cached site context after commit."""
+    neighborhood_id = instance.neighborhood_id
+    transaction.on_commit(lambda: schedule_site_context_rebuild([neighborhood_id]))
+    transaction.on_commit(market_views.invalidate)
+    if sender is ZoningDistrict:
+        transaction.on_commit(invalidate_reference_data)
+    else:
+        transaction.on_commit(schedule_rankings_refresh)
+
+
+@receiver(post_save, sender=Borough)
+@receiver(post_delete, sender=Borough)
+@receiver(post_save, sender=Neighborhood)
+@receiver(post_delete, sender=Neighborhood)
+def on_reference_data_changed(sender, instance, **kwargs):
+    """Retire cached borough listings and re-rank once the change commits."""
+    transaction.on_commit(invalidate_reference_data)
+    transaction.on_commit(schedule_rankings_refresh)
+
+
+@receiver(pre_save, sender=Proposal)
+@receiver(pre_delete, sender=Proposal)
+def on_proposal_changing(sender, instance, signal, **kwargs):
+    """Lock the stored row and record its dashboard and cube contributions before it changes."""
+    if instance._state.adding:
+        instance._dashboard_before, instance._cells_before = {}, {}
+        return
+    instance._dashboard_before = contributions([instance.pk])
+    # A deleted proposal's unit mix rows retire their own cells.
+    instance._cells_before = proposal_cells([instance.pk], unit_types=signal is pre_save)
 
-    from .tasks import calculate_feasibility_score
-    calculate_feasibility_score.delay(instance.id)
-    logger.info("Queued feasibility recalc for proposal %s", instance.id)
+
+@receiver(post_save, sender=Proposal)
+@receiver(post_delete, sender=Proposal)
+def on_proposal_changed(sender, instance, signal, **kwargs):
+    """Apply the change to the borough dashboard aggregates and the portfolio cube."""
+    deleted = signal is post_delete
+    before = getattr(instance, "_dashboard_before", None) or {}
+    apply_changes(before, {} if deleted else contributions([instance.pk]))
+    cells_before = getattr(instance, "_cells_before", None) or {}
+    apply_cell_changes(cells_before, {} if deleted else proposal_cells([instance.pk]))
+    instance._dashboard_before = instance._cells_before = None
+
+
+@receiver(pre_save, sender=ProposalUnitMix)
+@receiver(pre_delete, sender=ProposalUnitMix)
+def on_unit_mix_changing(sender, instance, **kwargs):
+    """Lock the stored row and record its unit-type cell before it changes."""
+    instance._cells_before = {} if instance._state.adding else unit_mix_cells([instance.pk])
+
+
+@receiver(post_save, sender=ProposalUnitMix)
+@receiver(post_delete, sender=ProposalUnitMix)
+def on_unit_mix_changed(sender, instance, signal, **kwargs):
+    """Move the row's units between portfolio cube cells."""
+    before = getattr(instance, "_cells_before", None) or {}
+    apply_cell_changes(before, {} if signal is post_delete else unit_mix_cells([instance.pk]))
+    instance._cells_before = None
+
+
+@receiver(post_save, sender=Borough)
+def on_borough_created(sender, instance, created, **kwargs):
+    if created:
+        rebuild_dashboard_aggregates([instance.id])
+
+
+@receiver(pre_save, sender=Neighborhood)
+def on_neighborhood_changing(sender, instance, **kwargs):
+    """Rebuild both boroughs' aggregates if a neighborhood moves between them."""
+    if instance._state.adding:
+        return
+    previous = Neighborhood.objects.filter(pk=instance.pk).values_list("borough_id", flat=True).first()
+    if previous is not None and previous != instance.borough_id:
+        moved = [previous, instance.borough_id]
+        transaction.on_commit(lambda: rebuild_dashboard_aggregates(moved))
@@ -1,4 +1,5 @@
 import logging
+from decimal import Decimal
 
 from celery import shared_task
 from django.db import connection
@@ -6,41 +7,203 @@ from django.db import connection
 logger = logging.getLogger(__name__)
 
 
+def _format_score(score) -> str:
+    # DECIMAL(5,2) from either backend; drivers may hand back a float.
+    return "None" if score is None else str(Decimal(str(score)).quantize(Decimal("0.01")))
+
+
+def _publish_failure(task, proposal_id, event_type, exc):
+    # Only once retries are exhausted; until then the client keeps waiting.
+    if task.request.retries >= task.max_retries:
+        from .events import publish
+        publish(proposal_id, event_type, {"error": str(exc)}, task_id=task.request.id)
+
+
+def _projection_payload(proposal_id: int, years: int) -> dict:
+    from .models import FinancialProjection, Proposal
+
+    rows = FinancialProjection.objects.filter(proposal_id=proposal_id).order_by("year").values(
+        "year", "revenue", "expenses", "net_income", "cumulative_roi"
+    )
+    projected_revenue = (
+        Proposal.objects.filter(pk=proposal_id).values_list("projected_revenue", flat=True).first()
+    )
+    return {
+        "years": years,
+        "projected_revenue": None if projected_revenue is None else str(projected_revenue),
+        "financial_projections": [
+            {key: value if key == "year" else str(value) for key, value in row.items()}
+            for row in rows
+        ],
+    }
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def calculate_feasibility_score(self, proposal_id: int):
-    """Execute sp_CalculateFeasibilityScore stored procedure."""
+    """Score a proposal with sp_CalculateFeasibilityScore or the in-process engine."""
+    from analytics.dashboard import track_proposal_changes
+
+    from .events import SCORE_FAILED, SCORE_READY, publish
+    from .models import Proposal
+    from .scoring import STORED_PROCEDURE, score_proposals, scoring_backend
+
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("EXEC sp_CalculateFeasibilityScore @proposal_id = %s", [proposal_id])
-            row = cursor.fetchone()
-            score = row[0] if row else None
+        if scoring_backend() == STORED_PROCEDURE:
+            with track_proposal_changes([proposal_id]), connection.cursor() as cursor:
+                cursor.execute("EXEC sp_CalculateFeasibilityScore @proposal_id = %s", [proposal_id])
+                row = cursor.fetchone()
+                score = row[0] if row else None
+        else:
+            score = score_proposals([proposal_id]).get(proposal_id)
+            if score is None:
+                raise Proposal.DoesNotExist(f"Proposal {proposal_id} not found")
         logger.info("Feasibility score for proposal %s: %s", proposal_id, score)
-        return {"proposal_id": proposal_id, "feasibility_score": str(score)}
     except Exception as exc:
         logger.error("Failed to calculate feasibility score for %s: %s", proposal_id, exc)
+        _publish_failure(self, proposal_id, SCORE_FAILED, exc)
+        raise self.retry(exc=exc)
+    formatted = _format_score(score)
+    publish(proposal_id, SCORE_READY, {"feasibility_score": formatted}, task_id=self.request.id)
+    return {"proposal_id": proposal_id, "feasibility_score": formatted}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def rescore_proposals(self, proposal_ids=None, neighborhood_ids=None, chunk_size=None):
+    """Rescore a proposal or neighborhood set in chunks, reporting PROGRESS state."""
+    from .scoring import DEFAULT_RESCORE_CHUNK_SIZE, release_recalc, rescore
+
+    if proposal_ids:
+        # Saves from here on need another pass; this one may read too early.
+        release_recalc(proposal_ids)
+
+    def progress(done, total):
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta={"done": done, "total": total})
+
+    try:
+        result = rescore(
+            proposal_ids,
+            neighborhood_ids,
+            chunk_size=chunk_size or DEFAULT_RESCORE_CHUNK_SIZE,
+            progress=progress,
+        )
+    except Exception as exc:
+        logger.error("Batch rescore failed: %s", exc)
         raise self.retry(exc=exc)
+    logger.info("Rescored %(proposals)s proposals (%(updated)s changed) via %(backend)s.", result)
+    return result
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def generate_financial_projections(self, proposal_id: int, years: int = 10):
-    """Execute sp_GenerateFinancialProjections stored procedure."""
+    """Project a proposal with sp_GenerateFinancialProjections or the in-process engine."""
+    from analytics.dashboard import track_proposal_changes
+
+    from .events import PROJECTIONS_FAILED, PROJECTIONS_READY, publish
+    from .projections import generate_projections, projection_backend
+    from .scoring import STORED_PROCEDURE
+
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "EXEC sp_GenerateFinancialProjections @proposal_id = %s, @projection_years = %s",
-                [proposal_id, years],
-            )
+        if projection_backend() == STORED_PROCEDURE:
+            with track_proposal_changes([proposal_id]), connection.cursor() as cursor:
+                cursor.execute(
+                    "EXEC sp_GenerateFinancialProjections @proposal_id = %s, @projection_years = %s",
+                    [proposal_id, years],
+                )
+        else:
+            result = generate_projections([proposal_id], years)
+            if not result["proposals"]:
+                reason = result["skipped"].get(proposal_id, "proposal not found")
+                raise ValueError(f"Cannot project proposal {proposal_id}: {reason}")
         logger.info("Financial projections generated for proposal %s (%s years)", proposal_id, years)
-        return {"proposal_id": proposal_id, "years": years}
     except Exception as exc:
         logger.error("Failed to generate projections for %s: %s", proposal_id, exc)
+        _publish_failure(self, proposal_id, PROJECTIONS_FAILED, exc)
+        raise self.retry(exc=exc)
+    publish(
+        proposal_id, PROJECTIONS_READY, _projection_payload(proposal_id, years), task_id=self.request.id
+    )
+    return {"proposal_id": proposal_id, "years": years}
+
+
+@shared_task(bind=True)
+def regenerate_projections(self, proposal_ids=None, years: int = 10, assumptions=None):
+    """Re-project many proposals (default: all) in one vectorized pass and transaction."""
+    from .projections import ProjectionAssumptions, generate_projections
+
+    if proposal_ids is None:
+        from .models import Proposal
+        proposal_ids = Proposal.objects.values_list("id", flat=True)
+    result = generate_projections(
+        proposal_ids, years, ProjectionAssumptions.from_dict(assumptions)
+    )
+    logger.info(
+        "Re-projected %s proposals (%s rows, %s skipped).",
+        result["proposals"], result["rows"], len(result["skipped"]),
+    )
+    return result
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60)
+def run_green_tape(
+    self,
+    user_id: int,
+    neighborhood_id: int,
+    lot_size_sqft: float,
+    user_goal: str,
+    additional_notes: str = "",
+    max_iterations: int = 1,
+    target_score=None,
+):
+    """Run and store a Green-Tape pipeline off the request path (LLM-bound)."""
+    from django.contrib.auth import get_user_model
+
+    from .agents import record_green_tape_run, run_green_tape_pipeline
+    from .models import Neighborhood
+
+    user = get_user_model().objects.get(pk=user_id)
+    neighborhood = Neighborhood.objects.select_related("borough").get(pk=neighborhood_id)
+    try:
+        result = run_green_tape_pipeline(
+            neighborhood=neighborhood,
+            lot_size_sqft=lot_size_sqft,
+            user_goal=user_goal,
+            additional_notes=additional_notes,
+            max_iterations=max_iterations,
+            target_score=target_score,
+        )
+    except Exception as exc:
+        logger.error("Green-Tape run for neighborhood %s failed: %s", neighborhood_id, exc)
         raise self.retry(exc=exc)
+    run = record_green_tape_run(user=user, neighborhood=neighborhood, result=result)
+    logger.info("Green-Tape run %s stored (%s ms).", run.id, run.duration_ms)
+    return {"run_id": run.id, "overall_score": _format_score(run.overall_score)}
+
+
+@shared_task
+def rebuild_site_contexts(neighborhood_ids):
+    """Rebuild cached site contexts for neighborhoods whose data changed."""
+    from .nyc_data import refresh_site_contexts
+    count = refresh_site_contexts(neighborhood_ids)
+    logger.info("Rebuilt %s site contexts.", count)
+    return count
 
 
 @shared_task
 def refresh_market_data_cache():
     """Periodic task: invalidate and warm the market data cache."""
-    from django.core.cache import cache
-    cache.delete_pattern("*neighborhood*")
-    cache.delete_pattern("*market*")
-    logger.info("Market data cache cleared.")
+    from analytics.rankings import refresh_rankings
+
+    from .caching import market_views
+    from .nyc_data import reference_cache, site_context_cache
+    from .warmup import warm_caches
+
+    refresh_rankings()
+    # Generation bumps: O(1) on every cache backend, no key scans.
+    generation = market_views.invalidate()
+    reference_cache.invalidate()
+    site_context_cache.invalidate()
+    logger.info("Market data cache invalidated (generation %s).", generation)
+
+    warmed = warm_caches()
+    return {"generation": generation, **warmed}
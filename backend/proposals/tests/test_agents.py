@@ -0,0 +1,379 @@
+import asyncio
+import json
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from config.llm import (
+    LLMConfigurationError,
+    LLMResponse,
+    acall_llm_json_response,
+    call_llm,
+    call_llm_json_response,
+    estimate_cost_usd,
+)
+from config.llm_json import JSONRepairError, parse_json_object
+from proposals.agents import (
+    CRITIC_FEEDBACK_SCHEMA,
+    record_green_tape_run,
+    run_green_tape_pipeline,
+)
+from proposals.models import Borough, GreenTapeRun, GreenTapeStep, GreenTapeText, Neighborhood
+
+User = get_user_model()
+
+
+def _unconfigured(*args, **kwargs):
+    raise LLMConfigurationError("no key")
+
+
+def _critic(score):
+    return {
+        "summary": "ok", "displacement_risk": "low",
+        "affordability_assessment": "deep", "local_business_impact": "positive",
+        "overall_score": score, "recommendations": ["More CLT units"],
+    }
+
+
+class AdaptiveOptimizerLoopTest(TestCase):
+    def setUp(self):
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+
+    def _run(self, critic_scores, **kwargs):
+        llm = MagicMock(side_effect=[LLMResponse(text=f"draft {i}") for i in range(10)])
+        llm_json = MagicMock(
+            side_effect=[(_critic(s), LLMResponse(text="{}")) for s in critic_scores]
+        )
+        with patch("proposals.agents.call_llm", llm), patch(
+            "proposals.agents.call_llm_json_response", llm_json
+        ):
+            result = run_green_tape_pipeline(
+                neighborhood=self.hood, lot_size_sqft=20000.0,
+                user_goal="CLT", max_iterations=3, **kwargs,
+            )
+        return result["optimizer"], llm
+
+    def test_stops_on_plateau_and_keeps_best_draft(self):
+        optimizer, llm = self._run([60, 70, 71], target_score=90, min_improvement=2)
+        self.assertEqual(optimizer["stop_reason"], "plateau")
+        self.assertEqual(len(optimizer["steps"]), 2)
+        self.assertEqual(optimizer["best_score"], 71)
+        self.assertEqual(optimizer["final_draft"], "draft 2")
+
+    def test_regression_keeps_previous_draft(self):
+        optimizer, _ = self._run([60, 55], target_score=90)
+        self.assertEqual(optimizer["stop_reason"], "plateau")
+        self.assertEqual(optimizer["final_draft"], "draft 0")
+        self.assertEqual(optimizer["best_score"], 60)
+
+    def test_stops_when_target_reached(self):
+        optimizer, llm = self._run([70, 88], target_score=85)
+        self.assertEqual(optimizer["stop_reason"], "target_reached")
+        self.assertEqual(len(optimizer["steps"]), 1)
+        self.assertEqual(llm.call_count, 2)
+
+    def test_initial_score_above_target_skips_optimizer(self):
+        optimizer, llm = self._run([92], target_score=85)
+        self.assertEqual(optimizer["steps"], [])
+        self.assertEqual(llm.call_count, 1)
+
+    def test_token_budget(self):
+        optimizer, llm = self._run([60], target_score=90, token_budget=1000)
+        self.assertEqual(optimizer["stop_reason"], "token_budget")
+        self.assertEqual(llm.call_count, 1)
+
+
+@patch("proposals.agents.call_llm_json_response", _unconfigured)
+@patch("proposals.agents.call_llm", _unconfigured)
+class RecordGreenTapeRunTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+
+    def _run(self, iterations=2):
+        result = run_green_tape_pipeline(
+            neighborhood=self.hood, lot_size_sqft=20000.0,
+            user_goal="Deeply affordable CLT", max_iterations=iterations,
+        )
+        return result, record_green_tape_run(
+            user=self.user, neighborhood=self.hood, result=result
+        )
+
+    def test_run_and_steps_persisted(self):
+        result, run = self._run(iterations=2)
+        # Without an LLM the optimizer stops after its placeholder round.
+        self.assertEqual(run.stop_reason, "llm_unavailable")
+        self.assertEqual(run.steps.count(), 3)
+        self.assertEqual(run.final_draft.body, result["optimizer"]["final_draft"])
+        self.assertEqual(run.overall_score, Decimal("50.00"))
+
+    def test_early_stop_keeps_the_requested_max_iterations(self):
+        llm = MagicMock(side_effect=[LLMResponse(text=f"draft {i}") for i in range(10)])
+        llm_json = MagicMock(
+            side_effect=[(_critic(s), LLMResponse(text="{}")) for s in (60, 70, 71)]
+        )
+        with patch("proposals.agents.call_llm", llm), patch(
+            "proposals.agents.call_llm_json_response", llm_json
+        ):
+            result = run_green_tape_pipeline(
+                neighborhood=self.hood, lot_size_sqft=20000.0, user_goal="CLT",
+                max_iterations=5, target_score=90, min_improvement=2,
+            )
+        run = record_green_tape_run(user=self.user, neighborhood=self.hood, result=result)
+        self.assertEqual(run.stop_reason, "plateau")
+        self.assertEqual(run.max_iterations, 5)
+        self.assertEqual(run.steps.filter(kind=GreenTapeStep.Kind.OPTIMIZER).count(), 2)
+
+    def test_identical_texts_are_stored_once(self):
+        self._run()
+        texts_after_first = GreenTapeText.objects.count()
+        self._run()
+        self.assertEqual(GreenTapeRun.objects.count(), 2)
+        self.assertEqual(GreenTapeText.objects.count(), texts_after_first)
+
+
+@patch("proposals.agents.call_llm_json_response", _unconfigured)
+@patch("proposals.agents.call_llm", _unconfigured)
+class GreenTapeRunViewSetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="pass1234")
+        self.other = User.objects.create_user(username="other", password="pass1234")
+        self.token = Token.objects.create(user=self.user)
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def _post_run(self):
+        return self.client.post(
+            "/api/proposals/green-tape-run/",
+            {"neighborhood_id": self.hood.id, "lot_size_sqft": 20000, "user_goal": "CLT"},
+            format="json",
+        )
+
+    def test_run_is_recorded_and_replayable(self):
+        response = self._post_run()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        run_id = response.data["run_id"]
+
+        with patch("proposals.agents.call_llm") as llm:
+            detail = self.client.get(f"/api/green-tape-runs/{run_id}/")
+            llm.assert_not_called()
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            detail.data["optimizer"]["final_draft"],
+            response.data["optimizer"]["final_draft"],
+        )
+
+    def test_history_is_scoped_to_user(self):
+        self._post_run()
+        other_token = Token.objects.create(user=self.other)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {other_token.key}")
+        response = self.client.get("/api/green-tape-runs/")
+        self.assertEqual(response.data["count"], 0)
+
+    def test_metrics_grouped_by_step_and_model(self):
+        llm = MagicMock(return_value=LLMResponse(
+            text="draft", model="gpt-4.1-mini", prompt_tokens=100,
+            completion_tokens=50, ttfb_ms=80, latency_ms=400,
+        ))
+        llm_json = MagicMock(return_value=(_critic(95), LLMResponse(
+            text="{}", model="gpt-4.1-mini", prompt_tokens=60,
+            completion_tokens=20, ttfb_ms=50, latency_ms=200,
+        )))
+        with patch("proposals.agents.call_llm", llm), patch(
+            "proposals.agents.call_llm_json_response", llm_json
+        ):
+            self._post_run()
+        response = self.client.get(
+            "/api/green-tape-runs/metrics/", {"group_by": "step,model"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        by_step = {row["step"]: row for row in response.data}
+        self.assertEqual(by_step["draft"]["p95_latency_ms"], 400)
+        self.assertEqual(by_step["critic"]["prompt_tokens"], 60)
+        self.assertEqual(by_step["critic"]["model"], "gpt-4.1-mini")
+
+    def test_async_endpoint_matches_sync_pipeline(self):
+        acall = AsyncMock(return_value=LLMResponse(text="async draft", latency_ms=120))
+        acall_json = AsyncMock(return_value=(_critic(95), LLMResponse(text="{}")))
+        with patch("proposals.agents.acall_llm", acall), patch(
+            "proposals.agents.acall_llm_json_response", acall_json
+        ):
+            response = self.client.post(
+                "/api/proposals/green-tape-run/async/",
+                {"neighborhood_id": self.hood.id, "lot_size_sqft": 20000, "user_goal": "CLT"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(body["draft"]["text"], "async draft")
+        self.assertEqual(body["optimizer"]["stop_reason"], "target_reached")
+        run = GreenTapeRun.objects.get(pk=body["run_id"])
+        self.assertEqual(run.user, self.user)
+
+    def test_async_endpoint_requires_auth(self):
+        self.client.credentials()
+        response = self.client.post(
+            "/api/proposals/green-tape-run/async/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_endpoint_session_post_without_csrf_is_forbidden(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            "/api/proposals/green-tape-run/async/", {}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn("CSRF", response.json()["detail"])
+
+    def test_compare(self):
+        first = self._post_run().data["run_id"]
+        second = self._post_run().data["run_id"]
+        response = self.client.get("/api/green-tape-runs/compare/", {"ids": f"{first},{second}"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["id"] for r in response.data], [first, second])
+
+
+class LLMInstrumentationTest(TestCase):
+    def _response(self, status_code=200, content="hello"):
+        resp = MagicMock(status_code=status_code)
+        resp.json.return_value = {
+            "model": "gpt-4.1-mini-2025-04-14",
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 30},
+        }
+        return resp
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test", "LLM_MAX_RETRIES": "2"})
+    @patch("config.llm.time.sleep")
+    @patch("config.llm.requests.post")
+    def test_usage_and_retries_are_captured(self, post, _sleep):
+        post.side_effect = [self._response(429), self._response(200)]
+        response = call_llm("hi")
+        self.assertEqual(response.text, "hello")
+        self.assertEqual(response.retries, 1)
+        self.assertEqual(response.prompt_tokens, 120)
+        self.assertEqual(response.completion_tokens, 30)
+        self.assertEqual(response.model, "gpt-4.1-mini-2025-04-14")
+        self.assertIsNotNone(response.cost_usd)
+
+    def test_cost_uses_longest_model_prefix(self):
+        self.assertAlmostEqual(estimate_cost_usd("gpt-4.1-mini-2025-04-14", 1000, 1000), 0.002)
+        self.assertIsNone(estimate_cost_usd("unknown-model", 1000, 1000))
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test"})
+    @patch("config.llm.requests.post")
+    def test_json_object_is_the_default_response_format(self, post):
+        post.return_value = self._response(content='{"overall_score": 81}')
+        call_llm_json_response("Review", json_schema=CRITIC_FEEDBACK_SCHEMA)
+        sent = json.loads(post.call_args.kwargs["data"])
+        self.assertEqual(sent["response_format"], {"type": "json_object"})
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test", "LLM_STRUCTURED_OUTPUT": "json_schema"})
+    @patch("config.llm.requests.post")
+    def test_json_schema_sent_as_response_format(self, post):
+        post.return_value = self._response(content='{"overall_score": 81, "summ')
+        payload, _ = call_llm_json_response("Review", json_schema=CRITIC_FEEDBACK_SCHEMA)
+        sent = json.loads(post.call_args.kwargs["data"])
+        self.assertEqual(sent["response_format"]["type"], "json_schema")
+        self.assertTrue(sent["response_format"]["json_schema"]["strict"])
+        self.assertEqual(payload["overall_score"], 81)
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test", "LLM_STRUCTURED_OUTPUT": "off"})
+    @patch("config.llm.requests.post")
+    def test_structured_output_can_be_disabled(self, post):
+        post.return_value = self._response(content='{"overall_score": 81}')
+        call_llm_json_response("Review", json_schema=CRITIC_FEEDBACK_SCHEMA)
+        self.assertNotIn("response_format", json.loads(post.call_args.kwargs["data"]))
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test", "LLM_STRUCTURED_OUTPUT": "json_schema"})
+    @patch("config.llm.requests.post")
+    def test_rejected_response_format_is_retried_without_it(self, post):
+        post.side_effect = [self._response(400), self._response(content='{"overall_score": 81}')]
+        payload, response = call_llm_json_response("Review", json_schema=CRITIC_FEEDBACK_SCHEMA)
+        self.assertEqual(payload["overall_score"], 81)
+        self.assertEqual(response.retries, 0)
+        first, second = (json.loads(call.kwargs["data"]) for call in post.call_args_list)
+        self.assertIn("response_format", first)
+        self.assertNotIn("response_format", second)
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test"})
+    def test_async_rejected_response_format_is_retried_without_it(self):
+        import httpx
+
+        sent = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            sent.append(body)
+            if "response_format" in body:
+                return httpx.Response(400, json={"error": "unsupported"})
+            return httpx.Response(200, json=self._response(content='{"overall_score": 64}').json())
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                with patch("config.llm._get_async_client", return_value=client):
+                    return await acall_llm_json_response("Review", json_schema=CRITIC_FEEDBACK_SCHEMA)
+
+        payload, _response = asyncio.run(run())
+        self.assertEqual(payload["overall_score"], 64)
+        self.assertEqual(["response_format" in body for body in sent], [True, False])
+
+
+class JSONRepairTest(TestCase):
+    def test_prose_and_code_fences(self):
+        text = 'Sure {see below}:\n```json\n{"overall_score": 70, "note": "a}b"}\n```'
+        self.assertEqual(parse_json_object(text), {"overall_score": 70, "note": "a}b"})
+
+    def test_truncated_string_and_array_are_closed(self):
+        text = '{"overall_score": 72.5, "recommendations": ["More CLT units", "Right to ret'
+        self.assertEqual(
+            parse_json_object(text),
+            {"overall_score": 72.5, "recommendations": ["More CLT units", "Right to ret"]},
+        )
+
+    def test_truncated_number_is_dropped(self):
+        # "7" may be the start of "72"; never report a partial number.
+        self.assertEqual(parse_json_object('{"summary": "ok", "overall_score": 7'), {"summary": "ok"})
+
+    def test_no_object(self):
+        with self.assertRaises(JSONRepairError):
+            parse_json_object("I cannot help with that.")
+
+    def test_truncated_critic_keeps_its_score(self):
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+        truncated = LLMResponse(text='{"overall_score": 91, "summary": "Strong plan, but')
+        with patch("proposals.agents.call_llm", return_value=LLMResponse(text="draft")), patch(
+            "proposals.agents.call_llm_json_response",
+            return_value=(parse_json_object(truncated.text), truncated),
+        ):
+            result = run_green_tape_pipeline(
+                neighborhood=hood, lot_size_sqft=20000.0, user_goal="CLT", target_score=85,
+            )
+        self.assertEqual(result["critic"]["parsed"]["overall_score"], 91)
+        self.assertEqual(result["optimizer"]["stop_reason"], "target_reached")
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from proposals.caching import TwoTierCache
+
+
+@override_settings(LOCAL_CACHE_MAX_AGE_S=300)
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # Two "workers" sharing one Django cache; version checks on every read.
+        self.worker_a = TwoTierCache(maxsize=3, version_check_s=0)
+        self.worker_b = TwoTierCache(maxsize=3, version_check_s=0)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_hot_reads_skip_the_shared_cache(self):
+        tiers = TwoTierCache(version_check_s=60)
+        ns = tiers.namespace("ref")
+        ns.set("k", {"v": 1})
+        with patch("proposals.caching.cache") as shared:
+            for _ in range(5):
+                self.assertEqual(ns.get("k"), {"v": 1})
+            shared.get.assert_not_called()
+        self.assertEqual(tiers.hits, 5)
+
+    def test_lru_eviction(self):
+        ns = self.worker_a.namespace("ref")
+        for key in ("a", "b", "c"):
+            ns.set(key, key)
+        ns.get("a")  # refresh "a" so "b" is the oldest
+        ns.set("d", "d")
+        cache.clear()  # only the local tier can answer now
+        self.assertEqual(ns.get("a"), "a")
+        self.assertIsNone(ns.get("b"))
+
+    def test_versioned_invalidate_reaches_every_worker(self):
+        ns_a = self.worker_a.namespace("ref", versioned=True)
+        ns_b = self.worker_b.namespace("ref", versioned=True)
+        ns_a.set("boroughs", ["Bronx"])
+        self.assertEqual(ns_b.get("boroughs"), ["Bronx"])
+
+        ns_a.invalidate()
+        # Both the local copy in worker B and the shared entry are retired.
+        self.assertIsNone(ns_b.get("boroughs"))
+        self.assertIsNone(ns_a.get("boroughs"))
+
+    def test_targeted_delete_keeps_other_shared_entries(self):
+        ns_a = self.worker_a.namespace("ctx")
+        ns_b = self.worker_b.namespace("ctx")
+        ns_a.set_many({"ctx:1": 1, "ctx:2": 2})
+        self.assertEqual(ns_b.get_many(["ctx:1", "ctx:2"]), {"ctx:1": 1, "ctx:2": 2})
+
+        ns_a.delete_many(["ctx:1"])
+        self.assertEqual(ns_b.get_many(["ctx:1", "ctx:2"]), {"ctx:2": 2})
@@ -0,0 +1,196 @@
+import random
+import threading
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F
+from django.test import TransactionTestCase
+from rest_framework.test import APITestCase
+
+from analytics.dashboard import rebuild_dashboard_aggregates, track_proposal_changes
+from analytics.models import BoroughDashboardAggregate, PortfolioCell, ProposalDashboardSummary
+from analytics.portfolio import MEASURES, rebuild_portfolio
+from proposals.models import Borough, Neighborhood, Proposal, ProposalUnitMix
+from proposals.scoring import write_scores
+
+
+class DashboardAggregateTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", password="pass1234")
+        self.hoods = []
+        for name, code in (("Bronx", "BX"), ("Brooklyn", "BK"), ("Queens", "QN")):
+            borough = Borough.objects.create(name=name, code=code)
+            for i in range(2):
+                self.hoods.append(Neighborhood.objects.create(
+                    borough=borough, name=f"{name} {i}",
+                    latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+                ))
+
+    def _proposal(self, rng):
+        return Proposal.objects.create(
+            owner=self.user, neighborhood=rng.choice(self.hoods), title="P",
+            lot_size_sqft=Decimal("10000"), total_units=rng.randint(1, 200),
+            estimated_cost=rng.choice([None, Decimal(rng.randint(1, 9) * 1_000_000)]),
+        )
+
+    def assertMatchesView(self):
+        expected = {
+            row.borough_name: (
+                row.total_proposals, row.total_units, row.total_estimated_cost,
+                row.total_projected_revenue, row.avg_feasibility_score,
+            )
+            for row in ProposalDashboardSummary.objects.all()
+        }
+        actual = {
+            agg.borough.name: (
+                agg.total_proposals, agg.total_units, agg.total_estimated_cost,
+                agg.total_projected_revenue,
+                None if agg.avg_feasibility_score is None else round(agg.avg_feasibility_score, 2),
+            )
+            for agg in BoroughDashboardAggregate.objects.select_related("borough")
+        }
+        for name, row in expected.items():
+            avg = None if row[4] is None else round(Decimal(str(row[4])), 2)
+            self.assertEqual(actual[name], (*row[:2], Decimal(row[2]), Decimal(row[3]), avg), name)
+
+    def test_deltas_track_every_write_path(self):
+        rng = random.Random(11)
+        proposals = [self._proposal(rng) for _ in range(12)]
+        self.assertMatchesView()
+
+        for proposal in rng.sample(proposals, 6):
+            proposal.total_units += 5
+            proposal.neighborhood = rng.choice(self.hoods)
+            proposal.save()
+        # A partial save only counts the fields it writes.
+        proposals[0].total_units = 999
+        proposals[0].estimated_cost = Decimal("1.00")
+        proposals[0].save(update_fields=["estimated_cost"])
+        write_scores({p.id: Decimal(rng.randint(0, 10000)) / 100 for p in proposals[:8]})
+        self.assertMatchesView()
+
+        proposals[1].delete()
+        Proposal.objects.filter(id__in=[p.id for p in proposals[2:4]]).delete()
+        self.assertMatchesView()
+
+        BoroughDashboardAggregate.objects.update(total_units=0)
+        self.assertEqual(rebuild_dashboard_aggregates(), 3)
+        self.assertMatchesView()
+
+    @patch("analytics.tasks.refresh_neighborhood_rankings.apply_async", MagicMock())
+    def test_moving_a_neighborhood_rebuilds_both_boroughs(self):
+        rng = random.Random(3)
+        for _ in range(6):
+            self._proposal(rng)
+        hood = self.hoods[0]
+        hood.borough = Borough.objects.get(code="QN")
+        with self.captureOnCommitCallbacks(execute=True):
+            hood.save()
+        self.assertMatchesView()
+
+    def test_endpoint_reads_aggregate_rows(self):
+        self._proposal(random.Random(1))
+        Borough.objects.create(name="Staten Island", code="SI")
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/analytics/dashboard/")
+        rows = response.data["results"]
+        self.assertEqual(
+            [row["borough_name"] for row in rows], ["Bronx", "Brooklyn", "Queens", "Staten Island"]
+        )
+        self.assertEqual(sum(row["total_proposals"] for row in rows), 1)
+        self.assertIsNone(rows[-1]["avg_feasibility_score"])
+
+
+def _aggregates():
+    return list(
+        BoroughDashboardAggregate.objects.order_by("borough_id").values_list(
+            "borough_id", "total_proposals", "total_units", "total_estimated_cost", "score_sum", "score_count"
+        )
+    )
+
+
+def _cube():
+    return list(
+        PortfolioCell.objects.filter(total_proposals__gt=0)
+        .order_by("neighborhood_id", "status", "unit_type")
+        .values_list("neighborhood_id", "status", "unit_type", *MEASURES)
+    )
+
+
+class DashboardConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="planner", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+        )
+        self.proposal = Proposal.objects.create(
+            owner=user, neighborhood=hood, title="P", lot_size_sqft=Decimal("10000"), total_units=50,
+        )
+        self.mix = ProposalUnitMix.objects.create(
+            proposal=self.proposal, unit_type="1br", count=20,
+            avg_sqft=Decimal("700"), projected_rent=Decimal("2500"),
+        )
+
+    def assertMatchesRebuild(self):
+        maintained = _aggregates(), _cube()
+        rebuild_dashboard_aggregates()
+        rebuild_portfolio()
+        self.assertEqual(maintained, (_aggregates(), _cube()))
+
+    def test_failed_delta_rolls_back_the_save(self):
+        self.proposal.total_units = 80
+        with patch("proposals.signals.apply_changes", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.proposal.save()
+        self.assertEqual(Proposal.objects.get(pk=self.proposal.pk).total_units, 50)
+        self.assertMatchesRebuild()
+
+    def test_failed_cell_delta_rolls_back_the_unit_mix_save(self):
+        self.mix.count = 35
+        with patch("proposals.signals.apply_cell_changes", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.mix.save()
+        self.assertEqual(ProposalUnitMix.objects.get(pk=self.mix.pk).count, 20)
+        self.assertMatchesRebuild()
+
+    @unittest.skipUnless(connection.features.has_select_for_update, "needs SELECT ... FOR UPDATE row locks")
+    def test_interleaved_trackers_do_not_drift(self):
+        pid = self.proposal.id
+        first_read = threading.Event()
+        errors = []
+
+        def run(body):
+            try:
+                body()
+            except Exception as exc:  # surfaced below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        def first():
+            with track_proposal_changes([pid]):
+                first_read.set()
+                # Give the second tracker time to take its before snapshot.
+                time.sleep(0.5)
+                Proposal.objects.filter(pk=pid).update(
+                    total_units=F("total_units") + 10, status=Proposal.Status.SUBMITTED
+                )
+
+        def second():
+            first_read.wait(5)
+            with track_proposal_changes([pid]):
+                Proposal.objects.filter(pk=pid).update(estimated_cost=Decimal("5000000"))
+
+        threads = [threading.Thread(target=run, args=(body,)) for body in (first, second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        self.assertMatchesRebuild()
@@ -0,0 +1,176 @@
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from proposals import events
+from proposals.models import Borough, Neighborhood, Proposal, ProposalUnitMix
+from proposals.queueing import BROKER_DOWN_KEY
+from proposals.tasks import calculate_feasibility_score, generate_financial_projections
+
+
+async def _drain(response):
+    return b"".join([chunk async for chunk in response.streaming_content])
+
+
+class EventLogTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_events_since_returns_newer_events_in_order(self):
+        for i in range(3):
+            events.publish(7, events.SCORE_READY, {"n": i})
+        events.publish(8, events.SCORE_READY, {"n": 99})
+        self.assertEqual([e["data"]["n"] for e in events.events_since(7, 0)], [0, 1, 2])
+        self.assertEqual([e["data"]["n"] for e in events.events_since(7, 2)], [2])
+        self.assertEqual(events.events_since(7, 3), [])
+
+    def test_backlog_is_capped_and_reset_sequence_is_replayed(self):
+        for i in range(events.MAX_BACKLOG + 5):
+            events.publish(7, events.SCORE_READY, {"n": i})
+        backlog = events.events_since(7, 0)
+        self.assertEqual(len(backlog), events.MAX_BACKLOG)
+        self.assertEqual(backlog[-1]["id"], events.MAX_BACKLOG + 5)
+
+        cache.clear()
+        events.publish(7, events.SCORE_READY, {"n": "fresh"})
+        self.assertEqual([e["data"]["n"] for e in events.events_since(7, 40)], ["fresh"])
+
+
+@override_settings(FEASIBILITY_SCORING_BACKEND="python", FINANCIAL_PROJECTION_BACKEND="python")
+class TaskEventTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create_user(username="planner", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+        )
+        self.proposal = Proposal.objects.create(
+            owner=user, neighborhood=hood, title="P", lot_size_sqft=Decimal("10000"),
+            total_units=10, estimated_cost=Decimal("4000000"),
+        )
+        ProposalUnitMix.objects.create(
+            proposal=self.proposal, unit_type="1br", count=10,
+            avg_sqft=Decimal("650"), projected_rent=Decimal("2500"),
+        )
+
+    def test_score_task_publishes_new_score(self):
+        calculate_feasibility_score(proposal_id=self.proposal.id)
+        [event] = events.events_since(self.proposal.id, 0)
+        self.assertEqual(event["type"], events.SCORE_READY)
+        self.assertEqual(event["data"], {"feasibility_score": "50.00"})
+
+    def test_projection_task_publishes_rows(self):
+        generate_financial_projections(proposal_id=self.proposal.id, years=3)
+        [event] = events.events_since(self.proposal.id, 0)
+        self.assertEqual(event["type"], events.PROJECTIONS_READY)
+        self.assertEqual(len(event["data"]["financial_projections"]), 3)
+        self.proposal.refresh_from_db()
+        self.assertEqual(event["data"]["projected_revenue"], str(self.proposal.projected_revenue))
+
+
+@override_settings(SHARED_CACHE=True)
+class TaskTrackingEndpointTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="planner", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+        )
+        self.proposal = Proposal.objects.create(
+            owner=self.user, neighborhood=hood, title="P",
+            lot_size_sqft=Decimal("10000"), total_units=10,
+        )
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    @patch("proposals.views.calculate_feasibility_score.delay")
+    def test_calculate_score_returns_task_links(self, delay):
+        delay.return_value = MagicMock(id="task-123")
+        events.publish(self.proposal.id, events.SCORE_READY, {"feasibility_score": "40.00"})
+        response = self.client.post(f"/api/proposals/{self.proposal.id}/calculate_score/")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["task_id"], "task-123")
+        self.assertTrue(response.data["status_url"].endswith("/api/tasks/task-123/"))
+        self.assertTrue(
+            response.data["events_url"].endswith(
+                f"/api/proposals/{self.proposal.id}/events/?last_event_id=1"
+            )
+        )
+
+    @patch("proposals.views.AsyncResult")
+    def test_task_status(self, async_result):
+        async_result.return_value = MagicMock(state="PROGRESS", info={"done": 2, "total": 5})
+        response = self.client.get("/api/tasks/abc/")
+        self.assertEqual(
+            response.data,
+            {"task_id": "abc", "state": "PROGRESS", "ready": False, "progress": {"done": 2, "total": 5}},
+        )
+
+        async_result.return_value = MagicMock(state="SUCCESS", info={"feasibility_score": "61.20"})
+        response = self.client.get("/api/tasks/abc/")
+        self.assertTrue(response.data["ready"])
+        self.assertEqual(response.data["result"], {"feasibility_score": "61.20"})
+
+        cache.set(BROKER_DOWN_KEY, True)
+        response = self.client.get("/api/tasks/abc/")
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def _assert_one_projection_frame(self, body):
+        frames = [f for f in body.split("\n\n") if f.startswith("id:")]
+        self.assertEqual(len(frames), 1)
+        self.assertIn("event: projections_ready", frames[0])
+        payload = json.loads(frames[0].split("data: ", 1)[1])
+        self.assertEqual(payload["data"], {"years": 10})
+
+    @override_settings(PROPOSAL_EVENTS_STREAM_S=0.05, PROPOSAL_EVENTS_POLL_S=0.01)
+    def test_event_stream_resumes_after_last_event_id(self):
+        url = f"/api/proposals/{self.proposal.id}/events/"
+        events.publish(self.proposal.id, events.SCORE_READY, {"feasibility_score": "40.00"})
+        events.publish(self.proposal.id, events.PROJECTIONS_READY, {"years": 10})
+
+        response = self.client.get(url, {"last_event_id": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        # WSGI gets a plain generator, which the server sends chunk by chunk.
+        self.assertFalse(response.is_async)
+        self._assert_one_projection_frame(b"".join(response.streaming_content).decode())
+
+        self.client.credentials()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(PROPOSAL_EVENTS_STREAM_S=0.05, PROPOSAL_EVENTS_POLL_S=0.01)
+    def test_event_stream_is_async_under_asgi(self):
+        events.publish(self.proposal.id, events.SCORE_READY, {"feasibility_score": "40.00"})
+        events.publish(self.proposal.id, events.PROJECTIONS_READY, {"years": 10})
+        token = Token.objects.get(user=self.user)
+        response = async_to_sync(AsyncClient().get)(
+            f"/api/proposals/{self.proposal.id}/events/", {"last_event_id": 1},
+            headers={"Authorization": f"Token {token.key}"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        self._assert_one_projection_frame(async_to_sync(_drain)(response).decode())
+
+    @override_settings(SHARED_CACHE=False)
+    @patch("proposals.views.calculate_feasibility_score.delay")
+    def test_events_need_a_shared_cache(self, delay):
+        delay.return_value = MagicMock(id="task-123")
+        response = self.client.post(f"/api/proposals/{self.proposal.id}/calculate_score/")
+        self.assertNotIn("events_url", response.data)
+        response = self.client.get(f"/api/proposals/{self.proposal.id}/events/")
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
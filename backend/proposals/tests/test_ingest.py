@@ -0,0 +1,231 @@
+import datetime
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from proposals.ingest import IngestError, ingest_file, zoning_category
+from proposals.models import (
+    Borough,
+    DemographicProfile,
+    IngestionWatermark,
+    MarketData,
+    Neighborhood,
+    ZoningDistrict,
+)
+
+
+@patch("proposals.ingest.invalidate_after_ingest")
+class IngestFileTest(TestCase):
+    def setUp(self):
+        self.bronx = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=self.bronx, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _csv(self, text):
+        path = Path(self.tmp.name) / "extract.csv"
+        path.write_text(text.strip() + "\n")
+        return path
+
+    def test_rents_upsert_in_chunks(self, invalidate):
+        path = self._csv("""
+Borough,Neighborhood,Period,Median_Rent,Median_Sale_Price,Vacancy_Rate_Pct
+BX,Mott Haven,2025-01-01,"2,100",650000,2.5
+Bronx,mott haven,2025-04-15,2150,655000,2.4
+2,Mott Haven,2025-07,2200,$660000,2.3
+BX,Nowhere,2025-01-01,2000,600000,3.0
+BX,Mott Haven,not-a-date,2000,600000,3.0
+""")
+        report = ingest_file("rents", path, chunk_size=2)
+        self.assertEqual((report.rows_read, report.rows_written, report.rows_skipped), (5, 3, 2))
+        self.assertEqual(report.chunks, 3)
+        self.assertEqual(MarketData.objects.count(), 3)
+        self.assertEqual(
+            MarketData.objects.get(period=datetime.date(2025, 4, 1)).median_rent, Decimal("2150.00")
+        )
+        invalidate.assert_called_once_with({self.hood.id}, reference=False)
+
+        # Re-running updates in place.
+        path.write_text(
+            "borough,neighborhood,period,median_rent,median_sale_price,vacancy_rate_pct\n"
+            "BX,Mott Haven,2025-01-01,2300,650000,2.5\n"
+        )
+        ingest_file("rents", path)
+        self.assertEqual(MarketData.objects.count(), 3)
+        self.assertEqual(
+            MarketData.objects.get(period=datetime.date(2025, 1, 1)).median_rent, Decimal("2300.00")
+        )
+        # Stored changes follow the upserted rents.
+        self.assertEqual(
+            MarketData.objects.get(period=datetime.date(2025, 4, 1)).rent_change_pct, Decimal("-6.52")
+        )
+
+    def test_demographics_keep_columns_missing_from_file(self, _invalidate):
+        DemographicProfile.objects.create(
+            neighborhood=self.hood, year=2024, population=50000, median_income=Decimal("30000"),
+            population_growth_pct=Decimal("1.0"), transit_score=Decimal("91.0"),
+        )
+        path = self._csv("""
+borough,neighborhood,year,population,median_income
+BX,Mott Haven,2024,52000,31000
+BX,Mott Haven,2025,53000,32000
+""")
+        ingest_file("demographics", path)
+        updated = DemographicProfile.objects.get(year=2024)
+        self.assertEqual(updated.population, 52000)
+        self.assertEqual(updated.transit_score, Decimal("91.0"))
+        self.assertEqual(DemographicProfile.objects.get(year=2025).transit_score, Decimal("50.0"))
+
+    def test_lots_aggregate_to_zoning_districts(self, invalidate):
+        path = self._csv("""
+borocode,neighborhood,zonedist1,residfar,commfar,numfloors
+2,Mott Haven,R7-1,3.44,0,6
+2,Mott Haven,R7-1,3.44,0,9
+2,Mott Haven,M1-4/R7A,4.0,2.0,5
+2,Mott Haven,PARK,0,0,0
+""".replace("borocode", "borough"))
+        report = ingest_file("lots", path)
+        self.assertEqual(report.rows_skipped, 1)
+        r7 = ZoningDistrict.objects.get(neighborhood=self.hood, code="R7-1")
+        self.assertEqual((r7.category, r7.max_far, r7.max_height_ft), ("residential", Decimal("3.44"), 90))
+        self.assertEqual(ZoningDistrict.objects.get(code="M1-4/R7A").category, "mixed")
+        self.assertTrue(invalidate.call_args.kwargs["reference"])
+
+    def test_permits_fill_existing_market_months(self, _invalidate):
+        MarketData.objects.create(
+            neighborhood=self.hood, period=datetime.date(2025, 1, 1),
+            median_sale_price=Decimal("650000"), median_rent=Decimal("2100"),
+            vacancy_rate_pct=Decimal("2.50"), permits_issued=0,
+        )
+        path = self._csv("""
+borough,neighborhood,issuance_date
+BX,Mott Haven,01/03/2025 12:00:00 AM
+BX,Mott Haven,2025-01-20T00:00:00.000
+BX,Mott Haven,2025-02-02
+""")
+        report = ingest_file("permits", path)
+        self.assertEqual(MarketData.objects.get().permits_issued, 2)
+        self.assertIn("1 neighborhood-months", report.errors[-1])
+
+    def test_neighborhoods_are_created_and_resolvable(self, _invalidate):
+        path = self._csv("""
+borough,neighborhood,latitude,longitude,area_sq_miles
+BX,Port Morris,40.8016,-73.9131,0.72
+BX,Mott Haven,40.809,-73.923,0.90
+""")
+        report = ingest_file("neighborhoods", path)
+        self.assertEqual(Neighborhood.objects.count(), 2)
+        self.assertEqual(Neighborhood.objects.get(name="Mott Haven").area_sq_miles, Decimal("0.90"))
+        self.assertEqual(len(report.neighborhood_ids), 2)
+
+    def test_dry_run_and_missing_columns(self, invalidate):
+        path = self._csv("borough,neighborhood,year\nBX,Mott Haven,2025\n")
+        with self.assertRaises(IngestError):
+            ingest_file("demographics", path)
+        path = self._csv("borough,neighborhood,year,population,median_income\nBX,Mott Haven,2025,1,2\n")
+        report = ingest_file("demographics", path, dry_run=True)
+        self.assertEqual(report.rows_written, 0)
+        self.assertFalse(DemographicProfile.objects.exists())
+        invalidate.assert_not_called()
+
+    def test_zoning_category(self, _invalidate):
+        self.assertEqual(zoning_category("c4-4a"), "commercial")
+        self.assertEqual(zoning_category("MX-1"), "mixed")
+        self.assertIsNone(zoning_category("BPC"))
+
+
+@patch("proposals.ingest.invalidate_after_ingest")
+class IncrementalIngestTest(TestCase):
+    HEADER = "borough,neighborhood,period,median_rent,median_sale_price,vacancy_rate_pct\n"
+
+    def setUp(self):
+        bronx = Borough.objects.create(name="Bronx", code="BX")
+        self.hoods = [
+            Neighborhood.objects.create(
+                borough=bronx, name=name,
+                latitude=Decimal("40.8"), longitude=Decimal("-73.9"),
+                area_sq_miles=Decimal("1.0"),
+            )
+            for name in ("Mott Haven", "Port Morris")
+        ]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "rents.csv"
+
+    def _write(self, rows):
+        self.path.write_text(self.HEADER + "".join(f"BX,{r}\n" for r in rows))
+
+    def test_only_changed_rows_are_written(self, invalidate):
+        rows = [
+            "Mott Haven,2025-01-01,2100,650000,2.5",
+            "Mott Haven,2025-04-01,2150,655000,2.4",
+            "Port Morris,2025-01-01,1900,600000,3.1",
+        ]
+        self._write(rows)
+        first = ingest_file("rents", self.path)
+        self.assertEqual(first.rows_written, 3)
+        self.assertEqual(first.high_water, "2025-04-01")
+
+        rows[1] = "Mott Haven,2025-04-01,2175,655000,2.4"
+        rows.append("Mott Haven,2025-07-01,2200,660000,2.3")
+        self._write(rows)
+        second = ingest_file("rents", self.path)
+        self.assertEqual((second.rows_written, second.rows_unchanged), (2, 2))
+        self.assertEqual(second.neighborhood_ids, {self.hoods[0].id})
+        invalidate.assert_called_with({self.hoods[0].id}, reference=False)
+
+        stored = MarketData.objects.get(neighborhood=self.hoods[0], period=datetime.date(2025, 4, 1))
+        self.assertEqual(stored.content_hash, stored.compute_content_hash())
+
+    def test_unchanged_file_is_skipped_until_forced(self, invalidate):
+        self._write(["Mott Haven,2025-01-01,2100,650000,2.5"])
+        ingest_file("rents", self.path)
+        watermark = IngestionWatermark.objects.get(source="rents")
+        self.assertEqual(watermark.high_water, "2025-01-01")
+
+        with self.assertNumQueries(1):
+            report = ingest_file("rents", self.path)
+        self.assertTrue(report.file_unchanged)
+        self.assertEqual(report.rows_read, 0)
+
+        forced = ingest_file("rents", self.path, force=True)
+        self.assertEqual((forced.rows_written, forced.rows_unchanged), (0, 1))
+        self.assertEqual(invalidate.call_count, 1)
+
+    def test_saved_rows_hash_like_ingested_rows(self, _invalidate):
+        MarketData.objects.create(
+            neighborhood=self.hoods[0], period=datetime.date(2025, 1, 1),
+            median_sale_price=Decimal("650000"), median_rent=Decimal("2100"),
+            vacancy_rate_pct=Decimal("2.5"), permits_issued=7,
+        )
+        # The file has no permits column, so the stored count is kept and the
+        # row is recognised as unchanged.
+        self._write(["Mott Haven,2025-01-01,2100.00,650000,2.50"])
+        report = ingest_file("rents", self.path)
+        self.assertEqual((report.rows_written, report.rows_unchanged), (0, 1))
+        self.assertEqual(MarketData.objects.get().permits_issued, 7)
+
+    def test_permits_only_rewrite_changed_counts(self, _invalidate):
+        for month in (1, 2):
+            MarketData.objects.create(
+                neighborhood=self.hoods[0], period=datetime.date(2025, month, 1),
+                median_sale_price=Decimal("650000"), median_rent=Decimal("2100"),
+                vacancy_rate_pct=Decimal("2.50"), permits_issued=1,
+            )
+        self.path.write_text(
+            "borough,neighborhood,issuance_date\n"
+            "BX,Mott Haven,2025-01-05\n"
+            "BX,Mott Haven,2025-02-05\n"
+            "BX,Mott Haven,2025-02-06\n"
+        )
+        report = ingest_file("permits", self.path)
+        self.assertEqual((report.rows_written, report.rows_unchanged), (1, 1))
+        february = MarketData.objects.get(period=datetime.date(2025, 2, 1))
+        self.assertEqual(february.content_hash, february.compute_content_hash())
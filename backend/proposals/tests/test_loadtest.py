@@ -0,0 +1,105 @@
+import json
+import os
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import TestCase, TransactionTestCase
+
+from config.llm import call_llm, call_llm_json
+from config.llm_stub import LatencyModel, StubConfig, start_stub_in_thread
+from proposals.loadtest import run_load_test
+from proposals.queue_benchmark import run_queue_benchmark
+from proposals.models import Borough, Neighborhood
+
+
+class LLMStubServerTest(TransactionTestCase):
+    def _start(self, **config):
+        server, base_url = start_stub_in_thread(config=StubConfig(seed=7, **config))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        env = patch.dict(os.environ, {"OPENAI_BASE_URL": base_url, "OPENAI_API_KEY": "stub"})
+        env.start()
+        self.addCleanup(env.stop)
+        return base_url
+
+    def test_chat_completion_reports_usage(self):
+        self._start()
+        response = call_llm("Draft a proposal", system_prompt="Write markdown.")
+        self.assertIn("Community Land Trust", response.text)
+        self.assertGreater(response.prompt_tokens, 0)
+        self.assertGreater(response.completion_tokens, 0)
+
+    def test_json_prompts_get_canned_critic(self):
+        self._start()
+        payload = call_llm_json("Review this.", system_prompt="Respond with a JSON object.")
+        self.assertIn("overall_score", payload)
+
+    @patch.dict(os.environ, {"LLM_MAX_RETRIES": "0"})
+    def test_error_injection(self):
+        self._start(rate_500=1.0)
+        with self.assertRaises(requests.HTTPError):
+            call_llm("hi")
+
+    def test_streaming(self):
+        base_url = self._start()
+        resp = requests.post(
+            f"{base_url}/chat/completions",
+            json={"model": "m", "stream": True, "messages": [{"role": "user", "content": "hi"}]},
+            stream=True, timeout=5,
+        )
+        events = [
+            line[len(b"data: "):] for line in resp.iter_lines() if line.startswith(b"data: ")
+        ]
+        self.assertEqual(events[-1], b"[DONE]")
+        text = "".join(
+            json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1]
+        )
+        self.assertIn("Community Land Trust", text)
+
+    def test_latency_spec_parsing(self):
+        self.assertEqual(LatencyModel.parse("uniform:100,400").params, [100.0, 400.0])
+        with self.assertRaises(ValueError):
+            LatencyModel.parse("gamma:1")
+
+    @patch("analytics.tasks.refresh_neighborhood_rankings.apply_async", MagicMock())
+    def test_load_test_drives_pipeline(self):
+        self._start()
+        borough = Borough.objects.create(name="Queens", code="QN")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Astoria",
+            latitude=Decimal("40.772"), longitude=Decimal("-73.930"),
+            area_sq_miles=Decimal("2.68"),
+        )
+        report = run_load_test(neighborhoods=[hood], total_runs=4, concurrency=2)
+        summary = report.summary()
+        self.assertEqual(summary["errors"], 0)
+        self.assertEqual(len(report.latencies_ms), 4)
+        self.assertEqual(summary["steps"]["draft"]["calls"], 4)
+
+
+class QueueBenchmarkTest(TestCase):
+    def test_reports_idle_and_loaded_latency(self):
+        probes = MagicMock()
+        swept = [MagicMock(**{"ready.return_value": i % 2 == 0}) for i in range(6)]
+        report = run_queue_benchmark(
+            probe=lambda: probes,
+            sweep=iter(swept).__next__,
+            samples=4,
+            sweep_size=6,
+            interval_s=0,
+        )
+        self.assertEqual(probes.get.call_count, 8)
+        summary = report.summary()
+        self.assertEqual(summary["idle"]["samples"], 4)
+        self.assertEqual(summary["under_llm_sweep"]["samples"], 4)
+        self.assertEqual(summary["sweep_pending"], 3)
+
+    def test_timeouts_count_as_errors(self):
+        probe = MagicMock(**{"return_value.get.side_effect": TimeoutError("slow")})
+        report = run_queue_benchmark(
+            probe=probe, sweep=MagicMock, samples=2, sweep_size=1, interval_s=0
+        )
+        self.assertEqual(report.errors, 4)
+        self.assertIsNone(report.summary()["idle"]["p50_ms"])
+        self.assertIn("TimeoutError", report.error_samples[0])
@@ -0,0 +1,81 @@
+import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from proposals.caching import local_cache
+from proposals.market_changes import compute_changes, pct_change, recompute_market_changes
+from proposals.models import Borough, MarketData, Neighborhood
+
+
+class ChangeMathTest(SimpleTestCase):
+    def test_pct_change(self):
+        self.assertEqual(pct_change(Decimal("2150"), Decimal("2100")), Decimal("2.38"))
+        self.assertEqual(pct_change(Decimal("1.005"), Decimal("1")), Decimal("0.50"))
+        self.assertIsNone(pct_change(Decimal("2100"), None))
+        self.assertIsNone(pct_change(Decimal("2100"), Decimal("0")))
+        self.assertIsNone(pct_change(Decimal("5000000"), Decimal("1")))
+
+    def test_year_over_year_matches_same_period(self):
+        periods = [datetime.date(2024, m, 1) for m in (1, 4, 7, 10)] + [datetime.date(2025, 4, 1)]
+        rows = [(i, p, Decimal(100 + i), Decimal(1000 + 10 * i)) for i, p in enumerate(periods)]
+        changes = dict(compute_changes(rows))
+        self.assertEqual(changes[0], (None, None, None, None))
+        self.assertEqual(changes[1][:2], (Decimal("1.00"), Decimal("1.00")))
+        # 2025-04 follows 2024-10 but compares year over year with 2024-04.
+        self.assertEqual(changes[4], (Decimal("0.97"), Decimal("0.97"), Decimal("2.97"), Decimal("2.97")))
+
+
+class StoredChangesTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear_local()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear_local)
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hoods = [
+            Neighborhood.objects.create(
+                borough=borough, name=name,
+                latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+            )
+            for name in ("Mott Haven", "Melrose")
+        ]
+        for hood in self.hoods:
+            for year, price, rent in ((2024, "600000", "2000"), (2025, "630000", "2100")):
+                self._market(hood, datetime.date(year, 1, 1), price, rent)
+
+    def _market(self, hood, period, price, rent):
+        return MarketData.objects.create(
+            neighborhood=hood, period=period,
+            median_sale_price=Decimal(price), median_rent=Decimal(rent),
+            vacancy_rate_pct=Decimal("3.00"), permits_issued=5,
+        )
+
+    def test_saves_and_deletes_maintain_changes(self):
+        latest = MarketData.objects.get(neighborhood=self.hoods[0], period__year=2025)
+        self.assertEqual(
+            (latest.price_change_pct, latest.rent_change_pct, latest.price_change_yoy_pct),
+            (Decimal("5.00"), Decimal("5.00"), Decimal("5.00")),
+        )
+
+        # A back-filled period shifts the previous-period change only.
+        self._market(self.hoods[0], datetime.date(2024, 7, 1), "610000", "2050")
+        latest.refresh_from_db()
+        self.assertEqual(latest.rent_change_pct, Decimal("2.44"))
+        self.assertEqual(latest.rent_change_yoy_pct, Decimal("5.00"))
+
+        MarketData.objects.get(neighborhood=self.hoods[0], period__year=2024, period__month=1).delete()
+        latest.refresh_from_db()
+        self.assertIsNone(latest.rent_change_yoy_pct)
+        self.assertEqual(recompute_market_changes(), 0)
+
+    def test_trend_endpoint_reads_stored_columns(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                "/api/analytics/market-trends/", {"neighborhood_id": self.hoods[1].id}
+            )
+        rows = sorted(response.data["results"], key=lambda r: r["period"])
+        self.assertEqual([r["rent_change_pct"] for r in rows], [None, "5.00"])
+        self.assertEqual(rows[1]["rent_change_yoy_pct"], "5.00")
@@ -0,0 +1,150 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from analytics.market_series import borough_rollup, cagr_pct, rolling_mean, yoy_pct
+from proposals.caching import local_cache
+from proposals.models import Borough, MarketData, Neighborhood
+
+
+def _quarters(first_year, years):
+    return [datetime.date(year, month, 1) for year in range(first_year, first_year + years) for month in (1, 4, 7, 10)]
+
+
+class SeriesMathTest(SimpleTestCase):
+    periods = np.array(_quarters(2023, 2), dtype="datetime64[D]")
+
+    def test_rolling_mean_needs_a_full_window(self):
+        matrix = np.array([[1, 2, 3, 4, np.nan, 6, 7, 8]], dtype=float)
+        out = rolling_mean(matrix, 2)
+        np.testing.assert_array_equal(out[0], [np.nan, 1.5, 2.5, 3.5, np.nan, np.nan, 6.5, 7.5])
+        self.assertTrue(np.isnan(rolling_mean(matrix, 9)).all())
+
+    def test_yoy_matches_the_same_quarter_a_year_earlier(self):
+        matrix = np.array([[100, 100, 100, 0, 110, np.nan, 90, 50]], dtype=float)
+        out = yoy_pct(matrix, self.periods)
+        self.assertTrue(np.isnan(out[0, :4]).all())
+        # 0 -> 50 and the missing quarter have no defined change.
+        np.testing.assert_array_equal(out[0, 4:], [10.0, np.nan, -10.0, np.nan])
+
+    def test_yoy_skips_periods_missing_from_the_axis(self):
+        periods = np.array(["2023-01-01", "2023-07-01", "2024-04-01"], dtype="datetime64[D]")
+        self.assertTrue(np.isnan(yoy_pct(np.array([[1.0, 2.0, 3.0]]), periods)).all())
+
+    def test_cagr_uses_first_and_last_present_values(self):
+        periods = np.array(["2020-01-01", "2021-01-01", "2022-01-01"], dtype="datetime64[D]")
+        matrix = np.array([[100, 110, 121], [np.nan, 100, np.nan], [np.nan, np.nan, np.nan]], dtype=float)
+        out = cagr_pct(matrix, periods)
+        self.assertAlmostEqual(out[0], 10.0, places=1)
+        self.assertTrue(np.isnan(out[1:]).all())
+
+    def test_borough_rollup_averages_reporting_neighborhoods(self):
+        matrix = np.array([[1, np.nan], [3, 5], [10, np.nan]], dtype=float)
+        out = borough_rollup(matrix, np.array([0, 0, 1]), 2)
+        np.testing.assert_array_equal(out, [[2, 5], [10, np.nan]])
+
+
+class MarketSeriesEndpointTest(APITestCase):
+    url = "/api/analytics/market-series/"
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear_local()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear_local)
+        self.hoods = []
+        for code, name, count in (("BK", "Brooklyn", 2), ("QN", "Queens", 1)):
+            borough = Borough.objects.create(name=name, code=code)
+            for i in range(count):
+                self.hoods.append(Neighborhood.objects.create(
+                    borough=borough, name=f"{name} {i}",
+                    latitude=Decimal("40.7"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+                ))
+        rows = []
+        for h, hood in enumerate(self.hoods):
+            for q, period in enumerate(_quarters(2023, 2)):
+                if h == 2 and q == 0:
+                    continue  # Queens reports from the second quarter only.
+                rows.append(MarketData(
+                    neighborhood=hood, period=period,
+                    median_sale_price=Decimal(500000 + 10000 * q + 100000 * h),
+                    median_rent=Decimal(2000 + 100 * h), vacancy_rate_pct=Decimal("5.00"),
+                    permits_issued=q,
+                ))
+        MarketData.objects.bulk_create(rows)
+
+    def test_series_for_selected_neighborhoods(self):
+        ids = ",".join(str(h.id) for h in self.hoods)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"{self.url}?neighborhoods={ids}&metrics=median_sale_price&window=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        data = response.json()
+        self.assertEqual(len(data["periods"]), 8)
+        self.assertEqual(data["periods"][0], "2023-01-01")
+        self.assertEqual([h["name"] for h in data["neighborhoods"]], ["Brooklyn 0", "Brooklyn 1", "Queens 0"])
+
+        brooklyn_0 = data["neighborhoods"][0]["median_sale_price"]
+        self.assertEqual(brooklyn_0["values"][:2], [500000.0, 510000.0])
+        self.assertEqual(brooklyn_0["rolling_mean"][:2], [None, 505000.0])
+        self.assertEqual(brooklyn_0["yoy_pct"][4], 8.0)
+        self.assertNotIn("median_rent", data["neighborhoods"][0])
+        queens = data["neighborhoods"][2]["median_sale_price"]
+        self.assertIsNone(queens["values"][0])
+
+        boroughs = {b["code"]: b for b in data["boroughs"]}
+        self.assertEqual(boroughs["BK"]["neighborhood_count"], 2)
+        self.assertEqual(boroughs["BK"]["median_sale_price"]["values"][0], 550000.0)
+        self.assertIsNone(boroughs["QN"]["median_sale_price"]["values"][0])
+
+    def test_borough_selection_and_date_bounds(self):
+        response = self.client.get(f"{self.url}?borough=bk&start=2024-01-01")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["neighborhoods"]), 2)
+        self.assertEqual(data["periods"][0], "2024-01-01")
+        self.assertEqual(data["metrics"], ["median_sale_price", "median_rent"])
+
+    def test_rejects_bad_parameters(self):
+        for query in ("", "neighborhoods=a", "borough=BK&metrics=cost", "borough=BK&window=0", "borough=BK&start=2024"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"{self.url}?{query}").status_code, 400)
+        self.assertEqual(self.client.get(f"{self.url}?borough=XX").status_code, 404)
+
+
+class MarketSeriesScaleTest(APITestCase):
+    def test_fifty_neighborhoods_over_twenty_years(self):
+        borough = Borough.objects.create(name="Brooklyn", code="BK")
+        hoods = Neighborhood.objects.bulk_create(
+            Neighborhood(
+                borough=borough, name=f"Hood {i:02d}",
+                latitude=Decimal("40.7"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+            )
+            for i in range(50)
+        )
+        periods = _quarters(2006, 20)
+        MarketData.objects.bulk_create(
+            MarketData(
+                neighborhood=hood, period=period,
+                median_sale_price=Decimal(400000 + 1000 * q), median_rent=Decimal(1500 + 10 * q),
+                vacancy_rate_pct=Decimal("4.00"), permits_issued=10,
+            )
+            for hood in hoods
+            for q, period in enumerate(periods)
+        )
+        ids = ",".join(str(h.id) for h in hoods)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/analytics/market-series/?neighborhoods={ids}")
+        self.assertEqual(len(ctx.captured_queries), 2)
+        data = response.json()
+        self.assertEqual(len(data["neighborhoods"]), 50)
+        self.assertEqual(len(data["periods"]), 80)
+        rent = data["boroughs"][0]["median_rent"]
+        self.assertEqual(rent["values"][-1], 2290.0)
+        self.assertEqual(rent["rolling_mean"][-1], 2275.0)
@@ -0,0 +1,155 @@
+import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from proposals.caching import local_cache
+from proposals.models import (
+    Borough,
+    DemographicProfile,
+    MarketData,
+    Neighborhood,
+    ZoningDistrict,
+)
+from proposals.nyc_data import (
+    get_neighborhood_site_context,
+    get_site_contexts,
+    refresh_site_contexts,
+)
+
+
+class SiteContextTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear_local()
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hoods = []
+        for i in range(5):
+            hood = Neighborhood.objects.create(
+                borough=borough, name=f"Hood {i}",
+                latitude=Decimal("40.8"), longitude=Decimal("-73.9"),
+                area_sq_miles=Decimal("1.0"),
+            )
+            self.hoods.append(hood)
+            if i == 4:
+                continue  # no data rows at all
+            for code, category in (("R7-1", "residential"), ("C4-4", "commercial")):
+                ZoningDistrict.objects.create(
+                    neighborhood=hood, code=code, category=category,
+                    max_far=Decimal("3.44") + i, max_height_ft=80 + i,
+                )
+            for month in (1, 6):
+                MarketData.objects.create(
+                    neighborhood=hood, period=datetime.date(2025, month, 1),
+                    median_sale_price=Decimal("700000") + month, median_rent=Decimal("2400"),
+                    vacancy_rate_pct=Decimal("3.10"), permits_issued=10 + month,
+                )
+            for year in (2023, 2024):
+                DemographicProfile.objects.create(
+                    neighborhood=hood, year=year, population=50000 + year,
+                    median_income=Decimal("42000"), population_growth_pct=Decimal("1.2"),
+                    transit_score=Decimal("88.0"),
+                )
+
+    def tearDown(self):
+        cache.clear()
+        local_cache.clear_local()
+
+    def test_bulk_matches_single(self):
+        bulk = get_site_contexts([h.id for h in self.hoods])
+        cache.clear()
+        local_cache.clear_local()
+        for hood in self.hoods:
+            self.assertEqual(bulk[hood.id], get_neighborhood_site_context(hood))
+        self.assertEqual(bulk[self.hoods[0].id]["market"]["period"], "2025-06-01")
+        self.assertEqual(bulk[self.hoods[0].id]["demographics"]["year"], 2024)
+        self.assertIsNone(bulk[self.hoods[4].id]["market"]["period"])
+
+    def test_query_count_is_independent_of_size(self):
+        with self.assertNumQueries(4):
+            get_site_contexts([h.id for h in self.hoods])
+        with self.assertNumQueries(0):
+            contexts = get_site_contexts([h.id for h in self.hoods])
+        self.assertEqual(len(contexts), 5)
+
+    def test_fills_only_misses_and_skips_unknown_ids(self):
+        get_neighborhood_site_context(self.hoods[0])
+        contexts = get_site_contexts([self.hoods[0].id, self.hoods[1].id, 999999])
+        self.assertEqual(set(contexts), {self.hoods[0].id, self.hoods[1].id})
+        self.assertIsNotNone(cache.get(f"nyc_site_ctx:{self.hoods[1].id}"))
+
+
+@patch("analytics.tasks.refresh_neighborhood_rankings.apply_async", MagicMock())
+@patch("proposals.tasks.rebuild_site_contexts.apply_async")
+class SiteContextInvalidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear_local()
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+        self.key = f"nyc_site_ctx:{self.hood.id}"
+
+    def tearDown(self):
+        cache.clear()
+        local_cache.clear_local()
+
+    def _add_market(self, month):
+        return MarketData.objects.create(
+            neighborhood=self.hood, period=datetime.date(2025, month, 1),
+            median_sale_price=Decimal("650000"), median_rent=Decimal("2100"),
+            vacancy_rate_pct=Decimal("2.50"), permits_issued=month,
+        )
+
+    def test_change_invalidates_after_commit_and_queues_one_rebuild(self, apply_async):
+        get_neighborhood_site_context(self.hood)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self._add_market(1)
+            self._add_market(2)
+        self.assertIsNotNone(cache.get(self.key))  # untouched until commit
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(self.key))
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs["args"], [[self.hood.id]])
+
+        self.assertEqual(refresh_site_contexts([self.hood.id]), 1)
+        self.assertEqual(cache.get(self.key)["market"]["period"], "2025-02-01")
+
+    def test_delete_and_other_sources_trigger_rebuild(self, apply_async):
+        row = self._add_market(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            ZoningDistrict.objects.create(
+                neighborhood=self.hood, code="R6", category="residential",
+                max_far=Decimal("2.43"), max_height_ft=70,
+            )
+        # The second change is debounced behind the first pending rebuild.
+        apply_async.assert_called_once()
+        refresh_site_contexts([self.hood.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            DemographicProfile.objects.create(
+                neighborhood=self.hood, year=2024, population=50000,
+                median_income=Decimal("30000"), population_growth_pct=Decimal("1.0"),
+                transit_score=Decimal("90.0"),
+            )
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_broker_failure_leaves_entry_for_lazy_rebuild(self, apply_async):
+        apply_async.side_effect = ConnectionError("broker down")
+        get_neighborhood_site_context(self.hood)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_market(3)
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(
+            get_neighborhood_site_context(self.hood)["market"]["period"], "2025-03-01"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_market(4)
+        apply_async.assert_called_once()  # not retried while the broker is down
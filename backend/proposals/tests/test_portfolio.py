@@ -0,0 +1,134 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from analytics.models import PortfolioCell, ProposalDashboardSummary
+from analytics.portfolio import MEASURES, portfolio_rollup, rebuild_portfolio
+from proposals.models import Borough, Neighborhood, Proposal, ProposalUnitMix
+from proposals.scoring import write_scores
+
+UNIT_TYPES = ProposalUnitMix.UnitType.values
+STATUSES = Proposal.Status.values
+
+
+def _cells():
+    """Non-empty cells; emptied cells must be all zeros."""
+    cells = {}
+    for cell in PortfolioCell.objects.all():
+        measures = tuple(getattr(cell, column) for column in MEASURES)
+        if cell.total_proposals:
+            cells[(cell.neighborhood_id, cell.status, cell.unit_type)] = measures
+        else:
+            assert not any(measures), cell
+    return cells
+
+
+class PortfolioCubeTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", password="pass1234")
+        self.hoods = []
+        for name, code in (("Bronx", "BX"), ("Brooklyn", "BK")):
+            borough = Borough.objects.create(name=name, code=code)
+            for i in range(2):
+                self.hoods.append(Neighborhood.objects.create(
+                    borough=borough, name=f"{name} {i}",
+                    latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+                ))
+
+    def _proposal(self, rng):
+        proposal = Proposal.objects.create(
+            owner=self.user, neighborhood=rng.choice(self.hoods), title="P",
+            status=rng.choice(STATUSES), lot_size_sqft=Decimal("10000"),
+            total_units=rng.randint(10, 200),
+            estimated_cost=rng.choice([None, Decimal(rng.randint(1, 9) * 1_000_000)]),
+        )
+        for unit_type in rng.sample(UNIT_TYPES, rng.randint(0, 3)):
+            ProposalUnitMix.objects.create(
+                proposal=proposal, unit_type=unit_type, count=rng.randint(1, 10),
+                avg_sqft=Decimal("700"), projected_rent=Decimal("2500"),
+            )
+        return proposal
+
+    def assertMatchesRebuild(self):
+        maintained = _cells()
+        rebuild_portfolio()
+        self.assertEqual(maintained, _cells())
+
+    def test_deltas_match_rebuild(self):
+        rng = random.Random(50)
+        proposals = [self._proposal(rng) for _ in range(15)]
+        self.assertMatchesRebuild()
+
+        for proposal in proposals[:6]:
+            proposal.status = rng.choice(STATUSES)
+            proposal.neighborhood = rng.choice(self.hoods)
+            proposal.projected_revenue = Decimal(rng.randint(1, 5) * 100_000)
+            proposal.save()
+        mix = ProposalUnitMix.objects.order_by("id").first()
+        mix.count += 5
+        mix.unit_type = next(t for t in UNIT_TYPES if not mix.proposal.unit_mix.filter(unit_type=t).exists())
+        mix.save()
+        proposals[7].unit_mix.all().delete()
+        proposals[8].delete()
+        Proposal.objects.filter(id__in=[p.id for p in proposals[9:11]]).delete()
+        write_scores({p.id: Decimal(rng.randint(0, 100)) for p in proposals[11:]})
+        self.assertMatchesRebuild()
+
+    def test_rollups_match_dashboard_view(self):
+        rng = random.Random(7)
+        for _ in range(12):
+            self._proposal(rng)
+        write_scores({p.id: Decimal(rng.randint(0, 100)) for p in Proposal.objects.all()[:8]})
+
+        rows = {row["borough_name"]: row for row in portfolio_rollup(["borough"])}
+        for summary in ProposalDashboardSummary.objects.all():
+            row = rows[summary.borough_name]
+            self.assertEqual(
+                (row["total_proposals"], row["total_units"], row["total_estimated_cost"],
+                 row["total_projected_revenue"], row["avg_feasibility_score"]),
+                (summary.total_proposals, summary.total_units, summary.total_estimated_cost,
+                 summary.total_projected_revenue, summary.avg_feasibility_score),
+            )
+
+        # Drilling into unit types counts a proposal once per type it has.
+        by_type = portfolio_rollup(["borough", "unit_type"], borough="bk")
+        for row in by_type:
+            mixes = ProposalUnitMix.objects.filter(
+                proposal__neighborhood__borough__code="BK", unit_type=row["unit_type"]
+            )
+            self.assertEqual(row["total_proposals"], mixes.count())
+            self.assertEqual(row["total_units"], sum(mixes.values_list("count", flat=True)))
+
+        (total,) = portfolio_rollup([])
+        self.assertEqual(total["total_proposals"], Proposal.objects.count())
+
+    def test_endpoint_reads_only_the_cube(self):
+        rng = random.Random(3)
+        for _ in range(6):
+            self._proposal(rng)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/analytics/portfolio/?group_by=borough,status,unit_type")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("proposals_proposal", ctx.captured_queries[0]["sql"])
+        data = response.json()
+        self.assertEqual(data["group_by"], ["borough", "status", "unit_type"])
+        self.assertTrue(data["results"])
+        self.assertEqual(
+            set(data["results"][0]),
+            {"borough", "borough_name", "status", "unit_type", "total_proposals", "total_units",
+             "total_estimated_cost", "total_projected_revenue", "avg_feasibility_score"},
+        )
+
+        response = self.client.get(f"/api/analytics/portfolio/?group_by=&neighborhood={self.hoods[0].id}")
+        self.assertEqual(response.status_code, 200)
+        expected = Proposal.objects.filter(neighborhood=self.hoods[0]).count()
+        self.assertEqual(sum(r["total_proposals"] for r in response.json()["results"]), expected)
+
+        for query in ("group_by=owner", "status=pending", "unit_type=5br", "neighborhood=x"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/analytics/portfolio/?{query}").status_code, 400)
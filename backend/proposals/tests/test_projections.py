@@ -0,0 +1,302 @@
+import random
+import time
+import unittest
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from proposals.models import (
+    Borough,
+    FinancialProjection,
+    Neighborhood,
+    Proposal,
+    ProposalUnitMix,
+)
+from proposals.projections import (
+    ProjectionAssumptions,
+    SensitivityAssumptions,
+    Uncertainty,
+    generate_projections,
+    project,
+    simulate,
+)
+from proposals.tasks import generate_financial_projections, regenerate_projections
+
+CENT = Decimal("0.01")
+
+
+def reference_projection(annual_revenue, estimated_cost, years):
+    """Decimal transliteration of sp_GenerateFinancialProjections."""
+    rows = []
+    running = Decimal("0")
+    for yr in range(1, years + 1):
+        revenue_factor = (Decimal("1.03") ** (yr - 1)).quantize(Decimal("0.0001"), ROUND_HALF_UP)
+        expense_factor = (Decimal("1.025") ** (yr - 1)).quantize(Decimal("0.0001"), ROUND_HALF_UP)
+        revenue = (annual_revenue * revenue_factor).quantize(CENT, ROUND_HALF_UP)
+        expenses = annual_revenue * Decimal("0.35") * expense_factor
+        if yr == 1:
+            expenses += estimated_cost
+        expenses = expenses.quantize(CENT, ROUND_HALF_UP)
+        running += revenue - expenses
+        roi = (running / estimated_cost * 100).quantize(CENT, ROUND_HALF_UP)
+        rows.append((yr, revenue, expenses, revenue - expenses, roi))
+    return rows
+
+
+class ProjectionEngineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+        )
+
+    def _proposal(self, cost, mix=()):
+        proposal = Proposal.objects.create(
+            owner=self.user, neighborhood=self.hood, title="P",
+            lot_size_sqft=Decimal("10000"), total_units=sum(c for _t, c, _r in mix) or 1,
+            estimated_cost=cost,
+        )
+        for unit_type, count, rent in mix:
+            ProposalUnitMix.objects.create(
+                proposal=proposal, unit_type=unit_type, count=count,
+                avg_sqft=Decimal("650"), projected_rent=rent,
+            )
+        return proposal
+
+    def test_matches_procedure_to_the_cent(self):
+        rng = random.Random(11)
+        proposals = [
+            self._proposal(
+                Decimal(rng.randrange(1_000_000, 90_000_000)) + Decimal(rng.randrange(100)) / 100,
+                [
+                    ("studio", rng.randint(1, 60), Decimal(rng.randrange(90000, 400000)) / 100),
+                    ("2br", rng.randint(0, 40), Decimal(rng.randrange(150000, 600000)) / 100),
+                ],
+            )
+            for _ in range(25)
+        ]
+        result = generate_projections([p.id for p in proposals], years=30)
+        self.assertEqual((result["proposals"], result["rows"]), (25, 750))
+
+        for proposal in proposals:
+            annual = sum(m.count * m.projected_rent * 12 for m in proposal.unit_mix.all())
+            expected = reference_projection(annual, proposal.estimated_cost, 30)
+            stored = list(
+                FinancialProjection.objects.filter(proposal=proposal).values_list(
+                    "year", "revenue", "expenses", "net_income", "cumulative_roi"
+                )
+            )
+            self.assertEqual(stored, expected)
+            proposal.refresh_from_db()
+            self.assertEqual(proposal.projected_revenue, sum(row[1] for row in expected))
+
+    def test_replaces_rows_and_skips_invalid_proposals(self):
+        good = self._proposal(Decimal("5000000"), [("1br", 10, Decimal("2500"))])
+        no_cost = self._proposal(None, [("1br", 10, Decimal("2500"))])
+        no_mix = self._proposal(Decimal("5000000"))
+        generate_projections([good.id], years=10)
+
+        # load, savepoint, delete, bulk insert, bulk update between the
+        # dashboard and cube reads (2 each), aggregate update, cell lookup,
+        # cell update, release
+        with self.assertNumQueries(13):
+            result = generate_projections([good.id, no_cost.id, no_mix.id, 999999], years=5)
+        self.assertEqual(
+            result["skipped"], {no_cost.id: "missing cost estimate", no_mix.id: "no unit mix defined"}
+        )
+        self.assertEqual(FinancialProjection.objects.filter(proposal=good).count(), 5)
+        self.assertFalse(FinancialProjection.objects.exclude(proposal=good).exists())
+
+    def test_assumption_arrays_broadcast(self):
+        growth = [0.0, 0.03, 0.05]
+        result = project(
+            120000.0, 1_000_000.0, years=3,
+            assumptions=ProjectionAssumptions(revenue_growth=growth), sql_rounding=False,
+        )
+        self.assertEqual(result.revenue.shape, (3, 3))
+        self.assertAlmostEqual(result.revenue[2, 2], 120000 * 1.05 ** 2)
+        self.assertTrue((result.expenses[:, 0] == result.expenses[0, 0]).all())
+
+    def test_portfolio_reprojection_is_fast(self):
+        proposals = [
+            self._proposal(Decimal("8000000"), [("2br", 20 + i % 7, Decimal("3100"))])
+            for i in range(300)
+        ]
+        started = time.perf_counter()
+        result = regenerate_projections(years=30, assumptions={"revenue_growth": 0.02})
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertEqual(result["rows"], 300 * 30)
+        year_two = FinancialProjection.objects.get(proposal=proposals[0], year=2)
+        self.assertEqual(year_two.revenue, Decimal("20") * 3100 * 12 * Decimal("1.02"))
+
+    @override_settings(FINANCIAL_PROJECTION_BACKEND="python")
+    def test_task_uses_python_engine(self):
+        proposal = self._proposal(Decimal("3000000"), [("studio", 12, Decimal("1800"))])
+        self.assertEqual(
+            generate_financial_projections(proposal_id=proposal.id, years=7),
+            {"proposal_id": proposal.id, "years": 7},
+        )
+        self.assertEqual(proposal.financial_projections.count(), 7)
+
+    @unittest.skipUnless(connection.vendor == "microsoft", "sp_GenerateFinancialProjections needs SQL Server")
+    def test_parity_with_stored_procedure(self):
+        proposal = self._proposal(Decimal("12345678.90"), [("3br", 17, Decimal("4321.09"))])
+        generate_projections([proposal.id], years=40)
+        python_rows = list(proposal.financial_projections.values_list(
+            "year", "revenue", "expenses", "net_income", "cumulative_roi"
+        ))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXEC sp_GenerateFinancialProjections @proposal_id = %s, @projection_years = %s",
+                [proposal.id, 40],
+            )
+        procedure_rows = list(proposal.financial_projections.values_list(
+            "year", "revenue", "expenses", "net_income", "cumulative_roi"
+        ))
+        self.assertEqual(python_rows, procedure_rows)
+
+
+class SensitivitySimulationTest(TestCase):
+    def test_collapsed_distributions_reproduce_projection(self):
+        fixed = SensitivityAssumptions(
+            rent_growth=Uncertainty(0.03, 0.0, -1, 1),
+            expense_inflation=Uncertainty(0.025, 0.0, -1, 1),
+            vacancy=Uncertainty(0.0, 0.0, 0, 1),
+            construction_overrun=Uncertainty(0.0, 0.0, -1, 1),
+        )
+        result = simulate(480000.0, 6_000_000.0, years=12, scenarios=50, assumptions=fixed)
+        expected = project(480000.0, 6_000_000.0, 12, sql_rounding=False)
+        for band, net, roi in zip(result["bands"], expected.net_income, expected.cumulative_roi):
+            self.assertEqual(set(band["net_income"].values()), {round(net, 2)})
+            self.assertEqual(set(band["cumulative_roi"].values()), {round(roi, 2)})
+
+    def test_bands_are_ordered_and_seeded(self):
+        first = simulate(600000.0, 7_500_000.0, years=30, seed=7)
+        self.assertEqual(first, simulate(600000.0, 7_500_000.0, years=30, seed=7))
+        self.assertEqual(len(first["bands"]), 30)
+        for band in first["bands"]:
+            for metric in ("net_income", "cumulative_roi"):
+                self.assertLessEqual(band[metric]["p10"], band[metric]["p50"])
+                self.assertLessEqual(band[metric]["p50"], band[metric]["p90"])
+        self.assertLess(first["bands"][0]["net_income"]["p90"], 0)  # construction year
+        self.assertTrue(0 <= first["probability_of_payback"] <= 1)
+
+    def test_ten_thousand_scenarios_over_thirty_years_is_fast(self):
+        simulate(600000.0, 7_500_000.0, years=30, scenarios=10_000)  # warm up
+        started = time.perf_counter()
+        simulate(600000.0, 7_500_000.0, years=30, scenarios=10_000)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+
+class SimulateProjectionsEndpointTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="lender", password="pass1234")
+        borough = Borough.objects.create(name="Queens", code="QN")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Astoria",
+            latitude=Decimal("40.76"), longitude=Decimal("-73.92"), area_sq_miles=Decimal("2.0"),
+        )
+        self.proposal = Proposal.objects.create(
+            owner=user, neighborhood=hood, title="Astoria Yards",
+            lot_size_sqft=Decimal("12000"), total_units=40, estimated_cost=Decimal("14000000"),
+        )
+        ProposalUnitMix.objects.create(
+            proposal=self.proposal, unit_type="1br", count=40,
+            avg_sqft=Decimal("700"), projected_rent=Decimal("3200"),
+        )
+        self.url = f"/api/proposals/{self.proposal.id}/simulate-projections/"
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+
+    def test_returns_percentile_bands(self):
+        response = self.client.post(
+            self.url,
+            {"years": 20, "scenarios": 2000, "seed": 1, "vacancy": {"mean": 0.1, "std": 0.02}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["scenarios"], 2000)
+        self.assertEqual(len(response.data["bands"]), 20)
+        self.assertEqual(set(response.data["bands"][-1]["cumulative_roi"]), {"p10", "p50", "p90"})
+        self.assertFalse(self.proposal.financial_projections.exists())
+
+    def test_rejects_unprojectable_proposal_and_bad_input(self):
+        response = self.client.post(self.url, {"scenarios": 10**7}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        Proposal.objects.filter(pk=self.proposal.pk).update(estimated_cost=None)
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("missing cost estimate", response.data["detail"])
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class WhatIfEndpointTest(APITestCase):
+    url = "/api/proposals/what-if/"
+    payload = {
+        "unit_mix": [
+            {"unit_type": "studio", "count": 12, "projected_rent": "1850.00"},
+            {"unit_type": "2br", "count": 8, "projected_rent": "3400.00"},
+        ],
+        "estimated_cost": "6500000.00",
+        "years": 15,
+    }
+
+    def test_matches_stored_projection_without_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, self.payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        user = User.objects.create_user(username="builder", password="pass1234")
+        borough = Borough.objects.create(name="Brooklyn", code="BK")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Bushwick",
+            latitude=Decimal("40.69"), longitude=Decimal("-73.92"), area_sq_miles=Decimal("1.5"),
+        )
+        proposal = Proposal.objects.create(
+            owner=user, neighborhood=hood, title="Saved", lot_size_sqft=Decimal("8000"),
+            total_units=20, estimated_cost=Decimal("6500000.00"),
+        )
+        for unit in self.payload["unit_mix"]:
+            ProposalUnitMix.objects.create(proposal=proposal, avg_sqft=Decimal("600"), **unit)
+        generate_projections([proposal.id], years=15)
+        proposal.refresh_from_db()
+
+        stored = [
+            {key: str(value) if key != "year" else value for key, value in row.items()}
+            for row in proposal.financial_projections.values(
+                "year", "revenue", "expenses", "net_income", "cumulative_roi"
+            )
+        ]
+        self.assertEqual(response.data["financial_projections"], stored)
+        self.assertEqual(response.data["projected_revenue"], str(proposal.projected_revenue))
+
+    def test_unit_mix_revenue_is_memoized(self):
+        from proposals.projections import unit_mix_revenue
+
+        unit_mix_revenue.cache_clear()
+        for cost in ("6000000.00", "6100000.00", "6200000.00"):
+            response = self.client.post(
+                self.url, {**self.payload, "estimated_cost": cost, "revenue_growth": 0.04}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        info = unit_mix_revenue.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+    def test_rejects_invalid_mix(self):
+        empty = {**self.payload, "unit_mix": [{"unit_type": "1br", "count": 0, "projected_rent": "2000"}]}
+        response = self.client.post(self.url, empty, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("unit_mix", response.data)
+        duplicate = {**self.payload, "unit_mix": self.payload["unit_mix"] * 2}
+        response = self.client.post(self.url, duplicate, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
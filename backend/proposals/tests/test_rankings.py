@@ -0,0 +1,121 @@
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from analytics.models import NeighborhoodRanking, NeighborhoodRankingSnapshot
+from analytics.rankings import RANKINGS_REFRESH_DELAY_S, refresh_rankings
+from analytics.tasks import refresh_neighborhood_rankings
+from proposals.caching import local_cache
+from proposals.models import Borough, DemographicProfile, MarketData, Neighborhood
+
+
+def _seed():
+    hoods = []
+    for code, name, count in (("BX", "Bronx", 3), ("BK", "Brooklyn", 5)):
+        borough = Borough.objects.create(name=name, code=code)
+        for i in range(count):
+            hood = Neighborhood.objects.create(
+                borough=borough, name=f"{name} {i}",
+                latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+            )
+            for year, vacancy in ((2024, "9.00"), (2025, f"{2 + i}.50")):
+                MarketData.objects.create(
+                    neighborhood=hood, period=datetime.date(year, 1, 1),
+                    median_sale_price=Decimal("600000"), median_rent=Decimal("2400"),
+                    vacancy_rate_pct=Decimal(vacancy), permits_issued=10,
+                )
+            DemographicProfile.objects.create(
+                neighborhood=hood, year=2025, population=50000 + i,
+                median_income=Decimal("55000"), population_growth_pct=Decimal("1.20"),
+                transit_score=Decimal("80.0"),
+            )
+            hoods.append(hood)
+    return hoods
+
+
+class RankingSnapshotTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear_local()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear_local)
+        self.hoods = _seed()
+        self.assertEqual(refresh_rankings(), len(self.hoods))
+
+    def test_snapshot_matches_view(self):
+        fields = [f.name for f in NeighborhoodRanking._meta.fields]
+        live = list(NeighborhoodRanking.objects.order_by("overall_rank", "neighborhood_id").values(*fields))
+        stored = list(NeighborhoodRankingSnapshot.objects.values(*fields))
+        self.assertEqual(stored, live)
+        self.assertEqual(
+            set(NeighborhoodRankingSnapshot.objects.filter(borough_name="Bronx").values_list("borough_code", flat=True)),
+            {"BX"},
+        )
+
+    def test_endpoint_reads_snapshot_with_filters(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/analytics/rankings/", {"borough": "bx"})
+        self.assertEqual(response.data["count"], 3)
+        self.assertTrue(all(row["borough_code"] == "BX" for row in response.data["results"]))
+        self.assertFalse(any("vw_NeighborhoodRankings" in q["sql"] for q in queries.captured_queries))
+
+        response = self.client.get("/api/analytics/rankings/", {"quartile": 1})
+        ranks = [row["overall_rank"] for row in response.data["results"]]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertTrue(all(row["quartile"] == 1 for row in response.data["results"]))
+
+    @patch("proposals.tasks.rebuild_site_contexts.apply_async")
+    @patch("analytics.tasks.refresh_neighborhood_rankings.apply_async")
+    def test_data_changes_queue_one_debounced_refresh(self, apply_async, _rebuild):
+        hood = self.hoods[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            MarketData.objects.filter(neighborhood=hood, period__year=2025).first().save()
+        with self.captureOnCommitCallbacks(execute=True):
+            hood.save()
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs["countdown"], RANKINGS_REFRESH_DELAY_S)
+
+        # A stale cached page is retired by the task, and the next change
+        # queues a new refresh.
+        MarketData.objects.filter(neighborhood=hood).update(vacancy_rate_pct=Decimal("0.50"))
+        self.client.get("/api/analytics/rankings/")
+        refresh_neighborhood_rankings()
+        top = self.client.get("/api/analytics/rankings/").data["results"][0]
+        self.assertEqual(top["neighborhood_id"], hood.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            hood.save()
+        self.assertEqual(apply_async.call_count, 2)
+
+
+    @patch("proposals.tasks.rebuild_site_contexts.apply_async")
+    @patch("analytics.tasks.refresh_neighborhood_rankings.apply_async")
+    def test_refresh_marker_is_bounded_without_a_shared_cache(self, apply_async, _rebuild):
+        hood = self.hoods[0]
+        with patch("analytics.rankings.RANKINGS_REFRESH_DELAY_S", 0):
+            with self.settings(SHARED_CACHE=True):
+                for _ in range(2):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        hood.save()
+            self.assertEqual(apply_async.call_count, 1)
+            cache.clear()
+            # The worker's release never reaches a per-process cache, so the
+            # marker lapses when the refresh falls due.
+            with self.settings(SHARED_CACHE=False):
+                for _ in range(2):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        hood.save()
+        self.assertEqual(apply_async.call_count, 3)
+
+
+class RankingRefreshQueryTest(TestCase):
+    def test_refresh_is_two_statements(self):
+        _seed()
+        with self.assertNumQueries(4):
+            # savepoint, delete, insert ... select, release
+            refresh_rankings()
@@ -0,0 +1,385 @@
+import datetime
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from proposals.models import (
+    Borough,
+    DemographicProfile,
+    MarketData,
+    Neighborhood,
+    Proposal,
+    ZoningDistrict,
+)
+from proposals import scoring
+from proposals.queueing import BROKER_DOWN_KEY
+from proposals.scoring import (
+    PYTHON,
+    STORED_PROCEDURE,
+    compute_scores,
+    rescore,
+    score_proposals,
+    scoring_backend,
+)
+from proposals.tasks import calculate_feasibility_score, rescore_proposals
+
+
+def reference_score(market, demo, zones, lot_size, total_units):
+    """Row-at-a-time transliteration of sp_CalculateFeasibilityScore."""
+    if market is None or demo is None or not zones:
+        return Decimal("50.00")
+    vacancy = float(market.vacancy_rate_pct)
+    if vacancy < 3:
+        score = 30
+    elif vacancy < 5:
+        score = 25
+    elif vacancy < 8:
+        score = 18
+    else:
+        score = 10
+    growth = float(demo.population_growth_pct)
+    score += 10 if growth > 2 else growth * 5
+    income = float(demo.median_income)
+    score += 8 if income > 80000 else 6 if income > 50000 else 3
+    score += float(demo.transit_score) / 100.0 * 7
+    avg_far = sum(float(z.max_far) for z in zones) / len(zones)
+    score += 15 if avg_far > 5 else 12 if avg_far > 3 else 8 if avg_far > 1.5 else 4
+    score += sum(1 for z in zones if z.residential_allowed) / len(zones) * 100 / 100.0 * 10
+    ratio = None if float(lot_size) == 0 else total_units / float(lot_size) * 1000
+    if ratio is not None and 5 <= ratio <= 20:
+        score += 20
+    elif ratio is not None and 2 <= ratio <= 30:
+        score += 14
+    else:
+        score += 8
+    score = min(max(score, 0), 100)
+    return Decimal(repr(score)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+class ScoringEngineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", password="pass1234")
+        self.borough = Borough.objects.create(name="Bronx", code="BX")
+
+    def _hood(self, name, *, vacancy=None, demo=None, zones=()):
+        hood = Neighborhood.objects.create(
+            borough=self.borough, name=name,
+            latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+        )
+        if vacancy is not None:
+            # An older month with different numbers must be ignored.
+            MarketData.objects.create(
+                neighborhood=hood, period=datetime.date(2024, 1, 1),
+                median_sale_price=Decimal("1"), median_rent=Decimal("1"),
+                vacancy_rate_pct=Decimal("20.00"), permits_issued=0,
+            )
+            MarketData.objects.create(
+                neighborhood=hood, period=datetime.date(2025, 1, 1),
+                median_sale_price=Decimal("650000"), median_rent=Decimal("2100"),
+                vacancy_rate_pct=vacancy, permits_issued=10,
+            )
+        if demo is not None:
+            growth, income, transit = demo
+            DemographicProfile.objects.create(
+                neighborhood=hood, year=2024, population=50000, median_income=income,
+                population_growth_pct=growth, transit_score=transit,
+            )
+        for i, (far, residential) in enumerate(zones):
+            ZoningDistrict.objects.create(
+                neighborhood=hood, code=f"Z{i}", category="residential",
+                max_far=far, max_height_ft=80, residential_allowed=residential,
+            )
+        return hood
+
+    def _proposal(self, hood, lot_size, units):
+        return Proposal.objects.create(
+            owner=self.user, neighborhood=hood, title="P",
+            lot_size_sqft=lot_size, total_units=units,
+        )
+
+    def test_known_score(self):
+        hood = self._hood(
+            "Mott Haven", vacancy=Decimal("2.50"),
+            demo=(Decimal("1.20"), Decimal("42000"), Decimal("88.0")),
+            zones=[(Decimal("3.44"), True), (Decimal("2.00"), False)],
+        )
+        proposal = self._proposal(hood, Decimal("10000"), 100)
+        # 30 + 6 + 3 + 6.16 + 8 (avg FAR 2.72) + 5 + 20 (10 units / 1,000 sq ft)
+        self.assertEqual(compute_scores([proposal.id]), {proposal.id: Decimal("78.16")})
+
+    def test_missing_data_scores_fifty(self):
+        demo = (Decimal("1.0"), Decimal("60000"), Decimal("50.0"))
+        no_market = self._proposal(self._hood("A", demo=demo, zones=[(Decimal("2"), True)]), 1000, 10)
+        no_zoning = self._proposal(self._hood("B", vacancy=Decimal("2"), demo=demo), 1000, 10)
+        scores = compute_scores([no_market.id, no_zoning.id, 999999])
+        self.assertEqual(scores, {no_market.id: Decimal("50.00"), no_zoning.id: Decimal("50.00")})
+
+    def test_matches_reference_on_random_portfolio(self):
+        rng = random.Random(7)
+        proposals = []
+        for h in range(12):
+            hood = self._hood(
+                f"Hood {h}",
+                vacancy=None if h == 0 else Decimal(rng.choice(["1.50", "3.00", "4.99", "7.20", "9.10"])),
+                demo=None if h == 1 else (
+                    Decimal(rng.choice(["-3.50", "0.00", "1.75", "2.00", "2.01", "6.00"])),
+                    Decimal(rng.choice(["30000", "50000", "50001", "80000", "95000"])),
+                    Decimal(rng.choice(["0.0", "45.5", "99.9"])),
+                ),
+                zones=[] if h == 2 else [
+                    (Decimal(rng.choice(["0.50", "1.50", "3.00", "5.00", "10.00"])), rng.random() < 0.7)
+                    for _ in range(rng.randint(1, 4))
+                ],
+            )
+            for _ in range(8):
+                proposals.append(self._proposal(
+                    hood,
+                    Decimal(rng.choice(["0", "500", "2000", "10000", "50000"])),
+                    rng.choice([1, 10, 40, 100, 300]),
+                ))
+
+        with self.assertNumQueries(4):
+            scores = compute_scores([p.id for p in proposals])
+
+        for proposal in proposals:
+            hood = proposal.neighborhood
+            expected = reference_score(
+                hood.market_data.order_by("-period").first(),
+                hood.demographics.order_by("-year").first(),
+                list(hood.zoning_districts.all()),
+                proposal.lot_size_sqft,
+                proposal.total_units,
+            )
+            self.assertEqual(scores[proposal.id], expected, proposal.id)
+
+    def test_score_proposals_writes_without_touching_updated_at(self):
+        hood = self._hood(
+            "Port Morris", vacancy=Decimal("6.00"),
+            demo=(Decimal("3.00"), Decimal("90000"), Decimal("100.0")),
+            zones=[(Decimal("6.00"), True)],
+        )
+        proposal = self._proposal(hood, Decimal("4000"), 10)
+        updated_at = proposal.updated_at
+        score_proposals([proposal.id])
+        proposal.refresh_from_db()
+        self.assertEqual(proposal.feasibility_score, Decimal("82.00"))
+        self.assertEqual(proposal.updated_at, updated_at)
+
+    @override_settings(FEASIBILITY_SCORING_BACKEND="python")
+    def test_task_uses_python_engine(self):
+        hood = self._hood(
+            "Melrose", vacancy=Decimal("4.00"),
+            demo=(Decimal("0.50"), Decimal("55000"), Decimal("70.0")),
+            zones=[(Decimal("4.00"), True)],
+        )
+        proposal = self._proposal(hood, Decimal("10000"), 25)
+        result = calculate_feasibility_score(proposal_id=proposal.id)
+        self.assertEqual(result, {"proposal_id": proposal.id, "feasibility_score": "74.40"})
+        proposal.refresh_from_db()
+        self.assertEqual(proposal.feasibility_score, Decimal("74.40"))
+
+    def test_backend_selection(self):
+        with override_settings(FEASIBILITY_SCORING_BACKEND="auto"):
+            expected = STORED_PROCEDURE if connection.vendor == "microsoft" else PYTHON
+            self.assertEqual(scoring_backend(), expected)
+        with override_settings(FEASIBILITY_SCORING_BACKEND="stored_procedure"):
+            self.assertEqual(scoring_backend(), STORED_PROCEDURE)
+        with override_settings(FEASIBILITY_SCORING_BACKEND="numba"):
+            with self.assertRaises(ValueError):
+                scoring_backend()
+
+    @unittest.skipUnless(connection.vendor == "microsoft", "sp_CalculateFeasibilityScore needs SQL Server")
+    def test_parity_with_stored_procedure(self):
+        self.test_matches_reference_on_random_portfolio()
+        python_scores = compute_scores(Proposal.objects.values_list("id", flat=True))
+        with connection.cursor() as cursor:
+            for proposal_id, expected in python_scores.items():
+                cursor.execute("EXEC sp_CalculateFeasibilityScore @proposal_id = %s", [proposal_id])
+                self.assertEqual(Decimal(str(cursor.fetchone()[0])), expected, proposal_id)
+
+
+class BatchRescoreTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="planner", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hoods = []
+        for name, vacancy in (("Mott Haven", "2.50"), ("Port Morris", "6.00")):
+            hood = Neighborhood.objects.create(
+                borough=borough, name=name,
+                latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+            )
+            MarketData.objects.create(
+                neighborhood=hood, period=datetime.date(2025, 1, 1),
+                median_sale_price=Decimal("650000"), median_rent=Decimal("2100"),
+                vacancy_rate_pct=Decimal(vacancy), permits_issued=10,
+            )
+            DemographicProfile.objects.create(
+                neighborhood=hood, year=2024, population=50000, median_income=Decimal("60000"),
+                population_growth_pct=Decimal("1.00"), transit_score=Decimal("80.0"),
+            )
+            ZoningDistrict.objects.create(
+                neighborhood=hood, code="R7-1", category="residential",
+                max_far=Decimal("3.44"), max_height_ft=80,
+            )
+            self.hoods.append(hood)
+        self.proposals = [
+            Proposal.objects.create(
+                owner=user, neighborhood=self.hoods[i % 2], title=f"P{i}",
+                lot_size_sqft=Decimal("10000"), total_units=10 + i,
+            )
+            for i in range(10)
+        ]
+
+    def test_rescores_neighborhood_in_chunks_and_writes_only_changes(self):
+        calls = []
+        # 1 ID query + per chunk: 4 input queries, 1 bulk UPDATE, the
+        # dashboard delta (2 contribution reads, 1 aggregate UPDATE) and the
+        # portfolio cube delta (2 cell reads, 1 cell lookup, 1 UPDATE).
+        with self.assertNumQueries(1 + 3 * 12):
+            result = rescore(
+                neighborhood_ids=[self.hoods[0].id], chunk_size=2,
+                progress=lambda done, total: calls.append((done, total)),
+            )
+        self.assertEqual(result, {"backend": PYTHON, "proposals": 5, "updated": 5})
+        self.assertEqual(calls, [(2, 5), (4, 5), (5, 5)])
+        self.assertFalse(
+            Proposal.objects.filter(neighborhood=self.hoods[1], feasibility_score__isnull=False).exists()
+        )
+
+        expected = compute_scores([p.id for p in self.proposals])
+        for proposal in Proposal.objects.filter(neighborhood=self.hoods[0]):
+            self.assertEqual(proposal.feasibility_score, expected[proposal.id])
+
+        # Nothing changed, so nothing is written on a second pass.
+        with self.assertNumQueries(1 + 4):
+            again = rescore(neighborhood_ids=[self.hoods[0].id])
+        self.assertEqual(again["updated"], 0)
+
+    def test_task_accepts_mixed_targets(self):
+        result = rescore_proposals(
+            proposal_ids=[self.proposals[1].id], neighborhood_ids=[self.hoods[0].id]
+        )
+        self.assertEqual(result["proposals"], 6)
+        self.assertEqual(Proposal.objects.filter(feasibility_score__isnull=False).count(), 6)
+
+    @patch("analytics.tasks.refresh_neighborhood_rankings.apply_async", MagicMock())
+    @patch("proposals.tasks.rebuild_site_contexts.apply_async")
+    @patch("proposals.tasks.rescore_proposals.apply_async")
+    def test_ingest_queues_one_rescore(self, apply_async, _rebuild):
+        from proposals.ingest import invalidate_after_ingest
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        invalidate_after_ingest({self.hoods[1].id, self.hoods[0].id})
+        apply_async.assert_called_once()
+        self.assertEqual(
+            apply_async.call_args.kwargs["kwargs"],
+            {"neighborhood_ids": sorted([self.hoods[0].id, self.hoods[1].id])},
+        )
+        # Neighborhood sweeps run under the maintenance queue's limits, not scoring's.
+        self.assertEqual(apply_async.call_args.kwargs["queue"], "maintenance")
+        self.assertEqual(
+            (apply_async.call_args.kwargs["soft_time_limit"], apply_async.call_args.kwargs["time_limit"]),
+            settings.TASK_QUEUE_TIME_LIMITS["maintenance"],
+        )
+
+
+@patch("proposals.tasks.rescore_proposals.apply_async")
+class DebouncedRecalcTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Saves in earlier tests' rolled-back transactions leave IDs behind.
+        scoring._recalc.ids = set()
+        user = User.objects.create_user(username="planner", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.8"), longitude=Decimal("-73.9"), area_sq_miles=Decimal("1.0"),
+        )
+        for i in range(4):
+            Proposal.objects.create(
+                owner=user, neighborhood=self.hood, title=f"P{i}",
+                lot_size_sqft=Decimal("10000"), total_units=10 + i,
+            )
+        self.proposals = list(Proposal.objects.order_by("id"))
+
+    def _save(self, proposal, **changes):
+        for name, value in changes.items():
+            setattr(proposal, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            proposal.save()
+
+    def test_only_scored_field_changes_queue_a_rescore(self, apply_async):
+        proposal = self.proposals[0]
+        self._save(proposal, title="Renamed", description="New copy")
+        self._save(proposal, lot_size_sqft="10000")  # same value, different type
+        apply_async.assert_not_called()
+
+        self._save(proposal, total_units=40)
+        apply_async.assert_called_once_with(
+            args=[], kwargs={"proposal_ids": [proposal.id]}, countdown=10, retry=False
+        )
+
+    def test_saves_inside_the_window_coalesce(self, apply_async):
+        proposal = self.proposals[0]
+        for units in (20, 21, 22):
+            self._save(proposal, total_units=units)
+        self.assertEqual(apply_async.call_count, 1)
+
+        # Once the job starts, later edits need a new one.
+        rescore_proposals(proposal_ids=[proposal.id])
+        self.assertEqual(Proposal.objects.get(pk=proposal.pk).feasibility_score, Decimal("50.00"))
+        self._save(proposal, total_units=23)
+        self.assertEqual(apply_async.call_count, 2)
+
+    @override_settings(FEASIBILITY_RECALC_DEBOUNCE_S=0)
+    def test_markers_outlive_the_window_only_in_a_shared_cache(self, apply_async):
+        proposal = self.proposals[0]
+        with self.settings(SHARED_CACHE=True):
+            self._save(proposal, total_units=20)
+            self._save(proposal, total_units=21)
+        self.assertEqual(apply_async.call_count, 1)
+
+        # A worker cannot clear a per-process marker, so it must not outlive
+        # the job's countdown or later edits would never be rescored.
+        cache.clear()
+        with self.settings(SHARED_CACHE=False):
+            self._save(proposal, total_units=22)
+            self._save(proposal, total_units=23)
+        self.assertEqual(apply_async.call_count, 3)
+
+    def test_bulk_edit_is_one_batch_job(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            for proposal in self.proposals:
+                proposal.lot_size_sqft = Decimal("12000")
+                proposal.save()
+        apply_async.assert_called_once()
+        self.assertEqual(
+            apply_async.call_args.kwargs["kwargs"], {"proposal_ids": [p.id for p in self.proposals]}
+        )
+
+    def test_update_fields_limit_what_counts(self, apply_async):
+        proposal = self.proposals[0]
+        proposal.total_units = 99
+        with self.captureOnCommitCallbacks(execute=True):
+            proposal.save(update_fields=["title"])
+        apply_async.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            proposal.save(update_fields=["total_units"])
+        apply_async.assert_called_once()
+
+    def test_failed_enqueue_releases_the_marker(self, apply_async):
+        apply_async.side_effect = ConnectionError("no broker")
+        self._save(self.proposals[0], total_units=30)
+        cache.delete(BROKER_DOWN_KEY)
+        apply_async.side_effect = None
+        self._save(self.proposals[0], total_units=31)
+        self.assertEqual(apply_async.call_count, 2)
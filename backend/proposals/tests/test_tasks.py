@@ -1,11 +1,24 @@
+import datetime
+from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-from proposals.tasks import calculate_feasibility_score, generate_financial_projections
+from proposals.caching import local_cache, market_views
+from proposals.models import Borough, MarketData, Neighborhood
+from proposals.tasks import (
+    calculate_feasibility_score,
+    generate_financial_projections,
+    refresh_market_data_cache,
+    run_green_tape,
+)
 
 
 class CalculateFeasibilityScoreTest(TestCase):
+    @override_settings(FEASIBILITY_SCORING_BACKEND="stored_procedure")
     @patch("proposals.tasks.connection")
     def test_calls_stored_procedure(self, mock_conn):
         mock_cursor = MagicMock()
@@ -23,6 +36,7 @@ class CalculateFeasibilityScoreTest(TestCase):
 
 
 class GenerateFinancialProjectionsTest(TestCase):
+    @override_settings(FINANCIAL_PROJECTION_BACKEND="stored_procedure")
     @patch("proposals.tasks.connection")
     def test_calls_stored_procedure(self, mock_conn):
         mock_cursor = MagicMock()
@@ -37,3 +51,96 @@ class GenerateFinancialProjectionsTest(TestCase):
         )
         self.assertEqual(result["proposal_id"], 42)
         self.assertEqual(result["years"], 10)
+
+
+class RefreshMarketDataCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear_local()
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        self.hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+        MarketData.objects.create(
+            neighborhood=self.hood, period=datetime.date(2025, 1, 1),
+            median_sale_price=Decimal("650000"), median_rent=Decimal("2100"),
+            vacancy_rate_pct=Decimal("2.50"), permits_issued=12,
+        )
+
+    def tearDown(self):
+        cache.clear()
+        local_cache.clear_local()
+
+    def test_invalidates_by_generation_and_warms(self):
+        client = APIClient(SERVER_NAME="localhost")
+        before = market_views.invalidate()
+        stale = client.get("/api/neighborhoods/map-data/").data
+
+        result = refresh_market_data_cache()
+
+        self.assertEqual(result["generation"], before + 1)
+        self.assertTrue(all(code == 200 for code in result["views"].values()), result)
+        self.assertEqual(result["site_contexts"], 1)
+        # Warmed pages are served without touching the database.
+        with self.assertNumQueries(0):
+            fresh = client.get("/api/neighborhoods/map-data/")
+            client.get("/api/analytics/rankings/")
+        self.assertEqual(fresh.data, stale)
+        self.assertIsNotNone(cache.get(f"nyc_site_ctx:{self.hood.id}"))
+
+
+class TaskRoutingTest(TestCase):
+    def test_every_task_has_a_dedicated_queue(self):
+        from celery import current_app
+
+        import analytics.tasks
+        import proposals.tasks as tasks
+
+        router = current_app.amqp.router
+        names = {
+            obj.name
+            for module in (tasks, analytics.tasks)
+            for obj in vars(module).values()
+            if getattr(obj, "name", "").startswith(module.__name__ + ".")
+        }
+        queues = {name: router.route({}, name)["queue"].name for name in names}
+        self.assertEqual(queues["proposals.tasks.run_green_tape"], "llm")
+        self.assertEqual(queues["proposals.tasks.calculate_feasibility_score"], "scoring")
+        self.assertEqual(queues["proposals.tasks.refresh_market_data_cache"], "maintenance")
+        self.assertEqual(set(queues.values()), {"llm", "scoring", "maintenance"})
+        # Unrouted tasks would silently fall back to the maintenance queue.
+        routed = {task for tasks_ in settings.TASK_QUEUE_ASSIGNMENTS.values() for task in tasks_}
+        self.assertEqual(names, routed)
+        self.assertEqual(tasks.calculate_feasibility_score.time_limit, 90)
+
+
+def _llm_unconfigured(*args, **kwargs):
+    from config.llm import LLMConfigurationError
+
+    raise LLMConfigurationError("no key")
+
+
+@patch("proposals.agents.call_llm_json_response", _llm_unconfigured)
+@patch("proposals.agents.call_llm", _llm_unconfigured)
+class RunGreenTapeTaskTest(TestCase):
+    def test_run_is_recorded(self):
+        from django.contrib.auth.models import User
+
+        from proposals.models import GreenTapeRun
+
+        user = User.objects.create_user(username="planner", password="pass1234")
+        borough = Borough.objects.create(name="Bronx", code="BX")
+        hood = Neighborhood.objects.create(
+            borough=borough, name="Mott Haven",
+            latitude=Decimal("40.808"), longitude=Decimal("-73.923"),
+            area_sq_miles=Decimal("0.89"),
+        )
+        result = run_green_tape(
+            user_id=user.id, neighborhood_id=hood.id,
+            lot_size_sqft=20000.0, user_goal="Deeply affordable CLT",
+        )
+        run = GreenTapeRun.objects.get()
+        self.assertEqual(result, {"run_id": run.id, "overall_score": "50.00"})
+        self.assertEqual(run.user, user)
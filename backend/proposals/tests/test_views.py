@@ -1,11 +1,13 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
-from proposals.models import Borough, Neighborhood, Proposal, ProposalUnitMix
+from proposals.caching import local_cache
+from proposals.models import Borough, Neighborhood, Proposal, ProposalUnitMix, ZoningDistrict
 
 User = get_user_model()
 
@@ -55,6 +57,20 @@ class NeighborhoodViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("zoning_districts", response.data)
 
+    def test_map_data_zoning_from_reference_cache(self):
+        cache.clear()
+        local_cache.clear_local()
+        ZoningDistrict.objects.create(
+            neighborhood=self.hood1, code="R6", category="residential",
+            max_far=Decimal("2.43"), max_height_ft=70,
+        )
+        response = self.client.get("/api/neighborhoods/map-data/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        by_id = {row["id"]: row for row in response.data}
+        self.assertEqual(by_id[self.hood1.id]["zoning_codes"], ["R6"])
+        self.assertTrue(by_id[self.hood1.id]["zoning_has_residential"])
+        self.assertEqual(by_id[self.hood2.id]["zoning_codes"], [])
+
 
 class ProposalViewSetTest(APITestCase):
     def setUp(self):
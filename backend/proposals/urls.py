@@ -1,13 +1,30 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import BoroughViewSet, NeighborhoodViewSet, ProposalViewSet
+from .views import (
+    BoroughViewSet,
+    GreenTapeRunViewSet,
+    NeighborhoodViewSet,
+    ProposalViewSet,
+    TaskStatusView,
+    green_tape_run_async,
+    proposal_events,
+)
 
 router = DefaultRouter()
 router.register(r"boroughs", BoroughViewSet, basename="borough")
 router.register(r"neighborhoods", NeighborhoodViewSet, basename="neighborhood")
 router.register(r"proposals", ProposalViewSet, basename="proposal")
+router.register(r"green-tape-runs", GreenTapeRunViewSet, basename="green-tape-run")
 
 urlpatterns = [
+    # Registered ahead of the router so the proposal detail route does not match it.
+    path(
+        "proposals/green-tape-run/async/",
+        green_tape_run_async,
+        name="proposal-green-tape-run-async",
+    ),
+    path("proposals/<int:pk>/events/", proposal_events, name="proposal-events"),
+    path("tasks/<str:task_id>/", TaskStatusView.as_view(), name="task-status"),
     path("", include(router.urls)),
 ]
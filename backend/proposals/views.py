@@ -1,29 +1,53 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from celery.result import AsyncResult
+from celery.states import FAILURE, READY_STATES, SUCCESS
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Count, Subquery, OuterRef, DecimalField, F, Window
 from django.db.models.functions import Rank
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from rest_framework import status, viewsets
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, status, viewsets
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from django.db.models import Count, Q
 
-from .agents import run_green_tape_pipeline
-from .filters import NeighborhoodFilter, ProposalFilter
+from .agents import arun_green_tape_pipeline, record_green_tape_run, run_green_tape_pipeline
+from .caching import cached_view, market_views
+from .events import events_since, latest_id as latest_event_id
+from .filters import GreenTapeRunFilter, NeighborhoodFilter, ProposalFilter
+from .llm_metrics import GROUP_BY_FIELDS, aggregate_step_metrics
 from .models import (
     Borough,
     DemographicProfile,
+    GreenTapeRun,
+    GreenTapeStep,
     MarketData,
     Neighborhood,
     Proposal,
     ZoningDistrict,
 )
+from .nyc_data import get_zoning_profiles, reference_cache
 from .permissions import IsProposalOwnerOrReadOnly
+from .projections import load_projection_inputs, simulate, what_if
+from .queueing import broker_down
 from .serializers import (
     BoroughSerializer,
     GreenTapeRequestSerializer,
     GreenTapeResponseSerializer,
+    GreenTapeRunDetailSerializer,
+    GreenTapeRunListSerializer,
     MarketDataSerializer,
     NeighborhoodDetailSerializer,
     NeighborhoodListSerializer,
@@ -31,6 +55,8 @@ from .serializers import (
     ProposalCreateUpdateSerializer,
     ProposalDetailSerializer,
     ProposalListSerializer,
+    ProjectionSimulationSerializer,
+    WhatIfProjectionSerializer,
 )
 from .tasks import calculate_feasibility_score, generate_financial_projections
 
@@ -41,7 +67,8 @@ class BoroughViewSet(viewsets.ReadOnlyModelViewSet):
         neighborhood_count=Count("neighborhoods")
     )
 
-    @method_decorator(cache_page(60 * 15))
+    # Borough and neighborhood changes retire the reference namespace.
+    @cached_view(reference_cache, 60 * 15)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -61,7 +88,7 @@ class NeighborhoodViewSet(viewsets.ReadOnlyModelViewSet):
             return NeighborhoodDetailSerializer
         return NeighborhoodListSerializer
 
-    @method_decorator(cache_page(60 * 10))
+    @cached_view(market_views, 60 * 10)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -74,13 +101,12 @@ class NeighborhoodViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"], url_path="map-data")
-    @method_decorator(cache_page(60 * 10))
+    @cached_view(market_views, 60 * 10)
     def map_data(self, request):
         """Enriched neighborhood data for the opportunity map (zoning, approval, demand, infra)."""
         neighborhoods = (
             Neighborhood.objects.select_related("borough")
             .prefetch_related(
-                "zoning_districts",
                 "market_data",
                 "demographics",
             )
@@ -96,13 +122,17 @@ class NeighborhoodViewSet(viewsets.ReadOnlyModelViewSet):
             _approved=approved_count, _rejected=rejected_count
         )
 
+        zoning_profiles = get_zoning_profiles()
+        no_zoning = {"categories": [], "codes": []}
+
         result = []
         for n in neighborhoods:
-            zoning = list(n.zoning_districts.values_list("category", flat=True))
+            profile = zoning_profiles.get(n.id, no_zoning)
+            zoning = profile["categories"]
             zoning_has_residential = "residential" in zoning
             zoning_has_commercial = "commercial" in zoning
             zoning_has_mixed = "mixed" in zoning
-            zoning_codes = list(n.zoning_districts.values_list("code", flat=True))
+            zoning_codes = profile["codes"]
 
             total_decided = n._approved + n._rejected
             approval_rate_pct = (
@@ -156,6 +186,23 @@ class NeighborhoodViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
+def _task_links(request, task_id, proposal_id, since):
+    """
+    Where a client can follow a queued task: poll its status or, when web and
+    workers share a cache, stream events.
+    """
+
+    links = {
+        "task_id": task_id,
+        "status_url": request.build_absolute_uri(reverse("task-status", args=[task_id])),
+    }
+    if settings.SHARED_CACHE:
+        links["events_url"] = request.build_absolute_uri(
+            f"{reverse('proposal-events', args=[proposal_id])}?last_event_id={since}"
+        )
+    return links
+
+
 class ProposalViewSet(viewsets.ModelViewSet):
     filterset_class = ProposalFilter
     search_fields = ["title", "description"]
@@ -165,8 +212,10 @@ class ProposalViewSet(viewsets.ModelViewSet):
     ]
 
     def get_permissions(self):
-        if self.action in ("create",):
+        if self.action in ("create", "simulate_projections"):
             return [IsAuthenticated()]
+        if self.action == "what_if":
+            return [AllowAny()]
         if self.action in ("update", "partial_update", "destroy"):
             return [IsAuthenticated(), IsProposalOwnerOrReadOnly()]
         return [IsAuthenticatedOrReadOnly()]
@@ -205,7 +254,8 @@ class ProposalViewSet(viewsets.ModelViewSet):
 
         This endpoint does not persist a Proposal record; instead it returns
         a fully evaluated and optimized draft so that PDO-focused users can
-        iterate on concepts before committing them.
+        iterate on concepts before committing them. The run itself is stored
+        as a GreenTapeRun so it can be revisited from the history endpoints.
         """
 
         serializer = GreenTapeRequestSerializer(data=request.data)
@@ -228,24 +278,33 @@ class ProposalViewSet(viewsets.ModelViewSet):
             user_goal=data["user_goal"],
             additional_notes=data.get("additional_notes", ""),
             max_iterations=data.get("max_iterations", 1),
+            target_score=data.get("target_score"),
+        )
+        run = record_green_tape_run(
+            user=request.user, neighborhood=neighborhood, result=pipeline_result
         )
+        pipeline_result["run_id"] = run.id
 
         response_serializer = GreenTapeResponseSerializer(pipeline_result)
         return Response(response_serializer.data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated, IsProposalOwnerOrReadOnly])
     def calculate_score(self, request, pk=None):
-        """Trigger async feasibility score calculation via stored procedure."""
+        """Trigger async feasibility score calculation; watch it via the returned URLs."""
         proposal = self.get_object()
-        calculate_feasibility_score.delay(proposal.id)
+        since = latest_event_id(proposal.id)
+        task = calculate_feasibility_score.delay(proposal.id)
         return Response(
-            {"detail": "Feasibility score calculation queued."},
+            {
+                "detail": "Feasibility score calculation queued.",
+                **_task_links(request, task.id, proposal.id, since),
+            },
             status=status.HTTP_202_ACCEPTED,
         )
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated, IsProposalOwnerOrReadOnly])
     def generate_projections(self, request, pk=None):
-        """Trigger async financial projection generation via stored procedure."""
+        """Trigger async financial projection generation; watch it via the returned URLs."""
         proposal = self.get_object()
         if not proposal.estimated_cost:
             return Response(
@@ -258,8 +317,345 @@ class ProposalViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         years = int(request.data.get("years", 10))
-        generate_financial_projections.delay(proposal.id, years)
+        since = latest_event_id(proposal.id)
+        task = generate_financial_projections.delay(proposal.id, years)
         return Response(
-            {"detail": f"Financial projections ({years} years) generation queued."},
+            {
+                "detail": f"Financial projections ({years} years) generation queued.",
+                **_task_links(request, task.id, proposal.id, since),
+            },
             status=status.HTTP_202_ACCEPTED,
         )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        authentication_classes=[],
+        url_path="what-if",
+    )
+    def what_if(self, request):
+        """
+        Live projection preview for the proposal builder's sliders.
+
+        Takes an unsaved unit mix, cost and optional assumptions and returns
+        rows shaped like ``financial_projections``. Nothing is read or
+        written, not even an auth token, so it can be called on every tick.
+        """
+        serializer = WhatIfProjectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        return Response(
+            what_if(
+                data["unit_mix"],
+                data["estimated_cost"],
+                years=data["years"],
+                assumptions=serializer.to_assumptions(),
+            )
+        )
+
+    @action(detail=True, methods=["post"], url_path="simulate-projections")
+    def simulate_projections(self, request, pk=None):
+        """
+        Monte Carlo sensitivity analysis of the financial projection.
+
+        Draws ``scenarios`` sets of rent growth, expense inflation, vacancy and
+        construction overrun, and returns P10/P50/P90 bands of net income and
+        cumulative ROI per year. Nothing is stored, so it runs inline.
+        """
+        proposal = self.get_object()
+        serializer = ProjectionSimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        ids, annual_revenue, estimated_cost, skipped = load_projection_inputs([proposal.id])
+        if proposal.id in skipped:
+            return Response(
+                {"detail": f"Cannot simulate projections: {skipped[proposal.id]}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = simulate(
+            float(annual_revenue[0]),
+            float(estimated_cost[0]),
+            years=data["years"],
+            scenarios=data["scenarios"],
+            assumptions=serializer.to_assumptions(),
+            seed=data.get("seed"),
+        )
+        return Response({"proposal_id": proposal.id, **result})
+
+
+class GreenTapeRunViewSet(viewsets.ReadOnlyModelViewSet):
+    """Stored Green-Tape runs for the current user; reads never call the LLM."""
+
+    permission_classes = [IsAuthenticated]
+    filterset_class = GreenTapeRunFilter
+    ordering_fields = ["created_at", "overall_score", "duration_ms"]
+
+    def get_queryset(self):
+        qs = GreenTapeRun.objects.filter(user=self.request.user).select_related(
+            "neighborhood", "neighborhood__borough"
+        )
+        if self.action in ("retrieve", "compare"):
+            qs = qs.select_related("draft", "final_draft").prefetch_related(
+                "steps__prompt", "steps__output"
+            )
+        return qs
+
+    def get_serializer_class(self):
+        if self.action in ("retrieve", "compare"):
+            return GreenTapeRunDetailSerializer
+        return GreenTapeRunListSerializer
+
+    @action(detail=False, methods=["get"])
+    def compare(self, request):
+        """Side-by-side view of up to five stored runs (?ids=1,2,3)."""
+        raw_ids = request.query_params.get("ids", "")
+        try:
+            ids = [int(i) for i in raw_ids.split(",") if i.strip()]
+        except ValueError:
+            return Response(
+                {"detail": "ids must be a comma-separated list of integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not 2 <= len(ids) <= 5:
+            return Response(
+                {"detail": "Provide between 2 and 5 run ids to compare."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        runs = {run.id: run for run in self.get_queryset().filter(id__in=ids)}
+        ordered = [runs[i] for i in ids if i in runs]
+        serializer = self.get_serializer(ordered, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def metrics(self, request):
+        """
+        p50/p95 latency, token and cost rollups of LLM calls.
+
+        ?group_by=step,model,day (any combination) and ?days=N (default 7).
+        Staff see every user's runs; everyone else sees their own.
+        """
+        group_by = [
+            g.strip() for g in request.query_params.get("group_by", "step").split(",") if g.strip()
+        ]
+        unknown = [g for g in group_by if g not in GROUP_BY_FIELDS]
+        if unknown or not group_by:
+            return Response(
+                {"detail": f"group_by must be drawn from {sorted(GROUP_BY_FIELDS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            days = max(1, min(int(request.query_params.get("days", 7)), 90))
+        except ValueError:
+            return Response(
+                {"detail": "days must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        steps = GreenTapeStep.objects.all()
+        if not request.user.is_staff:
+            steps = steps.filter(run__user=request.user)
+        return Response(aggregate_step_metrics(steps, group_by=group_by, days=days))
+
+
+class TaskStatusView(APIView):
+    """
+    Lightweight status of a queued task: state, progress and, once it has
+    finished, its result or error. Unknown IDs report PENDING.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, task_id):
+        if broker_down():
+            return Response(
+                {"detail": "Task status is temporarily unavailable."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        result = AsyncResult(task_id)
+        try:
+            state = result.state
+            info = result.info
+        except Exception:
+            return Response(
+                {"detail": "Task status is temporarily unavailable."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        payload = {"task_id": task_id, "state": state, "ready": state in READY_STATES}
+        if state == SUCCESS:
+            payload["result"] = info
+        elif state == FAILURE:
+            payload["error"] = str(info)
+        elif isinstance(info, dict):
+            payload["progress"] = info
+        return Response(payload)
+
+
+def _authenticate(request):
+    """
+    (user, None) for a token- or session-authenticated request, else
+    (None, error response). DRF's exception handler does not run for these
+    plain Django views, so failures such as a missing CSRF token on a
+    session POST are turned into responses here.
+    """
+
+    drf_request = Request(
+        request, authenticators=[TokenAuthentication(), SessionAuthentication()]
+    )
+    try:
+        user = drf_request.user
+    except exceptions.APIException as exc:
+        return None, JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+    if not user.is_authenticated:
+        return None, JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    return user, None
+
+
+@csrf_exempt
+@require_POST
+async def green_tape_run_async(request):
+    """
+    Async variant of ProposalViewSet.green_tape_run for ASGI deployments.
+
+    The LLM round-trips are awaited instead of holding a worker thread, so a
+    single process can keep many pipelines in flight. Request and response
+    bodies match the synchronous endpoint.
+    """
+
+    user, error = await sync_to_async(_authenticate)(request)
+    if error is not None:
+        return error
+
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "Malformed JSON body."}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = GreenTapeRequestSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    try:
+        neighborhood = await Neighborhood.objects.select_related("borough").aget(
+            pk=data["neighborhood_id"]
+        )
+    except Neighborhood.DoesNotExist:
+        return JsonResponse(
+            {"detail": "Neighborhood not found."}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    pipeline_result = await arun_green_tape_pipeline(
+        neighborhood=neighborhood,
+        lot_size_sqft=data["lot_size_sqft"],
+        user_goal=data["user_goal"],
+        additional_notes=data.get("additional_notes", ""),
+        max_iterations=data.get("max_iterations", 1),
+        target_score=data.get("target_score"),
+    )
+    run = await sync_to_async(record_green_tape_run)(
+        user=user, neighborhood=neighborhood, result=pipeline_result
+    )
+    pipeline_result["run_id"] = run.id
+
+    response_serializer = GreenTapeResponseSerializer(pipeline_result)
+    return JsonResponse(response_serializer.data, status=status.HTTP_200_OK)
+
+
+def _sse(event) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+class _EventStream:
+    """Position, deadline and heartbeat schedule of one SSE connection."""
+
+    def __init__(self, proposal_id, last_id):
+        now = time.monotonic()
+        self.proposal_id = proposal_id
+        self.last_id = last_id
+        self.deadline = now + settings.PROPOSAL_EVENTS_STREAM_S
+        self.next_heartbeat = now + settings.PROPOSAL_EVENTS_HEARTBEAT_S
+
+    def poll(self):
+        """(frames due now, whether the stream should end)."""
+        frames = []
+        for event in events_since(self.proposal_id, self.last_id):
+            self.last_id = event["id"]
+            frames.append(_sse(event))
+        now = time.monotonic()
+        if now >= self.deadline:
+            return frames, True
+        if now >= self.next_heartbeat:
+            self.next_heartbeat = now + settings.PROPOSAL_EVENTS_HEARTBEAT_S
+            frames.append(": keep-alive\n\n")
+        return frames, False
+
+
+def _event_frames(stream):
+    # WSGI servers (runserver included) consume an async iterator whole
+    # before sending anything, so they get a blocking generator instead.
+    yield f"retry: {settings.PROPOSAL_EVENTS_RETRY_MS}\n\n"
+    while True:
+        frames, done = stream.poll()
+        yield from frames
+        if done:
+            return
+        time.sleep(settings.PROPOSAL_EVENTS_POLL_S)
+
+
+async def _aevent_frames(stream):
+    yield f"retry: {settings.PROPOSAL_EVENTS_RETRY_MS}\n\n"
+    while True:
+        frames, done = await sync_to_async(stream.poll)()
+        for frame in frames:
+            yield frame
+        if done:
+            return
+        await asyncio.sleep(settings.PROPOSAL_EVENTS_POLL_S)
+
+
+@require_GET
+async def proposal_events(request, pk):
+    """
+    Server-sent events for one proposal: "score_ready", "projections_ready"
+    and their "*_failed" counterparts, each carrying the new values.
+
+    Pass ``?last_event_id=`` from the 202 response (or let EventSource send
+    Last-Event-ID on reconnect) to receive events published since then. The
+    stream ends after PROPOSAL_EVENTS_STREAM_S so long-lived connections
+    recycle; clients reconnect and resume from the last ID.
+
+    Events reach the web process through the cache, so the endpoint needs a
+    cache shared with the workers (SHARED_CACHE). Under ASGI a stream costs
+    no thread; under WSGI it holds one worker thread for its duration.
+    """
+
+    user, error = await sync_to_async(_authenticate)(request)
+    if error is not None:
+        return error
+    if not settings.SHARED_CACHE:
+        return JsonResponse(
+            {"detail": "Proposal events need a cache shared with the workers (set REDIS_URL)."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    if not await Proposal.objects.filter(pk=pk).aexists():
+        return JsonResponse({"detail": "Proposal not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    raw_last = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        last_id = int(raw_last) if raw_last is not None else None
+    except ValueError:
+        return JsonResponse(
+            {"detail": "last_event_id must be an integer."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if last_id is None:
+        last_id = await sync_to_async(latest_event_id)(pk)
+
+    stream = _EventStream(pk, last_id)
+    frames = _aevent_frames(stream) if isinstance(request, ASGIRequest) else _event_frames(stream)
+    response = StreamingHttpResponse(frames, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
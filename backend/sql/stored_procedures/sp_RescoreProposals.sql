@@ -0,0 +1,112 @@
+CREATE OR ALTER PROCEDURE sp_RescoreProposals
+    @proposal_ids NVARCHAR(MAX) = NULL,
+    @neighborhood_ids NVARCHAR(MAX) = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- proposals_proposal has triggers, so OUTPUT must go INTO a table.
+    DECLARE @changed TABLE (id BIGINT PRIMARY KEY, feasibility_score DECIMAL(5,2));
+
+    -- Set-based variant of sp_CalculateFeasibilityScore: rescores every
+    -- proposal in the comma-separated ID lists with one UPDATE and returns
+    -- the rows whose score changed.
+    WITH Targets AS (
+        SELECT id, neighborhood_id, lot_size_sqft, total_units
+        FROM proposals_proposal
+        WHERE id IN (SELECT CAST(value AS BIGINT) FROM STRING_SPLIT(@proposal_ids, ','))
+           OR neighborhood_id IN (SELECT CAST(value AS BIGINT) FROM STRING_SPLIT(@neighborhood_ids, ','))
+    ),
+    LatestMarket AS (
+        SELECT
+            neighborhood_id,
+            vacancy_rate_pct,
+            ROW_NUMBER() OVER (PARTITION BY neighborhood_id ORDER BY period DESC) AS rn
+        FROM proposals_marketdata
+        WHERE neighborhood_id IN (SELECT neighborhood_id FROM Targets)
+    ),
+    LatestDemo AS (
+        SELECT
+            neighborhood_id,
+            median_income,
+            population_growth_pct,
+            transit_score,
+            ROW_NUMBER() OVER (PARTITION BY neighborhood_id ORDER BY year DESC) AS rn
+        FROM proposals_demographicprofile
+        WHERE neighborhood_id IN (SELECT neighborhood_id FROM Targets)
+    ),
+    ZoningScore AS (
+        SELECT
+            neighborhood_id,
+            AVG(max_far) AS avg_far,
+            CAST(SUM(CASE WHEN residential_allowed = 1 THEN 1 ELSE 0 END) AS FLOAT)
+                / NULLIF(COUNT(*), 0) * 100 AS residential_pct
+        FROM proposals_zoningdistrict
+        WHERE neighborhood_id IN (SELECT neighborhood_id FROM Targets)
+        GROUP BY neighborhood_id
+    ),
+    Scored AS (
+        SELECT
+            t.id,
+            CAST(ISNULL(
+                -- A missing market or demographic row yields NULL, as the
+                -- single-proposal procedure's empty CROSS JOIN does.
+                CASE WHEN m.neighborhood_id IS NULL OR d.neighborhood_id IS NULL THEN NULL ELSE
+                    -- Market strength (30% weight)
+                    (CASE
+                        WHEN m.vacancy_rate_pct < 3 THEN 30
+                        WHEN m.vacancy_rate_pct < 5 THEN 25
+                        WHEN m.vacancy_rate_pct < 8 THEN 18
+                        ELSE 10
+                    END)
+                    -- Demographic strength (25% weight)
+                    + (CASE
+                        WHEN d.population_growth_pct > 2 THEN 10 ELSE d.population_growth_pct * 5
+                    END)
+                    + (CASE
+                        WHEN d.median_income > 80000 THEN 8
+                        WHEN d.median_income > 50000 THEN 6
+                        ELSE 3
+                    END)
+                    + (d.transit_score / 100.0 * 7)
+                    -- Zoning favorability (25% weight); NULL without districts
+                    + (CASE
+                        WHEN z.avg_far > 5 THEN 15
+                        WHEN z.avg_far > 3 THEN 12
+                        WHEN z.avg_far > 1.5 THEN 8
+                        ELSE 4
+                    END)
+                    + (z.residential_pct / 100.0 * 10)
+                    -- Density efficiency (20% weight)
+                    + (CASE
+                        WHEN t.total_units * 1.0 / NULLIF(t.lot_size_sqft, 0) * 1000 BETWEEN 5 AND 20 THEN 20
+                        WHEN t.total_units * 1.0 / NULLIF(t.lot_size_sqft, 0) * 1000 BETWEEN 2 AND 30 THEN 14
+                        ELSE 8
+                    END)
+                END,
+                50.00
+            ) AS DECIMAL(7,2)) AS raw_score
+        FROM Targets t
+        LEFT JOIN LatestMarket m ON m.neighborhood_id = t.neighborhood_id AND m.rn = 1
+        LEFT JOIN LatestDemo d ON d.neighborhood_id = t.neighborhood_id AND d.rn = 1
+        LEFT JOIN ZoningScore z ON z.neighborhood_id = t.neighborhood_id
+    ),
+    Clamped AS (
+        SELECT
+            id,
+            CAST(CASE
+                WHEN raw_score > 100 THEN 100
+                WHEN raw_score < 0 THEN 0
+                ELSE raw_score
+            END AS DECIMAL(5,2)) AS score
+        FROM Scored
+    )
+    UPDATE p
+    SET feasibility_score = c.score
+    OUTPUT inserted.id, inserted.feasibility_score INTO @changed
+    FROM proposals_proposal p
+    INNER JOIN Clamped c ON c.id = p.id
+    WHERE p.feasibility_score IS NULL OR p.feasibility_score <> c.score;
+
+    SELECT id, feasibility_score FROM @changed;
+END;
@@ -1,4 +1,7 @@
 CREATE OR ALTER VIEW vw_MarketTrends AS
+-- Change columns are maintained on proposals_marketdata at write and ingest
+-- time, so a neighborhood filter seeks the (neighborhood_id, period) index
+-- instead of evaluating LAG windows over every neighborhood.
 SELECT
     m.id,
     m.neighborhood_id,
@@ -6,23 +9,9 @@ SELECT
     m.period,
     m.median_sale_price,
     m.median_rent,
-    CAST(
-        (m.median_sale_price - LAG(m.median_sale_price) OVER (
-            PARTITION BY m.neighborhood_id ORDER BY m.period
-        ))
-        / NULLIF(LAG(m.median_sale_price) OVER (
-            PARTITION BY m.neighborhood_id ORDER BY m.period
-        ), 0) * 100
-        AS DECIMAL(7,2)
-    ) AS price_change_pct,
-    CAST(
-        (m.median_rent - LAG(m.median_rent) OVER (
-            PARTITION BY m.neighborhood_id ORDER BY m.period
-        ))
-        / NULLIF(LAG(m.median_rent) OVER (
-            PARTITION BY m.neighborhood_id ORDER BY m.period
-        ), 0) * 100
-        AS DECIMAL(7,2)
-    ) AS rent_change_pct
+    m.price_change_pct,
+    m.rent_change_pct,
+    m.price_change_yoy_pct,
+    m.rent_change_yoy_pct
 FROM proposals_marketdata m
 INNER JOIN proposals_neighborhood n ON n.id = m.neighborhood_id;